@@ -16,10 +16,6 @@ migrate = Migrate()
 login_manager = LoginManager()
 compress = Compress()  # +++
 
-# Import our babel setup (needs to be after initializing the other extensions)
-from app.babel import init_babel
-from app.cache import init_cache, cache
-
 def _enable_sqlite_pragmas(app: Flask):
     """Вмикаємо WAL/синхронізацію/тимчасове в памʼяті для SQLite."""
     uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
@@ -45,12 +41,22 @@ def _enable_sqlite_pragmas(app: Flask):
 # Import our babel setup (needs to be after initializing the other extensions)
 from app.babel import init_babel
 from app.cache import init_cache, cache
+from app.blob_store import init_blob_store
+from app.image_pipeline import init_image_pipeline
+from app.events import init_events
+from app.query_stats import init_query_stats
+from app.metrics import init_metrics
+from app.db_pool import build_engine_options, init_db_pool
+from app.jobs import init_jobs
 
 def create_app():
     load_dotenv()
 
     app = Flask(__name__)
     app.config.from_object('config.Config')
+    # Параметры пула PostgreSQL из переменных окружения (app.db_pool)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS',
+                          build_engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
     
     # Настраиваем стандартное логирование
     import logging
@@ -70,9 +76,16 @@ def create_app():
     init_babel(app)  # Initialize Babel with our custom locale selector
     # socketio.init_app(app, cors_allowed_origins="*")  # DISABLED: Causes WORKER TIMEOUT with sync workers
     init_cache(app)  # Initialize caching
+    init_blob_store(app)  # Контентно-адресоване сховище зображень
+    init_image_pipeline(app)  # Похідні зображення (WebP/AVIF, srcset)
+    init_events(app)  # Push-канал засідань (SSE)
     compress.init_app(app)  # +++ enable gzip/br compression
     
     _enable_sqlite_pragmas(app)
+    init_query_stats(app)  # Кількість і час SQL-запитів (Server-Timing, лог app.sql)
+    init_metrics(app)  # Гістограми затримок і /metrics для Prometheus (якщо встановлено prometheus_client)
+    init_db_pool(app)  # statement_timeout за blueprint'ом (PostgreSQL)
+    init_jobs(app)  # `flask jobs work` — фонові задачі (протоколи засідань)
     
     # Настраиваем Flask-Login
     login_manager.init_app(app)
@@ -82,8 +95,9 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models.user import User
-        return User.query.get(int(user_id))
+        # Один об'єкт на запит, спільний із admin_required/founder_required
+        from app.principal import load_principal
+        return load_principal(user_id)
     
     # Configure Babel settings
     app.config['BABEL_DEFAULT_LOCALE'] = 'uk'
@@ -105,22 +119,9 @@ def create_app():
     except ImportError:
         app.logger.warning("Модуль debug_routes не найден, отладочные маршруты не зарегистрированы")
     
-    # Clear SQLAlchemy caches to ensure fresh schema reflection
-    with app.app_context():
-        try:
-            # Clear any cached type maps
-            if hasattr(db.engine.dialect, '_type_memos'):
-                db.engine.dialect._type_memos.clear()
-            
-            # Force metadata to be reloaded from database
-            db.metadata.clear()
-            
-            # Clear connection pool to force new connections
-            db.engine.dispose()
-            
-            app.logger.info("✅ Cleared SQLAlchemy caches and connection pool")
-        except Exception as e:
-            app.logger.warning(f"Could not clear SQLAlchemy cache: {e}")
+    # Схема БД не отражается при старте: нужные колонки проверяются лениво
+    # (app.schema_info, кэш по ревизии Alembic), а пул соединений и метаданные
+    # моделей не сбрасываются — соединения открываются по первому запросу
         
     # Тестовые маршруты для отладки отключены в продакшн режиме
     if app.debug and os.environ.get('RENDER') != 'true':
@@ -157,8 +158,9 @@ def create_app():
 
     @app.context_processor
     def inject_settings():
-        from app.models.settings import Settings
-        settings = Settings.query.first()
+        # Снимок из памяти воркера: без запроса к БД на каждый рендеринг
+        from app.cache import get_settings
+        settings = get_settings()
         
         # Для обратной совместимости добавим user в контекст
         from flask_login import current_user
@@ -208,6 +210,19 @@ def create_app():
                                 error_message=f"Страница '{request.path}' не найдена."), 404
         except Exception:
             return f"Страница '{request.path}' не найдена (404).", 404
+
+    @app.errorhandler(413)
+    def request_entity_too_large(e):
+        # Тело запроса больше MAX_CONTENT_LENGTH — отклонено до чтения в память
+        app.logger.info(f"413 Request Entity Too Large: {request.path} ({request.content_length} bytes)")
+        
+        try:
+            return render_template('simple_error.html', 
+                                error_code=413, 
+                                error_title="Файл слишком большой",
+                                error_message="Размер загружаемых файлов превышает допустимый лимит."), 413
+        except Exception:
+            return "Файл слишком большой (413).", 413
                               
     @app.errorhandler(Exception)
     def handle_unhandled_exception(e):
@@ -229,6 +244,3 @@ def create_app():
             return "Внутренняя ошибка сервера. Пожалуйста, обратитесь к администратору.", 500
 
     return app
-
-# Экспортируем переменную app для gunicorn
-app = create_app()
@@ -0,0 +1,460 @@
+"""
+Контентно-адресоване сховище бінарних файлів (зображення блоків, галереї, проєктів).
+
+Файли зберігаються під ключем SHA-256 від вмісту, тож у таблицях залишаються
+лише хеш і mimetype. Бекенди:
+- LocalBlobStore — локальна файлова система (за замовчуванням, працює і з X-Sendfile);
+- S3BlobStore    — будь-яке S3-сумісне сховище (AWS S3, MinIO, локальна заглушка).
+
+Вибір бекенду: BLOB_STORE_BACKEND = 'local' | 's3'.
+
+Локальна директорія на ефемерному диску (Render без disk) зникає з кожним
+деплоєм, тому, поки сховище не довговічне (S3 або BLOB_STORE_DURABLE=true
+для змонтованого диска), новий вміст дублюється і в БД (db_copy()), а
+маршрути повертають його у сховище при першому зверненні.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+
+import click
+from flask import Flask, Response, current_app, redirect, request, send_file
+from flask.cli import AppGroup
+
+from app.http_cache import content_disposition, partial_response, requested_range
+
+logger = logging.getLogger('app.blob_store')
+
+CHUNK_SIZE = 64 * 1024
+
+# Довгий кеш лише для URL з версією (?v=<hash>), інакше — перевірка через ETag
+IMMUTABLE_MAX_AGE = 31536000
+DEFAULT_MAX_AGE = 3600
+
+
+class BlobNotFound(LookupError):
+    """Блоб з таким ключем відсутній у сховищі"""
+
+
+class BlobTooLarge(ValueError):
+    """Потік перевищив дозволений розмір (put_stream з max_size)"""
+
+    def __init__(self, max_size):
+        super().__init__(f"Blob exceeds {max_size} bytes")
+        self.max_size = max_size
+
+
+def blob_key(data):
+    """Повертає ключ (SHA-256 hex) для вмісту"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """Базовий інтерфейс сховища"""
+
+    def put(self, data):
+        """Зберігає байти та повертає їх ключ. Повторне збереження — no-op."""
+        key = blob_key(data)
+        if not self.exists(key):
+            self.write(key, data)
+        return key
+
+    def put_stream(self, stream, max_size=None):
+        """
+        Зберігає потік частинами: хешує та рахує розмір на льоту, тримаючи
+        в пам'яті лише один шматок CHUNK_SIZE. Вміст спершу пишеться у
+        тимчасовий файл, бо ключ (хеш) відомий тільки наприкінці.
+
+        Returns:
+            tuple: (key, size)
+
+        Raises:
+            BlobTooLarge: потік довший за max_size (тимчасовий файл видаляється)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.spool_dir(), prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise BlobTooLarge(max_size)
+                    digest.update(chunk)
+                    f.write(chunk)
+            key = digest.hexdigest()
+            if self.exists(key):
+                os.unlink(tmp_path)
+            else:
+                self.write_file(key, tmp_path)
+            return key, size
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def spool_dir(self):
+        """Директорія для тимчасових файлів put_stream (None — системна)"""
+        return None
+
+    def write_file(self, key, path):
+        """Переносить готовий тимчасовий файл у сховище під ключем key"""
+        try:
+            with open(path, 'rb') as f:
+                self.write(key, f.read())
+        finally:
+            os.unlink(path)
+
+    def write(self, key, data):
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def open(self, key):
+        """Повертає file-like об'єкт для читання блоба"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def send(self, key, mimetype, max_age=DEFAULT_MAX_AGE, download_name=None, as_attachment=False,
+             last_modified=None):
+        """Формує HTTP-відповідь з вмістом блоба без копіювання в пам'ять Python"""
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """Сховище у локальній директорії: <root>/ab/cd/abcd..."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def write(self, key, data):
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Пишемо у тимчасовий файл і атомарно перейменовуємо, щоб паралельні
+        # воркери ніколи не бачили напівзаписаний файл
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def spool_dir(self):
+        # Та сама файлова система, що й сховище, щоб os.replace був атомарним
+        return self.root
+
+    def write_file(self, key, path):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def open(self, key):
+        try:
+            return open(self.path(key), 'rb')
+        except FileNotFoundError:
+            raise BlobNotFound(key)
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def send(self, key, mimetype, max_age=DEFAULT_MAX_AGE, download_name=None, as_attachment=False,
+             last_modified=None):
+        # send_file сам обробляє If-None-Match/Range і, якщо увімкнено
+        # USE_X_SENDFILE, віддає файл через проксі без читання у Python
+        return send_file(
+            self.path(key),
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=True,
+            etag=key,
+            max_age=max_age,
+            last_modified=last_modified,
+        )
+
+
+class S3BlobStore(BlobStore):
+    """
+    Сховище в S3-сумісному бакеті.
+
+    client — будь-який об'єкт з методами put_object/get_object/head_object/delete_object
+    (boto3 client, MinIO або локальна заглушка для розробки).
+    """
+
+    def __init__(self, client, bucket, prefix=''):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+
+    def object_key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def write(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=data)
+
+    def write_file(self, key, path):
+        # Передаємо відкритий файл — клієнт читає його сам, без копії в пам'яті
+        try:
+            with open(path, 'rb') as f:
+                self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=f)
+        finally:
+            os.unlink(path)
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except Exception:
+            return False
+
+    def get_object(self, key, **kwargs):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key), **kwargs)
+        except Exception:
+            raise BlobNotFound(key)
+
+    def open(self, key):
+        return self.get_object(key)['Body']
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def send(self, key, mimetype, max_age=DEFAULT_MAX_AGE, download_name=None, as_attachment=False,
+             last_modified=None):
+        # Ті самі правила, що й send_file у LocalBlobStore: If-None-Match,
+        # Range/If-Range і RFC 6266 для не-ASCII імен файлів
+        if request.if_none_match.contains(key):
+            response = Response(status=304)
+        else:
+            byte_range = None
+            if request.range is not None:
+                try:
+                    head = self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+                except Exception:
+                    raise BlobNotFound(key)
+                total_size = head['ContentLength']
+                byte_range = requested_range(total_size, key, last_modified)
+            if byte_range is not None:
+                start, stop = byte_range
+                obj = self.get_object(key, Range=f'bytes={start}-{stop - 1}')
+                response = partial_response(_stream(obj['Body']), start, stop, total_size, mimetype, key,
+                                            last_modified)
+            else:
+                obj = self.get_object(key)
+                response = Response(_stream(obj['Body']), mimetype=mimetype, direct_passthrough=True)
+                if obj.get('ContentLength') is not None:
+                    response.content_length = obj['ContentLength']
+                response.headers['Accept-Ranges'] = 'bytes'
+            if download_name:
+                response.headers['Content-Disposition'] = content_disposition(download_name, as_attachment)
+        response.set_etag(key)
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+        if last_modified is not None:
+            response.last_modified = last_modified
+        return response
+
+
+def _stream(body):
+    """Читає тіло об'єкта S3 шматками й закриває його наприкінці"""
+    try:
+        for chunk in iter(lambda: body.read(CHUNK_SIZE), b''):
+            yield chunk
+    finally:
+        body.close()
+
+
+def init_blob_store(app: Flask):
+    """
+    Створює сховище згідно з конфігурацією та реєструє CLI-команди `flask blobs ...`
+    """
+    backend = app.config.get('BLOB_STORE_BACKEND', 'local')
+
+    if backend == 's3':
+        import boto3  # опціональна залежність, потрібна лише для S3
+
+        client = boto3.client('s3', endpoint_url=app.config.get('BLOB_STORE_S3_ENDPOINT') or None)
+        store = S3BlobStore(
+            client,
+            app.config['BLOB_STORE_S3_BUCKET'],
+            app.config.get('BLOB_STORE_S3_PREFIX', ''),
+        )
+    else:
+        store = LocalBlobStore(app.config.get('BLOB_STORE_PATH') or os.path.join(app.instance_path, 'blobs'))
+
+    app.extensions['blob_store'] = store
+    app.cli.add_command(blobs_cli)
+    app.logger.info(f"Сховище файлів ініціалізовано: {type(store).__name__}")
+    if not store_is_durable(app):
+        app.logger.info("Сховище файлів не довговічне: вміст файлів зберігається також у БД")
+    return store
+
+
+def store_is_durable(app=None):
+    """Чи переживає сховище деплой: S3 або локальна директорія на постійному диску"""
+    config = (app or current_app).config
+    return config.get('BLOB_STORE_BACKEND', 'local') == 's3' or bool(config.get('BLOB_STORE_DURABLE'))
+
+
+def get_blob_store():
+    """Повертає сховище поточного застосунку"""
+    return current_app.extensions['blob_store']
+
+
+def store_upload(file_storage):
+    """
+    Зберігає завантажений файл (werkzeug FileStorage) у сховищі.
+
+    Returns:
+        tuple: (image_hash, mimetype) або (None, None), якщо файл порожній
+    """
+    data = file_storage.read()
+    if not data:
+        return None, None
+    return get_blob_store().put(data), file_storage.mimetype
+
+
+def db_copy(key):
+    """
+    Вміст блоба для копії в БД (image_data, file_data), поки сховище не
+    довговічне; None — копія не потрібна.
+    """
+    if not key or store_is_durable():
+        return None
+    body = get_blob_store().open(key)
+    try:
+        return body.read()
+    finally:
+        body.close()
+
+
+def restore_image(image_hash):
+    """
+    Повертає у сховище оригінал зображення з копії в БД (блок або галерея),
+    напр. після деплою на ефемерний диск. True, якщо копію знайдено.
+    """
+    from app import db
+    from app.models.block import Block
+    from app.models.gallery_image import GalleryImage
+
+    for model in (Block, GalleryImage):
+        image_data = db.session.query(model.image_data).filter(
+            model.image_hash == image_hash, model.image_data.isnot(None)
+        ).limit(1).scalar()
+        if image_data and blob_key(image_data) == image_hash:
+            get_blob_store().put(image_data)
+            return True
+    return False
+
+
+def send_model_image(model, object_id):
+    """
+    Віддає зображення моделі (Block, GalleryImage) зі сховища.
+
+    Спочатку читаються лише image_hash/image_mimetype; BLOB із таблиці
+    завантажується тільки для ще не перенесених записів (або якщо локальне
+    сховище було очищене), після чого він одразу потрапляє у сховище.
+    """
+    from app import db
+
+    url_column = getattr(model, 'image_url', None)
+    columns = [model.image_hash, model.image_mimetype]
+    if url_column is not None:
+        columns.append(url_column)
+
+    row = db.session.query(*columns).filter(model.id == object_id).first()
+    if row is None:
+        return '', 404
+
+    image_hash, mimetype = row[0], row[1]
+    image_url = row[2] if url_column is not None else None
+
+    store = get_blob_store()
+    max_age = IMMUTABLE_MAX_AGE if request.args.get('v') else DEFAULT_MAX_AGE
+
+    if image_hash and store.exists(image_hash):
+        return store.send(image_hash, mimetype, max_age=max_age)
+
+    # Запис ще не перенесено у сховище — переносимо при першому зверненні
+    image_data = db.session.query(model.image_data).filter(model.id == object_id).scalar()
+    if image_data:
+        new_hash = store.put(image_data)
+        if new_hash != image_hash:
+            db.session.query(model).filter(model.id == object_id).update(
+                {model.image_hash: new_hash}, synchronize_session=False
+            )
+            db.session.commit()
+        return store.send(new_hash, mimetype, max_age=max_age)
+
+    if image_url:
+        return redirect(image_url)
+    return '', 404
+
+
+def backfill_images(purge=False, batch_size=50):
+    """
+    Переносить BLOB-и з blocks.image_data та gallery_images.image_data у сховище.
+
+    Args:
+        purge: якщо True — після перенесення очищає image_data у БД
+               (лише з довговічним сховищем, див. store_is_durable())
+        batch_size: кількість рядків, що завантажуються за раз
+
+    Returns:
+        dict: кількість перенесених записів по моделях
+    """
+    from app import db
+    from app.models.block import Block
+    from app.models.gallery_image import GalleryImage
+
+    store = get_blob_store()
+    stats = {}
+
+    for model in (Block, GalleryImage):
+        moved = 0
+        ids = [row[0] for row in db.session.query(model.id).filter(model.image_data.isnot(None)).all()]
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            rows = db.session.query(model.id, model.image_data).filter(model.id.in_(batch)).all()
+            for object_id, image_data in rows:
+                values = {model.image_hash: store.put(image_data)}
+                if purge:
+                    values[model.image_data] = None
+                db.session.query(model).filter(model.id == object_id).update(values, synchronize_session=False)
+                moved += 1
+            db.session.commit()
+        stats[model.__tablename__] = moved
+        logger.info(f"{model.__tablename__}: перенесено {moved} зображень у сховище")
+
+    return stats
+
+
+blobs_cli = AppGroup('blobs', help='Керування сховищем файлів')
+
+
+@blobs_cli.command('backfill')
+@click.option('--purge', is_flag=True, help='Очистити image_data у БД після перенесення')
+def backfill_command(purge):
+    """Переносить зображення з БД у сховище файлів"""
+    if purge and not store_is_durable():
+        raise click.UsageError('--purge потребує довговічного сховища (S3 або BLOB_STORE_DURABLE=true)')
+    stats = backfill_images(purge=purge)
+    for table, moved in stats.items():
+        click.echo(f"{table}: {moved}")
@@ -2,63 +2,397 @@
 Модуль для кэширования и оптимизации загрузки контента.
 Добавляет механизмы кэширования для наиболее часто используемых ресурсов.
 """
-from flask import Flask
+import functools
+import logging
+import os
+import time
+import uuid
+
+from flask import Flask, g, has_request_context
 from flask_caching import Cache
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.metrics import observe_cache
 
 cache = Cache()
 
-def init_cache(app: Flask):
+# Бэкенды, общие для всех воркеров gunicorn (для них не делаем clear() при старте)
+SHARED_BACKENDS = ('RedisCache', 'FileSystemCache')
+
+
+def _redis_available():
+    try:
+        import redis  # noqa: F401 — опциональная зависимость
+        return True
+    except ImportError:
+        return False
+
+
+def _resolve_cache_config(app: Flask):
     """
-    Инициализирует кэширование для приложения Flask
+    Выбирает бэкенд кэша:
+    - CACHE_TYPE задан явно — используем его (например, SimpleCache для тестов);
+    - есть CACHE_REDIS_URL и установлен redis — RedisCache;
+    - иначе FileSystemCache в CACHE_DIR, общий для всех воркеров на машине.
     """
+    cache_type = app.config.get('CACHE_TYPE')
+    redis_url = app.config.get('CACHE_REDIS_URL')
+
+    if not cache_type:
+        if redis_url and _redis_available():
+            cache_type = 'RedisCache'
+        else:
+            if redis_url:
+                app.logger.warning("CACHE_REDIS_URL задан, но пакет redis не установлен — используем FileSystemCache")
+            cache_type = 'FileSystemCache'
+
     cache_config = {
-        'CACHE_TYPE': 'SimpleCache',  # Простой кэш в памяти
+        'CACHE_TYPE': cache_type,
         'CACHE_DEFAULT_TIMEOUT': 300,  # 5 минут
         'CACHE_THRESHOLD': 1000,       # Максимальное количество объектов в кэше
+        'CACHE_KEY_PREFIX': app.config.get('CACHE_KEY_PREFIX') or 'brama:',
     }
+    if cache_type == 'RedisCache':
+        cache_config['CACHE_REDIS_URL'] = redis_url
+    elif cache_type == 'FileSystemCache':
+        cache_config['CACHE_DIR'] = app.config.get('CACHE_DIR') or os.path.join(app.instance_path, 'cache')
+        os.makedirs(cache_config['CACHE_DIR'], exist_ok=True)
+    return cache_config
+
+
+def init_cache(app: Flask):
+    """
+    Инициализирует кэширование для приложения Flask
+    """
+    cache_config = _resolve_cache_config(app)
     app.config.from_mapping(cache_config)
     cache.init_app(app)
-    
-    # Регистрируем функцию для очистки кэша при запуске сервера
-    with app.app_context():
-        cache.clear()
-        app.logger.info("Кэш инициализирован и очищен")
+    _register_session_hooks()
+
+    # Кэш при старте не очищается: общий (Redis/файлы) переживает перезапуск
+    # воркеров, и очистка стирала бы работу соседей, а кэш в памяти процесса
+    # у нового приложения и так пуст
+    app.logger.info(f"Кэш инициализирован: {cache_config['CACHE_TYPE']}")
 
     return cache
 
-# Функции для кэширования часто используемых данных
 
-@cache.memoize(timeout=600)  # Кэш на 10 минут
+# Теги зависимостей.
+# У каждого тега (например, 'gallery:3') в общем кэше хранится версия.
+# Ключ закэшированного значения включает версии всех его тегов, поэтому
+# invalidate_tags() одним set_many делает устаревшими ровно те записи,
+# которые зависят от изменившихся данных. Старые записи просто истекают по TTL.
+#
+# Ключ тега может пропасть (FileSystemCache при переполнении первыми вытесняет
+# записи без срока). Пропавший тег получает новую случайную версию, а не
+# значение по умолчанию: иначе записи, сохранённые под этим значением до
+# первой правки, снова стали бы «актуальными».
+
+def _tag_key(tag):
+    return f"tag:{tag}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def read_tag_versions(tags):
+    """
+    Текущие версии тегов: (список версий, все ли теги уже были в кэше).
+
+    Отсутствующие теги засеваются новой версией через cache.add (её же
+    увидят остальные воркеры); ключи с такой версией гарантированно
+    промахиваются. Если кэш недоступен, версия одноразовая.
+    """
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(*keys) if keys else []
+    missing = [key for key, version in zip(keys, versions) if not version]
+    if not missing:
+        return list(versions), True
+    for key in missing:
+        cache.add(key, _new_version(), timeout=0)
+    # add мог проиграть гонку другому воркеру — перечитываем его значение
+    seeded = dict(zip(missing, cache.get_many(*missing)))
+    versions = [version or seeded.get(key) or _new_version() for key, version in zip(keys, versions)]
+    return versions, False
+
+
+def get_tag_versions(tags):
+    """Возвращает строку с текущими версиями тегов (для составления ключей)"""
+    if not tags:
+        return ''
+    versions, _ = read_tag_versions(tags)
+    return '.'.join(versions)
+
+
+def invalidate_tags(*tags):
+    """Делает устаревшими все записи кэша, помеченные любым из тегов"""
+    tags = {tag for tag in tags if tag}
+    if not tags:
+        return
+    # Уникальная метка вместо счётчика: без гонки read-modify-write и без
+    # повторения старого значения после вытеснения ключа из кэша
+    cache.set_many({_tag_key(tag): _new_version() for tag in tags}, timeout=0)
+
+
+def tagged_key(base, tags):
+    """Ключ кэша, зависящий от версий тегов"""
+    return f"{base}|{get_tag_versions(tags)}"
+
+
+def cached_with_tags(*tag_templates, timeout=None):
+    """
+    Декоратор: кэширует результат функции с учётом тегов.
+
+    Шаблоны тегов форматируются аргументами вызова:
+        @cached_with_tags('gallery:{0}', 'gallery', timeout=300)
+        def get_gallery_images(block_id): ...
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tags = [template.format(*args, **kwargs) for template in tag_templates]
+            key = tagged_key(f"fn:{name}:{args!r}:{sorted(kwargs.items())!r}", tags)
+            hit = cache.get(key)
+            observe_cache(func.__name__, hit is not None)
+            if hit is not None:
+                return hit[0]
+            value = func(*args, **kwargs)
+            # Оборачиваем в кортеж, чтобы закэшировать и None
+            cache.set(key, (value,), timeout=timeout)
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+# Канал межпроцессной инвалидации.
+# Для данных, которые воркер держит у себя в памяти (вне общего кэша),
+# каналом служит тег: его версия лежит в общем кэше, запись меняет её,
+# и каждый воркер при следующей проверке видит, что его копия устарела.
+
+def get_version(channel):
+    """Текущая версия канала (тега); после вытеснения — новая, а не прежняя"""
+    versions, _ = read_tag_versions([channel])
+    return versions[0]
+
+
+def bump_version(channel):
+    """Сообщает всем воркерам, что данные канала изменились"""
+    invalidate_tags(channel)
+
+
+class ProcessLocalCache:
+    """
+    Значение в памяти воркера, сбрасываемое через канал инвалидации.
+
+    Версия канала проверяется не чаще, чем раз в check_interval секунд,
+    так что горячий путь обходится без обращения к общему кэшу.
+    """
+
+    def __init__(self, channel, check_interval=1.0):
+        self.channel = channel
+        self.check_interval = check_interval
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self, loader):
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self.check_interval:
+            version = get_version(self.channel)
+            self._checked_at = now
+            if version != self._version:
+                self._value = loader()
+                self._version = version
+        return self._value
+
+    def invalidate(self):
+        """Сбрасывает значение у себя и у всех остальных воркеров"""
+        self._version = None
+        bump_version(self.channel)
+
+
+# Инвалидация по записи в БД.
+# Модели объявляют метод cache_tags(); после flush теги изменённых объектов
+# собираются в session.info и сбрасываются только после успешного commit.
+
+_SESSION_TAGS = 'cache_tags'
+
+
+def _collect_tags(session, flush_context):
+    tags = session.info.setdefault(_SESSION_TAGS, set())
+    for obj in list(session.new) + list(session.deleted):
+        if hasattr(obj, 'cache_tags'):
+            tags.update(obj.cache_tags())
+    for obj in session.dirty:
+        if hasattr(obj, 'cache_tags') and session.is_modified(obj, include_collections=False):
+            tags.update(obj.cache_tags())
+
+
+def _invalidate_committed(session):
+    tags = session.info.pop(_SESSION_TAGS, None)
+    if tags:
+        try:
+            invalidate_tags(*tags)
+        except Exception as e:
+            logging.getLogger('app.cache').error(f"Не удалось сбросить теги кэша {tags}: {e}")
+
+
+def tag_session(session, *tags):
+    """
+    Теги для сброса после commit текущей транзакции — для записей мимо ORM
+    (insert/update через Core), которых after_flush не видит
+    """
+    session.info.setdefault(_SESSION_TAGS, set()).update(tags)
+
+
+def _discard_tags(session, previous_transaction):
+    # Откат savepoint не отменяет изменений внешней транзакции
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_TAGS, None)
+
+
+def _register_session_hooks():
+    if event.contains(Session, 'after_flush', _collect_tags):
+        return
+    event.listen(Session, 'after_flush', _collect_tags)
+    event.listen(Session, 'after_commit', _invalidate_committed)
+    event.listen(Session, 'after_soft_rollback', _discard_tags)
+
+
+# Функции для кэширования часто используемых данных.
+# Возвращают DTO из app.dto, собранные проекционными запросами: в кэш попадают
+# только колонки, нужные шаблонам, а image_data проверяется лишь на NULL.
+
+def _block_query():
+    from app import db
+    from app.models.block import Block
+    return db.session.query(
+        Block.id, Block.title, Block.content, Block.type, Block.is_active,
+        Block.image_url, Block.image_hash,
+        Block.image_data.isnot(None).label('has_blob'),
+    )
+
+
+def _block_dto(row):
+    from app.dto import BlockDTO
+    return BlockDTO(
+        id=row.id, title=row.title, content=row.content, type=row.type,
+        is_active=row.is_active, image_url=row.image_url, image_hash=row.image_hash,
+        has_image=bool(row.image_hash or row.has_blob),
+        image_version=(row.image_hash or '')[:12],
+    )
+
+
+@cached_with_tags('blocks', timeout=600)  # Кэш на 10 минут
 def get_active_blocks():
-    """Кэшированная функция для получения всех активных блоков"""
+    """Кэшированная функция для получения всех активных блоков (BlockDTO)"""
     from app.models.block import Block
-    from sqlalchemy.orm import undefer
-    # Загружаем image_data сразу, чтобы избежать DetachedInstanceError при кэшировании
-    return Block.query.filter_by(is_active=True).options(
-        undefer(Block.image_data), 
-        undefer(Block.image_mimetype)
-    ).all()
-
-@cache.memoize(timeout=300)  # Кэш на 5 минут
+    return [_block_dto(row) for row in _block_query().filter(Block.is_active.is_(True)).all()]
+
+@cached_with_tags('blocks', timeout=300)  # Кэш на 5 минут
 def get_block_by_type(block_type):
-    """Кэшированная функция для получения блока по типу"""
+    """Кэшированная функция для получения блока по типу (BlockDTO или None)"""
     from app.models.block import Block
-    return Block.query.filter_by(type=block_type, is_active=True).first()
+    row = _block_query().filter(Block.type == block_type, Block.is_active.is_(True)).first()
+    return _block_dto(row) if row else None
 
-@cache.memoize(timeout=300)  # Кэш на 5 минут
+@cached_with_tags('gallery:{0}', timeout=300)  # Кэш на 5 минут
 def get_gallery_images(block_id):
-    """Кэшированная функция для получения изображений галереи"""
+    """Кэшированная функция для получения изображений галереи (GalleryImageDTO)"""
+    from app import db
+    from app.dto import GalleryImageDTO
     from app.models.gallery_image import GalleryImage
-    return GalleryImage.query.filter_by(block_id=block_id).all()
+    rows = db.session.query(
+        GalleryImage.id, GalleryImage.block_id, GalleryImage.description, GalleryImage.image_hash,
+        GalleryImage.image_data.isnot(None).label('has_blob'),
+    ).filter(GalleryImage.block_id == block_id).all()
+    return [
+        GalleryImageDTO(
+            id=row.id, block_id=row.block_id, description=row.description,
+            image_hash=row.image_hash, has_image=bool(row.image_hash or row.has_blob),
+            image_version=(row.image_hash or '')[:12],
+        )
+        for row in rows
+    ]
 
-@cache.memoize(timeout=180)  # Кэш на 3 минуты
+@cached_with_tags('projects:{0}', timeout=180)  # Кэш на 3 минуты
 def get_approved_projects(block_id):
-    """Кэшированная функция для получения одобренных проектов"""
+    """Кэшированная функция для получения одобренных проектов (ProjectDTO)"""
+    from app import db
+    from app.dto import ProjectDTO
     from app.models.project import Project
-    return Project.query.filter_by(status='approved', block_id=block_id).order_by(Project.created_at.desc()).all()
+    fields = [field for field in ProjectDTO._fields if field != 'has_image']
+    rows = db.session.query(*[getattr(Project, field) for field in fields]).filter(
+        Project.status == 'approved', Project.block_id == block_id
+    ).order_by(Project.created_at.desc()).all()
+    # У projects є лише зовнішнє image_url (див. Project)
+    return [ProjectDTO(*row, has_image=bool(row.image_url)) for row in rows]
 
-@cache.memoize(timeout=3600)  # Кэш на 1 час
-def get_settings():
-    """Кэшированная функция для получения настроек"""
+# Настройки читаются при рендеринге каждого шаблона (inject_settings), поэтому
+# держим их снимок прямо в памяти воркера. Версия канала 'settings' сверяется
+# один раз за запрос; меняется она тегом 'settings' при записи Settings.
+_settings_snapshot = ProcessLocalCache('settings', check_interval=0)
+
+
+def _load_settings():
     from app.models.settings import Settings
-    return Settings.query.first()
\ No newline at end of file
+    from app.dto import SettingsDTO
+    settings = Settings.query.first()
+    return SettingsDTO.from_model(settings) if settings else None
+
+
+def get_settings():
+    """Настройки сайта (SettingsDTO или None) из снимка в памяти воркера"""
+    if has_request_context():
+        if 'settings_snapshot' not in g:
+            g.settings_snapshot = _settings_snapshot.get(_load_settings)
+        return g.settings_snapshot
+    return _settings_snapshot.get(_load_settings)
+
+
+# Результаты голосований засідання: одним GROUP BY для всіх пунктів порядку
+# денного. Скидаються тегом 'votes:<meeting_id>' при записі MeetingVote.
+
+@cached_with_tags('votes:{0}', timeout=600)
+def _meeting_tallies(meeting_id):
+    from sqlalchemy import func
+    from app import db
+    from app.dto import VoteTally
+    from app.models.meeting import AgendaItem, MeetingVote
+
+    rows = db.session.query(
+        MeetingVote.agenda_item_id, MeetingVote.vote, func.count(MeetingVote.id),
+    ).join(AgendaItem, AgendaItem.id == MeetingVote.agenda_item_id).filter(
+        AgendaItem.meeting_id == meeting_id,
+    ).group_by(MeetingVote.agenda_item_id, MeetingVote.vote).all()
+
+    counts = {}
+    for item_id, vote, count in rows:
+        if vote is not None:
+            counts.setdefault(item_id, {})[vote.value] = count
+    return {item_id: VoteTally(**votes) for item_id, votes in counts.items()}
+
+
+def get_meeting_tallies(meeting_id, fresh=False):
+    """
+    Результаты голосований собрания: {agenda_item_id: VoteTally}.
+
+    Пунктов без голосов в словаре нет. В пределах запроса результат
+    запоминается в g; fresh=True читает БД в обход кэша (нужно сразу после
+    записи голоса, ещё до commit).
+    """
+    if fresh:
+        tallies = _meeting_tallies.uncached(meeting_id)
+    elif has_request_context() and meeting_id in g.setdefault('meeting_tallies', {}):
+        return g.meeting_tallies[meeting_id]
+    else:
+        tallies = _meeting_tallies(meeting_id)
+    if has_request_context():
+        g.setdefault('meeting_tallies', {})[meeting_id] = tallies
+    return tallies
@@ -0,0 +1,206 @@
+"""
+Пул з'єднань PostgreSQL: розмір на воркер, статистика очікування і ліміти часу запитів.
+
+  * build_engine_options(uri) — SQLALCHEMY_ENGINE_OPTIONS (create_app).
+    DB_MAX_CONNECTIONS — усі з'єднання сервісу з базою: без
+    DB_RESERVED_CONNECTIONS (інші сервіси, напр. brama-jobs, і разові
+    flask-команди) він ділиться між WEB_CONCURRENCY воркерами gunicorn,
+    кожен з яких віддає одне з'єднання потоку LISTEN (app.events, якщо
+    SSE_ENABLED). Пул воркера не більший за кількість його потоків
+    (GUNICORN_THREADS), решта частки — overflow. pool_pre_ping і
+    pool_recycle (DB_POOL_RECYCLE) переживають з'єднання, які Render
+    закриває після простою; DB_POOL_TIMEOUT обмежує очікування вільного
+    з'єднання;
+  * InstrumentedQueuePool — QueuePool, що рахує час очікування checkout,
+    тайм-аути і найбільший overflow (pool_status(), /debug/db-pool,
+    brama_db_pool_* у /metrics);
+  * DB_PGBOUNCER=true — режим transaction pooling PgBouncer: NullPool
+    (пулом керує PgBouncer), без параметрів старту з'єднання — search_path
+    і statement_timeout задаються SET LOCAL у кожній транзакції;
+  * statement_timeout — DB_STATEMENT_TIMEOUT_MS для всіх запитів і окремі
+    бюджети blueprint'ів у DB_STATEMENT_TIMEOUTS (SET LOCAL на початку
+    транзакції), щоб повільний запит не з'їдав увесь тайм-аут gunicorn.
+
+Для SQLite нічого з цього не застосовується.
+"""
+import logging
+import os
+import threading
+import time
+
+from flask import Flask, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.metrics import observe_pool_checkout
+
+logger = logging.getLogger('app.db_pool')
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def pgbouncer_mode():
+    return os.getenv('DB_PGBOUNCER', 'false').lower() in ('1', 'true', 'yes')
+
+
+def sse_listener_enabled():
+    """Чи відкриває воркер з'єднання LISTEN поза пулом (app.events)"""
+    return os.getenv('SSE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+
+def pool_sizing(listener=None):
+    """(pool_size, max_overflow) одного воркера з бюджету з'єднань до БД"""
+    if listener is None:
+        listener = sse_listener_enabled()
+    workers = max(_env_int('WEB_CONCURRENCY', 3), 1)
+    threads = max(_env_int('GUNICORN_THREADS', 8), 1)
+    budget = _env_int('DB_MAX_CONNECTIONS', 20) - _env_int('DB_RESERVED_CONNECTIONS', 0)
+    per_worker = max(budget // workers - (1 if listener else 0), 1)
+    pool_size = _env_int('DB_POOL_SIZE', min(threads, per_worker))
+    max_overflow = _env_int('DB_MAX_OVERFLOW', max(per_worker - pool_size, 0))
+    return pool_size, max_overflow
+
+
+def build_engine_options(uri):
+    """Параметри create_engine для URI бази (порожні для SQLite)"""
+    if not uri or uri.startswith('sqlite'):
+        return {}
+    schema = os.getenv('DB_SCHEMA', 'brama')
+    if pgbouncer_mode():
+        # PgBouncer у режимі transaction не передає параметри старту (options)
+        # і віддає з'єднання іншим клієнтам між транзакціями
+        return {'poolclass': NullPool}
+
+    pool_size, max_overflow = pool_sizing()
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 280),
+        'pool_pre_ping': True,
+        'connect_args': {
+            # правильный формат: опция -c и пробел
+            'options': f"-c search_path={schema} "
+                       f"-c statement_timeout={_env_int('DB_STATEMENT_TIMEOUT_MS', 30000)}",
+        },
+    }
+
+
+class PoolStats:
+    """Лічильники checkout одного процесу"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.overflow_max = 0
+
+    def record(self, wait, overflow, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.overflow_max = max(self.overflow_max, overflow)
+            if timed_out:
+                self.timeouts += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                'wait_max_ms': self.wait_max * 1000,
+                'overflow_max': self.overflow_max,
+            }
+
+
+pool_stats = PoolStats()
+
+# Очікування, довше за це, потрапляє в лог: пул замалий для навантаження
+SLOW_CHECKOUT_SECONDS = 0.1
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, що вимірює, скільки потік чекав на з'єднання"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            wait = time.perf_counter() - started
+            pool_stats.record(wait, self.overflow(), timed_out=True)
+            observe_pool_checkout(wait, timed_out=True)
+            logger.warning(f"Немає вільного з'єднання за {wait:.1f} с: {self.status()}")
+            raise
+        wait = time.perf_counter() - started
+        pool_stats.record(wait, max(self.overflow(), 0))
+        observe_pool_checkout(wait)
+        if wait >= SLOW_CHECKOUT_SECONDS:
+            logger.info(f"Очікування з'єднання {wait * 1000:.0f} мс: {self.status()}")
+        return connection
+
+
+def pool_status(engine):
+    """Поточний стан пулу і лічильники процесу (для /debug/db-pool)"""
+    pool = engine.pool
+    status = {'pool': type(pool).__name__, 'pid': os.getpid(), **pool_stats.as_dict()}
+    if hasattr(pool, 'checkedout'):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+            'timeout_s': pool.timeout(),
+        })
+    return status
+
+
+def _select_statement_timeout():
+    """Бюджет часу запитів поточного blueprint'а (мс) або None — типовий"""
+    budgets = current_app.config.get('DB_STATEMENT_TIMEOUTS') or {}
+    g.statement_timeout_ms = budgets.get(request.blueprint)
+
+
+def _after_begin(session, transaction, connection):
+    if connection.dialect.name != 'postgresql':
+        return
+    timeout = g.get('statement_timeout_ms') if has_request_context() else None
+    statements = []
+    if pgbouncer_mode():
+        statements.append(f"SET LOCAL search_path TO {os.getenv('DB_SCHEMA', 'brama')}")
+        if timeout is None:
+            timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 30000)
+    if timeout is not None:
+        statements.append(f"SET LOCAL statement_timeout = {int(timeout)}")
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def init_db_pool(app: Flask):
+    """Бюджети statement_timeout за blueprint'ом (лише PostgreSQL)"""
+    if not app.config.get('SQLALCHEMY_DATABASE_URI', '').startswith('postgres'):
+        return
+    pool_size, max_overflow = pool_sizing()
+    threads = _env_int('GUNICORN_THREADS', 8)
+    if not pgbouncer_mode() and threads > pool_size + max_overflow:
+        # Зайві потоки чекають на з'єднання до DB_POOL_TIMEOUT під навантаженням
+        logger.warning(f"GUNICORN_THREADS={threads} більше, ніж з'єднань у пулі воркера "
+                       f"({pool_size} + {max_overflow} overflow): збільште DB_MAX_CONNECTIONS "
+                       f"або зменшіть кількість потоків")
+    if not event.contains(Session, 'after_begin', _after_begin):
+        event.listen(Session, 'after_begin', _after_begin)
+    app.before_request(_select_statement_timeout)
@@ -86,6 +86,16 @@ def test_translations():
 
     return jsonify(translations)
 
+@debug_bp.route('/db-pool')
+def db_pool_status():
+    """
+    Состояние пула соединений этого воркера: размер, занятые, overflow,
+    время ожидания соединения и тайм-ауты (app.db_pool).
+    """
+    from app import db
+    from app.db_pool import pool_status
+    return jsonify(pool_status(db.engine))
+
 def register_debug_routes(app):
     """
     Регистрирует отладочные маршруты.
@@ -0,0 +1,85 @@
+"""
+Легкие неизменяемые снимки данных (DTO) для шаблонов и кэша.
+
+В отличие от ORM-объектов их можно безопасно хранить в кэше и между
+запросами: они не привязаны к сессии SQLAlchemy и не подгружают ничего лениво.
+Заполняются проекционными запросами (только нужные колонки), поэтому
+BLOB-и изображений никогда не читаются вне маршрутов, отдающих файлы.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+
+class SettingsDTO(NamedTuple):
+    id: int
+    facebook: Optional[str]
+    instagram: Optional[str]
+    telegram: Optional[str]
+    email: Optional[str]
+    association_balance: Optional[Decimal]
+
+    @classmethod
+    def from_model(cls, settings):
+        return cls(*(getattr(settings, field) for field in cls._fields))
+
+
+class BlockDTO(NamedTuple):
+    id: int
+    title: str
+    content: Optional[str]
+    type: str
+    is_active: bool
+    image_url: Optional[str]
+    image_hash: Optional[str]
+    has_image: bool        # є власне зображення (у сховищі або застарілий BLOB)
+    image_version: str     # частина хешу для ?v= у URL зображення
+    translated_title: Optional[str] = None
+    translated_content: Optional[str] = None
+
+
+class GalleryImageDTO(NamedTuple):
+    id: int
+    block_id: Optional[int]
+    description: Optional[str]
+    image_hash: Optional[str]
+    has_image: bool
+    image_version: str
+
+
+class ProjectDTO(NamedTuple):
+    id: int
+    block_id: Optional[int]
+    title: str
+    goal: str
+    problem_description: str
+    expected_result: str
+    total_budget: str
+    executor_info: str
+    duration: str
+    category: Optional[str]
+    location: Optional[str]
+    social_links: Optional[str]
+    status: str
+    image_url: Optional[str]
+    created_at: Optional[datetime]
+    has_image: bool
+
+
+class VoteTally(NamedTuple):
+    yes: int = 0
+    no: int = 0
+    abstain: int = 0
+
+    @property
+    def total(self):
+        return self.yes + self.no + self.abstain
+
+    @property
+    def result(self):
+        if self.yes > self.no:
+            return "Approved"
+        elif self.no > self.yes:
+            return "Rejected"
+        else:
+            return "Tied"
@@ -0,0 +1,261 @@
+"""
+Push-канал засідань через Server-Sent Events (замість вимкненого Socket.IO).
+
+Події пишуться в таблицю meeting_events у тій самій транзакції, що й зміна,
+яку вони описують (publish() перед commit), тож клієнт ніколи не отримає
+подію про дані, яких ще немає в БД. Id рядка — id події SSE: після
+перепідключення браузер надсилає Last-Event-ID і отримує пропущене.
+Курсор (id > останнього надісланого) не пропускає подій, лише якщо id
+засідання фіксуються в порядку зростання: у PostgreSQL publish() бере
+транзакційний advisory lock засідання до вставки, тож транзакція з меншим
+id завжди фіксується раніше; SQLite і так виконує записи по черзі.
+
+Потоки, що чекають на події, будить EventBroker:
+  * у межах воркера — threading.Condition;
+  * між воркерами — маркер останньої події у спільному кеші (Redis/файли),
+    який перевіряється раз на SSE_POLL_INTERVAL;
+  * на PostgreSQL додатково LISTEN/NOTIFY: один потік-слухач на воркер
+    будить очікувачів одразу після commit у будь-якому воркері.
+
+Потрібен gunicorn з потоковими (gthread) або gevent-воркерами: кожен
+відкритий потік SSE займає потік воркера.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+from sqlalchemy import event as sa_event, text
+from sqlalchemy.orm import Session
+
+from app.cache import cache
+
+logger = logging.getLogger('app.events')
+
+PG_CHANNEL = 'brama_meeting_events'
+# Простір ключів pg_advisory_xact_lock(простір, meeting_id) для publish()
+PG_LOCK_NAMESPACE = 7301
+
+_SESSION_EVENTS = 'meeting_events'
+
+
+def _marker_key(meeting_id):
+    return f"events:last:{meeting_id}"
+
+
+class EventBroker:
+    """Будить потоки SSE, що чекають на нові події засідання"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._latest = {}  # meeting_id -> id останньої відомої події
+        self._listener = None
+        self._listener_pid = None
+
+    def notify(self, meeting_id, event_id):
+        """Подія з'явилась (у цьому воркері або прийшла через NOTIFY)"""
+        with self._cond:
+            if event_id > self._latest.get(meeting_id, 0):
+                self._latest[meeting_id] = event_id
+            self._cond.notify_all()
+
+    def publish_committed(self, meeting_id, event_id):
+        """Після commit: розбудити своїх очікувачів і позначити подію для інших воркерів"""
+        self.notify(meeting_id, event_id)
+        try:
+            cache.set(_marker_key(meeting_id), event_id, timeout=24 * 3600)
+        except Exception as e:
+            logger.warning(f"Не вдалося оновити маркер подій засідання {meeting_id}: {e}")
+
+    def latest(self, meeting_id):
+        """Id останньої відомої події без звернення до БД"""
+        local = self._latest.get(meeting_id, 0)
+        try:
+            shared = cache.get(_marker_key(meeting_id)) or 0
+        except Exception:
+            shared = 0
+        return max(local, shared)
+
+    def wait(self, meeting_id, after_id, timeout, poll_interval=1.0):
+        """
+        Чекає, доки з'явиться подія новіша за after_id.
+
+        Returns:
+            bool: True, якщо є нові події; False — вичерпано timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.latest(meeting_id) > after_id:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            with self._cond:
+                self._cond.wait(min(poll_interval, remaining))
+
+    def ensure_listener(self, engine):
+        """Запускає потік LISTEN для PostgreSQL (один на процес, лениво)"""
+        if engine.dialect.name != 'postgresql' or engine.dialect.driver != 'psycopg2':
+            return
+        if self._listener is not None and self._listener.is_alive() and self._listener_pid == os.getpid():
+            return
+        with self._cond:
+            if self._listener is not None and self._listener.is_alive() and self._listener_pid == os.getpid():
+                return
+            self._listener = threading.Thread(target=self._listen, args=(engine,),
+                                              name='meeting-events-listener', daemon=True)
+            self._listener_pid = os.getpid()
+            self._listener.start()
+
+    def _listen(self, engine):
+        import select
+
+        while True:
+            conn = None
+            try:
+                # Окреме з'єднання поза пулом: воно весь час зайняте LISTEN
+                raw = engine.raw_connection()
+                conn = raw.driver_connection
+                raw.detach()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {PG_CHANNEL}")
+                logger.info("Слухач подій засідань підключено (LISTEN/NOTIFY)")
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        meeting_id, _, event_id = notify.payload.partition(':')
+                        self.notify(int(meeting_id), int(event_id))
+            except Exception as e:
+                logger.warning(f"Слухач подій засідань перепідключається: {e}")
+                time.sleep(5)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+broker = EventBroker()
+
+
+def publish(meeting_id, event_name, data, founders_only=False):
+    """
+    Додає подію засідання до поточної транзакції db.session.
+
+    Викликати перед db.session.commit(): клієнти отримають подію лише після
+    успішного commit, а при rollback її не буде зовсім. Між publish() і
+    commit інші публікації цього засідання чекають — тож publish() має бути
+    останнім кроком перед commit, без повільних викликів між ними.
+    """
+    from app import db
+    from app.models.meeting_event import MeetingEvent
+
+    is_postgres = db.session.connection().dialect.name == 'postgresql'
+    if is_postgres:
+        # Id події видається після блокування, а блокування звільняє лише
+        # commit/rollback: події засідання фіксуються в порядку id, і курсор
+        # SSE не проскочить подію, чия транзакція ще не завершилась
+        db.session.execute(text("SELECT pg_advisory_xact_lock(:namespace, :meeting_id)"),
+                           {'namespace': PG_LOCK_NAMESPACE, 'meeting_id': meeting_id})
+
+    meeting_event = MeetingEvent(
+        meeting_id=meeting_id,
+        event=event_name,
+        payload=json.dumps(data, ensure_ascii=False, default=str),
+        founders_only=founders_only,
+    )
+    db.session.add(meeting_event)
+    db.session.flush()
+
+    if is_postgres:
+        # NOTIFY у транзакції доставляється слухачам лише після COMMIT
+        db.session.execute(text("SELECT pg_notify(:channel, :payload)"),
+                           {'channel': PG_CHANNEL, 'payload': f"{meeting_id}:{meeting_event.id}"})
+
+    db.session.info.setdefault(_SESSION_EVENTS, []).append((meeting_id, meeting_event.id))
+    return meeting_event
+
+
+def events_after(meeting_id, after_id, limit=100):
+    """
+    Події засідання новіші за after_id: список (id, event, data, founders_only).
+
+    Приватні події теж повертаються — курсор клієнта має проходити і через
+    них, а відфільтровує їх той, хто знає права користувача.
+    """
+    from app import db
+    from app.models.meeting_event import MeetingEvent
+
+    rows = db.session.query(
+        MeetingEvent.id, MeetingEvent.event, MeetingEvent.payload, MeetingEvent.founders_only,
+    ).filter(
+        MeetingEvent.meeting_id == meeting_id,
+        MeetingEvent.id > after_id,
+    ).order_by(MeetingEvent.id.asc()).limit(limit).all()
+    return [(row.id, row.event, json.loads(row.payload), bool(row.founders_only)) for row in rows]
+
+
+def last_event_id(meeting_id):
+    """Id останньої події засідання (0, якщо подій немає)"""
+    from app import db
+    from app.models.meeting_event import MeetingEvent
+
+    return db.session.query(db.func.max(MeetingEvent.id)).filter(
+        MeetingEvent.meeting_id == meeting_id
+    ).scalar() or 0
+
+
+def format_sse(event_name, data, event_id=None):
+    """Кадр text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_name}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def _notify_committed(session):
+    published = session.info.pop(_SESSION_EVENTS, None)
+    for meeting_id, event_id in published or ():
+        broker.publish_committed(meeting_id, event_id)
+
+
+def _discard_events(session, previous_transaction):
+    # Відкат savepoint не скасовує подій зовнішньої транзакції
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_EVENTS, None)
+
+
+def init_events(app: Flask):
+    """Реєструє хуки сесії та CLI-команди `flask events ...`"""
+    if not sa_event.contains(Session, 'after_commit', _notify_committed):
+        sa_event.listen(Session, 'after_commit', _notify_committed)
+        sa_event.listen(Session, 'after_soft_rollback', _discard_events)
+    app.cli.add_command(events_cli)
+
+
+events_cli = AppGroup('events', help='Події засідань (SSE)')
+
+
+@events_cli.command('prune')
+@click.option('--days', default=7, show_default=True, help='Видалити події, старші за стільки днів')
+def prune_command(days):
+    """Видаляє старі події засідань"""
+    from datetime import datetime, timedelta
+    from app import db
+    from app.models.meeting_event import MeetingEvent
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = MeetingEvent.query.filter(MeetingEvent.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f"Видалено подій: {deleted}")
@@ -0,0 +1,80 @@
+"""
+Допоміжні функції для умовних GET-запитів і HTTP Range.
+
+Ідея: ETag (хеш вмісту) і Last-Modified зберігаються в БД під час запису,
+тож відповідь 304 або 206 формується за метаданими — без завантаження
+BLOB-а цілком.
+"""
+import unicodedata
+from urllib.parse import quote
+
+from flask import Response, request
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+
+
+def content_disposition(filename, as_attachment=True):
+    """Заголовок Content-Disposition з підтримкою не-ASCII імен (RFC 6266)"""
+    disposition = 'attachment' if as_attachment else 'inline'
+    try:
+        filename.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        return f"{disposition}; filename=\"{simple}\"; filename*=UTF-8''{quote(filename, safe='')}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def set_validators(response, etag, last_modified=None, max_age=0):
+    """Додає ETag/Last-Modified і політику кешування до відповіді"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Accept-Ranges'] = 'bytes'
+    # Документи доступні лише після входу — кешувати може тільки браузер
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Повертає відповідь 304, якщо копія клієнта актуальна, інакше None.
+
+    If-None-Match має пріоритет над If-Modified-Since (RFC 9110, 13.2.2).
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return set_validators(Response(status=304), etag, last_modified)
+
+
+def requested_range(total_size, etag, last_modified=None):
+    """
+    Повертає (start, stop) запитаного діапазону байтів або None, якщо
+    треба віддати файл цілком (немає Range або If-Range не збігся).
+
+    Raises:
+        RequestedRangeNotSatisfiable: діапазон поза межами файлу
+    """
+    if request.range is None:
+        return None
+    if_range = request.if_range
+    if if_range.etag is not None and if_range.etag != etag:
+        return None
+    if if_range.date is not None and (last_modified is None or last_modified.replace(microsecond=0) > if_range.date.replace(tzinfo=None)):
+        return None
+    byte_range = request.range.range_for_length(total_size)
+    if byte_range is None:
+        raise RequestedRangeNotSatisfiable(length=total_size)
+    return byte_range
+
+
+def partial_response(chunk, start, stop, total_size, mimetype, etag, last_modified=None):
+    """Відповідь 206 Partial Content для вже прочитаного шматка"""
+    response = Response(chunk, status=206, mimetype=mimetype)
+    response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{total_size}'
+    return set_validators(response, etag, last_modified)
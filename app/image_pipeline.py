@@ -0,0 +1,171 @@
+"""
+Конвеєр похідних зображень: при завантаженні створює зменшені копії
+кількох ширин у сучасних форматах (WebP, AVIF — якщо Pillow його підтримує).
+
+Похідні зберігаються у тому ж сховищі файлів під ключем
+<sha256 оригіналу>.<ширина>w.<формат> і віддаються маршрутом media.image_variant.
+Обробка виконується у пулі потоків, тож запит адміністратора не чекає на неї.
+"""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import click
+from flask import Flask, current_app, url_for
+from flask.cli import AppGroup
+
+from app.blob_store import get_blob_store, store_upload
+
+logger = logging.getLogger('app.image_pipeline')
+
+VARIANT_WIDTHS = (320, 640, 1280)
+
+_MIMETYPES = {
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+}
+
+_SAVE_OPTIONS = {
+    'webp': {'quality': 80, 'method': 4},
+    'avif': {'quality': 55},
+}
+
+_executor = None
+
+
+@lru_cache(maxsize=None)
+def variant_formats():
+    """
+    Формати похідних, доступні у поточній збірці Pillow (від найкращого).
+    Перевіряється один раз на процес: функцію викликають кожен шаблон із
+    зображенням і кожен запит /media
+    """
+    from PIL import features
+
+    if features.check('avif'):
+        return ('avif', 'webp')
+    return ('webp',)
+
+
+def variant_key(image_hash, width, fmt):
+    return f"{image_hash}.{width}w.{fmt}"
+
+
+def variant_mimetype(fmt):
+    return _MIMETYPES[fmt]
+
+
+def render_variant(original, width, fmt):
+    """Повертає байти похідного зображення заданої ширини (без збільшення)"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(original)) as img:
+        # Фото з телефонів часто повернуті лише через EXIF
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            # Прозорість палітрових (P) і L-зображень записана в info['transparency']
+            has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, format=fmt.upper(), **_SAVE_OPTIONS[fmt])
+        return out.getvalue()
+
+
+def generate_variants(store, image_hash, widths=VARIANT_WIDTHS, formats=None):
+    """
+    Створює всі похідні для оригіналу у сховищі.
+
+    Returns:
+        int: кількість створених похідних
+    """
+    formats = formats or variant_formats()
+    with store.open(image_hash) as f:
+        original = f.read()
+
+    created = 0
+    for width in widths:
+        for fmt in formats:
+            key = variant_key(image_hash, width, fmt)
+            if store.exists(key):
+                continue
+            try:
+                store.write(key, render_variant(original, width, fmt))
+                created += 1
+            except Exception as e:
+                logger.warning(f"Не вдалося створити {key}: {e}")
+    return created
+
+
+def schedule_variants(image_hash):
+    """Ставить створення похідних у фоновий пул потоків"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config.get('IMAGE_PIPELINE_WORKERS', 2),
+            thread_name_prefix='image-pipeline',
+        )
+    store = get_blob_store()
+    future = _executor.submit(generate_variants, store, image_hash)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def _log_failure(future):
+    error = future.exception()
+    if error:
+        logger.error(f"Помилка конвеєра зображень: {error}")
+
+
+def ingest_image(file_storage):
+    """
+    Зберігає завантажене зображення у сховищі та запускає створення похідних.
+
+    Returns:
+        tuple: (image_hash, mimetype) або (None, None), якщо файл порожній
+    """
+    image_hash, mimetype = store_upload(file_storage)
+    if image_hash and (mimetype or '').startswith('image/') and mimetype != 'image/svg+xml':
+        schedule_variants(image_hash)
+    return image_hash, mimetype
+
+
+def image_srcset(image_hash, fmt):
+    """Рядок srcset для шаблонів: '<url> 320w, <url> 640w, ...'"""
+    if not image_hash:
+        return ''
+    return ', '.join(
+        f"{url_for('media.image_variant', image_hash=image_hash, width=width, fmt=fmt)} {width}w"
+        for width in VARIANT_WIDTHS
+    )
+
+
+def init_image_pipeline(app: Flask):
+    """Реєструє хелпери шаблонів і CLI-команди `flask images ...`"""
+    app.add_template_global(image_srcset)
+    app.add_template_global(lambda: [(fmt, variant_mimetype(fmt)) for fmt in variant_formats()],
+                            name='image_variant_formats')
+    app.cli.add_command(images_cli)
+
+
+images_cli = AppGroup('images', help='Похідні зображення')
+
+
+@images_cli.command('derive')
+def derive_command():
+    """Створює похідні для всіх зображень блоків і галереї"""
+    from app import db
+    from app.models.block import Block
+    from app.models.gallery_image import GalleryImage
+
+    store = get_blob_store()
+    total = 0
+    for model in (Block, GalleryImage):
+        hashes = {row[0] for row in db.session.query(model.image_hash).filter(model.image_hash.isnot(None))}
+        for image_hash in hashes:
+            if store.exists(image_hash):
+                total += generate_variants(store, image_hash)
+    click.echo(f"Створено похідних: {total}")
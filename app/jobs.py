@@ -0,0 +1,265 @@
+"""
+Фонові задачі в БД: довгі операції (протокол засідання через GPT-4 і PDF)
+виконуються окремим процесом `flask jobs work`, а не у воркері gunicorn.
+
+  * enqueue(kind, payload, key=...) — додає задачу в поточну транзакцію
+    (її фіксує код, що викликає), тож задача з'являється лише разом зі
+    змінами, які її породили. Поки задача з тим самим key не завершена,
+    повертається вона ж — подвійний клік не ставить другу;
+  * claim_next(worker_id) — бере найстарішу задачу, час якої настав:
+    у PostgreSQL SELECT ... FOR UPDATE SKIP LOCKED, тож кілька воркерів не
+    чекають один на одного; умовний UPDATE додатково захищає SQLite, де
+    FOR UPDATE немає. Задача, яку воркер тримає довше JOBS_LOCK_TIMEOUT
+    (процес упав), повертається в чергу;
+  * обробник — функція handler(job, args) -> dict, зареєстрована в HANDLERS
+    рядком 'модуль:функція': модуль імпортує лише процес-воркер.
+    set_progress() показує хід виконання; JobFailed — помилка, яку
+    немає сенсу повторювати, інакше до max_attempts спроб із паузою;
+  * JOBS_INLINE=true — окремого воркера немає (безкоштовний план, локальна
+    розробка): run_inline() виконує чергу у фоновому потоці веб-процесу.
+"""
+import importlib
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+from datetime import datetime, timedelta
+
+import click
+from flask import Flask, current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.job import Job
+
+logger = logging.getLogger('app.jobs')
+
+HANDLERS = {
+    'protocol': 'app.protocol_generator:protocol_job',
+}
+
+RETRY_DELAY = 30  # секунд перед другою спробою, далі вдвічі довше
+
+
+class JobFailed(Exception):
+    """Помилка задачі, яку не варто повторювати (немає даних, не налаштовано ключ)"""
+
+
+def enqueue(kind, payload=None, key=None, created_by=None, max_attempts=3):
+    """Нова задача (або незавершена з тим самим key) у поточній транзакції"""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    if key:
+        existing = find_active(key)
+        if existing is not None:
+            return existing
+    job = Job(kind=kind, key=key, payload=json.dumps(payload or {}), created_by=created_by,
+              max_attempts=max_attempts, status=Job.QUEUED, progress=0, attempts=0,
+              run_at=datetime.utcnow())
+    try:
+        with db.session.begin_nested():
+            db.session.add(job)
+    except IntegrityError:
+        # Паралельний запит з тим самим key встиг першим (uq_jobs_key_active)
+        existing = find_active(key) if key else None
+        if existing is None:
+            raise
+        return existing
+    return job
+
+
+def find_active(key):
+    """Незавершена задача з цим key або None"""
+    return Job.query.filter(Job.key == key, Job.status.in_(Job.ACTIVE)).order_by(Job.id.desc()).first()
+
+
+def latest_job(key):
+    """Остання задача з цим key (будь-який статус) або None"""
+    return Job.query.filter(Job.key == key).order_by(Job.id.desc()).first()
+
+
+def _claimable(now):
+    stale = now - timedelta(seconds=current_app.config.get('JOBS_LOCK_TIMEOUT', 900))
+    return or_(
+        and_(Job.status == Job.QUEUED, Job.run_at <= now),
+        and_(Job.status == Job.RUNNING, Job.locked_at < stale),
+    )
+
+
+def claim_next(worker_id):
+    """Позначає наступну задачу як running за worker_id і повертає її (або None)"""
+    now = datetime.utcnow()
+    job_id = db.session.query(Job.id).filter(_claimable(now)).order_by(
+        Job.run_at, Job.id
+    ).limit(1).with_for_update(skip_locked=True).scalar()
+    if job_id is None:
+        db.session.rollback()
+        return None
+
+    claimed = db.session.execute(
+        update(Job).where(Job.id == job_id, _claimable(now)).values(
+            status=Job.RUNNING, locked_by=worker_id, locked_at=now,
+            attempts=Job.attempts + 1, updated_at=now,
+        )
+    ).rowcount
+    db.session.commit()
+    if claimed != 1:
+        return None  # інший воркер встиг першим (SQLite)
+    return db.session.get(Job, job_id)
+
+
+def set_progress(job, progress, message=None):
+    """
+    Зберігає хід виконання окремим з'єднанням: транзакція обробника
+    лишається незафіксованою до кінця задачі
+    """
+    job_id = job.id if isinstance(job, Job) else job
+    with db.engine.begin() as connection:
+        connection.execute(update(Job).where(Job.id == job_id).values(
+            progress=int(progress), message=message, updated_at=datetime.utcnow(),
+        ))
+
+
+def _resolve(kind):
+    module_name, _, function_name = HANDLERS[kind].partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def run_job(job):
+    """Виконує задачу, яку вже взяв цей воркер, і фіксує результат"""
+    job_id = job.id
+    try:
+        result = _resolve(job.kind)(job, job.args) or {}
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.error = str(e)[:2000]
+        job.locked_by = None
+        if isinstance(e, JobFailed) or job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = datetime.utcnow()
+            logger.warning(f"Задача {job_id} ({job.kind}) не вдалася: {e}")
+        else:
+            job.status = Job.QUEUED
+            job.run_at = datetime.utcnow() + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+            logger.warning(f"Задача {job_id} ({job.kind}), спроба {job.attempts}: {e}; повтор о {job.run_at}")
+        db.session.commit()
+        return job
+
+    job.status = Job.DONE
+    job.progress = 100
+    job.result = json.dumps(result)
+    job.error = None
+    job.message = None
+    job.locked_by = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    logger.info(f"Задача {job_id} ({job.kind}) виконана")
+    return job
+
+
+def work(worker_id, once=False, poll_interval=2.0, max_jobs=None, stop=None):
+    """
+    Цикл воркера: бере і виконує задачі, поки не отримає stop (SIGTERM)
+    або, з once=True, поки черга не спорожніє. Повертає кількість задач.
+    """
+    stop = stop or threading.Event()
+    processed = 0
+    while not stop.is_set():
+        try:
+            job = claim_next(worker_id)
+        except Exception as e:
+            # БД тимчасово недоступна — пробуємо знову після паузи
+            db.session.rollback()
+            logger.error(f"Не вдалося взяти задачу: {e}")
+            job = None
+        if job is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job)
+        db.session.remove()  # нова сесія для кожної задачі
+        processed += 1
+        if max_jobs and processed >= max_jobs:
+            break
+    return processed
+
+
+_inline_lock = threading.Lock()
+_inline_thread = None
+
+
+def run_inline():
+    """
+    JOBS_INLINE: виконує задачі черги, час яких настав, у фоновому потоці
+    цього процесу і завершує потік, коли черга порожня. Викликається після
+    enqueue і під час опитування прогресу, тож відкладений повтор стартує,
+    щойно на задачу хтось чекає. Без JOBS_INLINE нічого не робить.
+    """
+    global _inline_thread
+    if not current_app.config.get('JOBS_INLINE'):
+        return
+    app = current_app._get_current_object()
+    with _inline_lock:
+        if _inline_thread is not None and _inline_thread.is_alive():
+            return
+        _inline_thread = threading.Thread(target=_work_inline, args=(app,), name='jobs-inline', daemon=True)
+        _inline_thread.start()
+
+
+def _work_inline(app):
+    with app.app_context():
+        try:
+            work(f"{socket.gethostname()}:{os.getpid()}:inline", once=True)
+        except Exception as e:
+            logger.error(f"Вбудований виконавець задач зупинився: {e}")
+        finally:
+            db.session.remove()
+
+
+jobs_cli = AppGroup('jobs', help='Фонові задачі (черга в БД)')
+
+
+@jobs_cli.command('work')
+@click.option('--once', is_flag=True, help='Виконати задачі, що є в черзі, і завершитися')
+@click.option('--poll-interval', type=float, default=None, help='Пауза між перевірками порожньої черги, с')
+@click.option('--max-jobs', type=int, default=None, help='Завершитися після стількох задач')
+@click.option('--worker-id', default=None, help='Ім\'я воркера в jobs.locked_by (типово host:pid)')
+def work_command(once, poll_interval, max_jobs, worker_id):
+    """Запускає воркер фонових задач"""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    poll_interval = poll_interval or current_app.config.get('JOBS_POLL_INTERVAL', 2.0)
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        # Поточна задача доробляється, нова вже не береться
+        click.echo(f"Сигнал {signum}: завершую після поточної задачі")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    click.echo(f"Воркер {worker_id}: задачі {', '.join(HANDLERS)}")
+    processed = work(worker_id, once=once, poll_interval=poll_interval, max_jobs=max_jobs, stop=stop)
+    click.echo(f"Виконано задач: {processed}")
+
+
+@jobs_cli.command('prune')
+@click.option('--days', default=30, show_default=True, help='Видалити завершені задачі, старші за стільки днів')
+def prune_command(days):
+    """Видаляє старі завершені задачі"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = Job.query.filter(
+        Job.status.in_((Job.DONE, Job.FAILED)), Job.finished_at < cutoff,
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f"Видалено задач: {deleted}")
+
+
+def init_jobs(app: Flask):
+    """Реєструє CLI-команди `flask jobs ...`"""
+    app.cli.add_command(jobs_cli)
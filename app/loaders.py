@@ -0,0 +1,68 @@
+"""
+Request-scoped batch loaders for meeting pages.
+
+Every loader runs one query per request, however many agenda items or
+attendees a meeting has, and keeps its result in g for the rest of the
+request. The loaded rows live in the request's SQLAlchemy session, so its
+identity map is shared between loaders: e.g. meeting.creator is resolved
+without a query when the creator is among the attendees loaded here.
+"""
+from flask import g
+from sqlalchemy.orm import joinedload
+
+from app import db
+
+
+class MeetingLoader:
+    """Batched access to one request's meeting data (see get_loader())"""
+
+    def __init__(self):
+        self._memo = {}
+
+    def _load(self, key, loader):
+        if key not in self._memo:
+            self._memo[key] = loader()
+        return self._memo[key]
+
+    def agenda_items(self, meeting_id):
+        """Agenda items of a meeting in display order"""
+        from app.models.meeting import AgendaItem
+        return self._load(('agenda_items', meeting_id), lambda: (
+            AgendaItem.query.filter_by(meeting_id=meeting_id).order_by(AgendaItem.order).all()
+        ))
+
+    def attendees(self, meeting_id):
+        """Attendees of a meeting with their users joined in the same query"""
+        from app.models.meeting import MeetingAttendee
+        return self._load(('attendees', meeting_id), lambda: (
+            MeetingAttendee.query.options(joinedload(MeetingAttendee.user))
+            .filter_by(meeting_id=meeting_id)
+            .order_by(MeetingAttendee.joined_at.asc())
+            .all()
+        ))
+
+    def user_votes(self, meeting_id, user_id):
+        """
+        {agenda_item_id: vote value or None} of one user for every agenda
+        item of the meeting, from a single IN query
+        """
+        def load():
+            from app.models.meeting import MeetingVote
+            item_ids = [item.id for item in self.agenda_items(meeting_id)]
+            votes = dict.fromkeys(item_ids)
+            if item_ids:
+                rows = db.session.query(MeetingVote.agenda_item_id, MeetingVote.vote).filter(
+                    MeetingVote.agenda_item_id.in_(item_ids),
+                    MeetingVote.user_id == user_id,
+                ).all()
+                for item_id, vote in rows:
+                    votes[item_id] = vote.value if vote else None
+            return votes
+        return self._load(('user_votes', meeting_id, user_id), load)
+
+
+def get_loader():
+    """The MeetingLoader of the current request"""
+    if 'meeting_loader' not in g:
+        g.meeting_loader = MeetingLoader()
+    return g.meeting_loader
@@ -0,0 +1,158 @@
+"""
+Метрики застосунку у форматі Prometheus (маршрут /metrics).
+
+  * brama_request_duration_seconds — гістограма тривалості за endpoint;
+  * brama_requests_total — лічильник відповідей за endpoint і статусом;
+  * brama_response_size_bytes — гістограма розміру відповіді за endpoint;
+  * brama_cache_requests_total — влучання/промахи app.cache і кешу сторінок;
+  * brama_db_pool_* — стан пулу з'єднань SQLAlchemy, час очікування
+    з'єднання і тайм-аути (app.db_pool).
+
+prometheus_client — необов'язкова залежність: без неї метрики вимкнені,
+а observe_cache() нічого не робить. Щоб значення всіх воркерів gunicorn
+складалися, задайте PROMETHEUS_MULTIPROC_DIR (це робить gunicorn.conf.py);
+маршрут /metrics тоді збирає файли всіх процесів.
+"""
+import hmac
+import os
+import time
+
+from flask import Flask, Response, current_app, g, request
+
+try:
+    import prometheus_client
+except ImportError:  # опціональна залежність
+    prometheus_client = None
+
+_metrics = None
+
+# Секунди: від швидких відповідей з кешу до генерації PDF/запитів до OpenAI
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Секунди очікування вільного з'єднання: зазвичай ~0, секунди — пул замалий
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+SIZE_BUCKETS = (512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+
+class _Metrics:
+    def __init__(self):
+        from prometheus_client import Counter, Gauge, Histogram
+
+        self.duration = Histogram(
+            'brama_request_duration_seconds', 'Request latency by endpoint',
+            ['endpoint', 'method'], buckets=DURATION_BUCKETS)
+        self.requests = Counter(
+            'brama_requests_total', 'Responses by endpoint and status',
+            ['endpoint', 'method', 'status'])
+        self.response_size = Histogram(
+            'brama_response_size_bytes', 'Response body size by endpoint',
+            ['endpoint'], buckets=SIZE_BUCKETS)
+        self.cache = Counter(
+            'brama_cache_requests_total', 'Cache lookups by cache and result',
+            ['cache', 'result'])
+        self.pool_checked_out = Gauge(
+            'brama_db_pool_checked_out', 'DB connections in use',
+            multiprocess_mode='livesum')
+        self.pool_size = Gauge(
+            'brama_db_pool_size', 'DB connections kept in the pool',
+            multiprocess_mode='livesum')
+        self.pool_overflow = Gauge(
+            'brama_db_pool_overflow', 'DB connections opened above the pool size',
+            multiprocess_mode='livesum')
+        self.pool_wait = Histogram(
+            'brama_db_pool_checkout_wait_seconds', 'Time spent waiting for a free DB connection',
+            buckets=POOL_WAIT_BUCKETS)
+        self.pool_timeouts = Counter(
+            'brama_db_pool_timeouts_total', 'Checkouts that gave up waiting for a DB connection')
+
+
+def metrics_enabled():
+    return _metrics is not None
+
+
+def observe_cache(name, hit):
+    """Рахує влучання (hit=True) чи промах кешу name"""
+    if _metrics is not None:
+        _metrics.cache.labels(name, 'hit' if hit else 'miss').inc()
+
+
+def observe_pool_checkout(wait, timed_out=False):
+    """Рахує очікування з'єднання з пулу (app.db_pool)"""
+    if _metrics is not None:
+        _metrics.pool_wait.observe(wait)
+        if timed_out:
+            _metrics.pool_timeouts.inc()
+
+
+def _endpoint_label():
+    # 404 без endpoint не повинні плодити окремі серії на кожен шлях
+    return request.endpoint or 'unmatched'
+
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _observe_response(response):
+    started = g.pop('metrics_started', None)
+    if started is None or request.endpoint == 'metrics':
+        return response
+    endpoint = _endpoint_label()
+    _metrics.duration.labels(endpoint, request.method).observe(time.perf_counter() - started)
+    _metrics.requests.labels(endpoint, request.method, str(response.status_code)).inc()
+    # У потокових відповідей (SSE, send_file) довжина наперед невідома
+    if response.content_length is not None:
+        _metrics.response_size.labels(endpoint).observe(response.content_length)
+    _observe_pool()
+    return response
+
+
+def _observe_pool():
+    from app import db
+
+    pool = db.engine.pool
+    # SQLite у тестах може працювати без QueuePool — у нього цих методів немає
+    if hasattr(pool, 'checkedout'):
+        _metrics.pool_checked_out.set(pool.checkedout())
+        _metrics.pool_size.set(pool.size())
+        _metrics.pool_overflow.set(max(pool.overflow(), 0))
+
+
+def metrics_view():
+    """Метрики у текстовому форматі Prometheus (усі воркери в multiprocess-режимі)"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        supplied = supplied or request.args.get('token', '')
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return Response('Forbidden', status=403, mimetype='text/plain')
+    elif not current_app.config.get('METRICS_PUBLIC', False):
+        # У production без токена метрики (трафік за endpoint'ами, стан пулу) не віддаємо
+        return Response('Forbidden: set METRICS_TOKEN', status=403, mimetype='text/plain')
+
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, REGISTRY, generate_latest
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app: Flask):
+    """Реєструє хуки вимірювання і маршрут /metrics (якщо є prometheus_client)"""
+    global _metrics
+
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    if prometheus_client is None:
+        app.logger.info("prometheus_client не встановлено — метрики /metrics вимкнені")
+        return
+    if _metrics is None:
+        # Метрики реєструються в глобальному реєстрі один раз на процес
+        _metrics = _Metrics()
+
+    app.before_request(_start_timer)
+    app.after_request(_observe_response)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
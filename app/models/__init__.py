@@ -8,3 +8,5 @@ from app.models.settings import Settings
 from app.models.brama import Brama
 from app.models.meeting import Meeting, AgendaItem, MeetingAttendee, MeetingVote, Message, MeetingStatus, VoteType
 from app.models.meeting_document import MeetingDocument
+from app.models.meeting_event import MeetingEvent
+from app.models.job import Job
@@ -16,8 +16,14 @@ class Block(db.Model):
     type = db.Column(db.String(32), nullable=False)  # info, gallery, projects
     is_active = db.Column(db.Boolean, default=True)
     image_url = db.Column(db.String(300), nullable=True)
-    image_data = db.Column(db.LargeBinary, nullable=True)
+    # Застарілий BLOB; новий вміст зберігається у сховищі файлів (app.blob_store)
+    image_data = db.deferred(db.Column(db.LargeBinary, nullable=True))
     image_mimetype = db.Column(db.String(64), nullable=True)
+    image_hash = db.Column(db.String(64), nullable=True)  # SHA-256 ключ у сховищі файлів
     
+    def cache_tags(self):
+        """Cache tags to reset when the block changes (see app.cache)"""
+        return {'blocks', f'block:{self.id}'}
+
     def __repr__(self):
         return f'<Block {self.id}: {self.title}>'
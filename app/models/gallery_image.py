@@ -1,12 +1,18 @@
 from app import db
-from app.models.helpers import get_table_args
+from app.models.helpers import get_table_args, history_values
 
 class GalleryImage(db.Model):
     __tablename__ = 'gallery_images'
     __table_args__ = get_table_args()
     id = db.Column(db.Integer, primary_key=True)
-    image_data = db.Column(db.LargeBinary, nullable=True)
+    # Застарілий BLOB; новий вміст зберігається у сховищі файлів (app.blob_store)
+    image_data = db.deferred(db.Column(db.LargeBinary, nullable=True))
     image_mimetype = db.Column(db.String(64), nullable=True)
+    image_hash = db.Column(db.String(64), nullable=True)  # SHA-256 ключ у сховищі файлів
     description = db.Column(db.String(256), nullable=True)
     block_id = db.Column(db.Integer, db.ForeignKey('blocks.id' if not get_table_args() else 'brama.blocks.id'))
-    block = db.relationship('Block', backref=db.backref('images', lazy='dynamic'))
\ No newline at end of file
+    block = db.relationship('Block', backref=db.backref('images', lazy='dynamic'))
+
+    def cache_tags(self):
+        """Cache tags to reset when the gallery image changes (see app.cache)"""
+        return {'gallery'} | {f'gallery:{block_id}' for block_id in history_values(self, 'block_id')}
@@ -2,16 +2,35 @@ import json
 import os
 from flask import session
 
-def get_table_args():
+def get_table_args(*constraints):
     """
     Returns appropriate table arguments based on database configuration.
     If using PostgreSQL, includes schema specification; if using SQLite, returns empty dict.
+    Indexes and constraints passed in are put in front of the options, as
+    __table_args__ = get_table_args(db.Index(...), ...) expects.
     """
     # If DATABASE_URL is set, we're using PostgreSQL
     if os.getenv("DATABASE_URL"):
-        return {'schema': os.getenv('DB_SCHEMA', 'brama')}
-    # Otherwise, we're using SQLite which doesn't support schemas
-    return {}
+        options = {'schema': os.getenv('DB_SCHEMA', 'brama')}
+    else:
+        # Otherwise, we're using SQLite which doesn't support schemas
+        options = {}
+    if constraints:
+        return (*constraints, options)
+    return options
+
+def history_values(obj, attr):
+    """
+    Returns the current and (if changed in this flush) previous non-empty values
+    of an attribute, e.g. both the old and the new block_id of a moved row.
+    """
+    from sqlalchemy import inspect
+
+    history = inspect(obj).attrs[attr].history
+    values = set(history.added or ()) | set(history.unchanged or ()) | set(history.deleted or ())
+    if not values:
+        values = {getattr(obj, attr, None)}
+    return {value for value in values if value is not None}
 
 def get_translated_content(obj, field_name, default_field=None):
     """
@@ -0,0 +1,73 @@
+"""
+Model for background jobs (durable queue, see app.jobs)
+"""
+import json
+from app import db
+from datetime import datetime
+
+from app.models.helpers import get_table_args
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    __table_args__ = get_table_args(
+        # Workers pick the oldest due job of a status
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+        # At most one queued/running job per key, even for parallel enqueue()
+        db.Index('uq_jobs_key_active', 'key', unique=True,
+                 postgresql_where=db.text("status IN ('queued', 'running')"),
+                 sqlite_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    ACTIVE = (QUEUED, RUNNING)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)  # handler name, e.g. 'protocol'
+    key = db.Column(db.String(128), index=True)  # e.g. 'protocol:12': one active job per key
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON arguments
+    status = db.Column(db.String(16), nullable=False, default=QUEUED)
+    progress = db.Column(db.Integer, nullable=False, default=0)  # percent
+    message = db.Column(db.String(255))  # current step, shown to the user
+    result = db.Column(db.Text)  # JSON returned by the handler
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # not before (retry backoff)
+    locked_by = db.Column(db.String(128))  # worker that claimed the job
+    locked_at = db.Column(db.DateTime)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id' if not get_table_args() else 'brama.users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    @property
+    def args(self):
+        return json.loads(self.payload or '{}')
+
+    @property
+    def result_data(self):
+        return json.loads(self.result) if self.result else None
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result_data,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
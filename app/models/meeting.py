@@ -13,7 +13,7 @@ class VoteType(enum.Enum):
     no = "no"
     abstain = "abstain"
 
-from app.models.helpers import get_table_args
+from app.models.helpers import get_table_args, history_values
 
 class Meeting(db.Model):
     __tablename__ = 'meetings'
@@ -42,10 +42,12 @@ class Meeting(db.Model):
     def attendee_count(self):
         return self.attendees.count()
     
+    # 3 is the quorum number as specified
+    QUORUM = 3
+    
     @property
     def has_quorum(self):
-        # 3 is the quorum number as specified
-        return self.attendees.count() >= 3
+        return self.attendees.count() >= self.QUORUM
         
     @property
     def is_upcoming(self):
@@ -54,7 +56,10 @@ class Meeting(db.Model):
 
 class AgendaItem(db.Model):
     __tablename__ = 'agenda_items'
-    __table_args__ = get_table_args()
+    __table_args__ = get_table_args(
+        # Agenda of a meeting in display order
+        db.Index('ix_agenda_items_meeting_id_order', 'meeting_id', 'order'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, db.ForeignKey('meetings.id' if not get_table_args() else 'brama.meetings.id'))
@@ -67,30 +72,35 @@ class AgendaItem(db.Model):
     # Relationships
     votes = db.relationship('MeetingVote', backref='agenda_item', lazy='dynamic', cascade='all, delete-orphan')
     
+    @property
+    def tally(self):
+        """Vote counts from the per-meeting tally (one query for all items, see app.cache)"""
+        from app.cache import get_meeting_tallies
+        from app.dto import VoteTally
+        return get_meeting_tallies(self.meeting_id).get(self.id, VoteTally())
+    
     @property
     def yes_votes(self):
-        return self.votes.filter_by(vote=VoteType.yes).count()
+        return self.tally.yes
     
     @property
     def no_votes(self):
-        return self.votes.filter_by(vote=VoteType.no).count()
+        return self.tally.no
     
     @property
     def abstain_votes(self):
-        return self.votes.filter_by(vote=VoteType.abstain).count()
+        return self.tally.abstain
     
     @property
     def result(self):
-        if self.yes_votes > self.no_votes:
-            return "Approved"
-        elif self.no_votes > self.yes_votes:
-            return "Rejected"
-        else:
-            return "Tied"
+        return self.tally.result
 
 class MeetingAttendee(db.Model):
     __tablename__ = 'meeting_attendees'
-    __table_args__ = get_table_args()
+    __table_args__ = get_table_args(
+        # Attendees of a meeting and "is this user still in the meeting" lookups
+        db.Index('ix_meeting_attendees_meeting_id_user_id_left_at', 'meeting_id', 'user_id', 'left_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, db.ForeignKey('meetings.id' if not get_table_args() else 'brama.meetings.id'))
@@ -100,7 +110,10 @@ class MeetingAttendee(db.Model):
 
 class MeetingVote(db.Model):
     __tablename__ = 'meeting_votes'
-    __table_args__ = get_table_args()
+    __table_args__ = get_table_args(
+        # One vote per user and agenda item; also serves the tally and user vote lookups
+        db.Index('uq_meeting_votes_agenda_item_id_user_id', 'agenda_item_id', 'user_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     agenda_item_id = db.Column(db.Integer, db.ForeignKey('agenda_items.id' if not get_table_args() else 'brama.agenda_items.id'))
@@ -109,9 +122,50 @@ class MeetingVote(db.Model):
     comment = db.Column(db.Text)
     voted_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @classmethod
+    def upsert(cls, agenda_item_id, user_id, vote, comment=''):
+        """
+        Record the vote of a user in one statement:
+        INSERT ... ON CONFLICT (agenda_item_id, user_id) DO UPDATE ... RETURNING id.
+        The unique index makes double clicks and parallel requests end up in
+        one row instead of racing a SELECT against an INSERT. Runs in the
+        current transaction (the caller commits); returns the vote id.
+        """
+        from app.cache import tag_session
+
+        session = db.session
+        if session.get_bind().dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        values = {'vote': vote, 'comment': comment, 'voted_at': datetime.utcnow()}
+        statement = insert(cls).values(agenda_item_id=agenda_item_id, user_id=user_id, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=['agenda_item_id', 'user_id'], set_=values,
+        ).returning(cls.id)
+        vote_id = session.execute(statement).scalar_one()
+
+        # Core statements bypass the flush hooks that collect cache tags
+        item = session.get(AgendaItem, agenda_item_id)
+        if item is not None:
+            tag_session(session, f'votes:{item.meeting_id}')
+        return vote_id
+
+    def cache_tags(self):
+        """Cache tags to reset when the vote changes (see app.cache)"""
+        # Called during flush, when the relationship of a pending vote is not
+        # loaded yet: look the agenda items up by id (usually from the identity map)
+        session = db.object_session(self)
+        items = [session.get(AgendaItem, item_id) for item_id in history_values(self, 'agenda_item_id')]
+        return {f'votes:{item.meeting_id}' for item in items if item is not None}
+
 class Message(db.Model):
     __tablename__ = 'messages'
-    __table_args__ = get_table_args()
+    __table_args__ = get_table_args(
+        # Chat history and polling of one meeting
+        db.Index('ix_messages_meeting_id_created_at', 'meeting_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, db.ForeignKey('meetings.id' if not get_table_args() else 'brama.meetings.id'))
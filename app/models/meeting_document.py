@@ -8,14 +8,20 @@ from app.models.helpers import get_table_args
 
 class MeetingDocument(db.Model):
     __tablename__ = 'meeting_documents'
-    __table_args__ = get_table_args()
+    __table_args__ = get_table_args(
+        # Documents of a meeting, public ones for non-founders
+        db.Index('ix_meeting_documents_meeting_id_is_public', 'meeting_id', 'is_public'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     # Foreign key references adjusted based on database type
     meeting_id = db.Column(db.Integer, db.ForeignKey('meetings.id' if not get_table_args() else 'brama.meetings.id'))
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
-    file_data = db.Column(db.LargeBinary, nullable=False)  # Binary data of the file
+    # Legacy storage: new uploads keep contents in the blob store (key = file_hash)
+    # and leave this NULL. Deferred so metadata queries never pull file contents
+    file_data = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    file_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the contents, blob store key and ETag
     file_mimetype = db.Column(db.String(128), nullable=False)  # MIME type of the file
     file_size = db.Column(db.Integer, nullable=False)  # Size of file in bytes
     # Foreign key references adjusted based on database type
@@ -0,0 +1,28 @@
+"""
+Model for meeting events (push channel log, see app.events)
+"""
+import json
+from app import db
+from datetime import datetime
+
+from app.models.helpers import get_table_args
+
+class MeetingEvent(db.Model):
+    __tablename__ = 'meeting_events'
+    __table_args__ = get_table_args()
+
+    id = db.Column(db.Integer, primary_key=True)  # Monotonic, used as the SSE event id
+    # Foreign key references adjusted based on database type
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meetings.id' if not get_table_args() else 'brama.meetings.id'),
+                           index=True)
+    event = db.Column(db.String(32), nullable=False)  # user_joined, user_left, new_message, vote_update, new_document
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    founders_only = db.Column(db.Boolean, default=False)  # e.g. private documents
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def data(self):
+        return json.loads(self.payload)
+
+    def __repr__(self):
+        return f'<MeetingEvent {self.id} {self.event} meeting={self.meeting_id}>'
@@ -1,6 +1,6 @@
 from app import db
 from datetime import datetime
-from app.models.helpers import get_table_args
+from app.models.helpers import get_table_args, history_values
 from sqlalchemy import Text
 
 # Vote model commented out because brama.votes table doesn't exist in database
@@ -17,84 +17,28 @@ class Project(db.Model):
     """
     Model for projects submitted to the platform.
     
-    Designed to work even when optional fields like document_url, image_data, and 
-    image_mimetype don't exist in the database, using deferred loading and
-    column reflection to handle missing columns.
+    Designed to work even when optional fields like document_url, image_data, and
+    image_mimetype don't exist in the database: they are not mapped, and code that
+    needs them checks has_column(), which reflects the table lazily once per
+    Alembic revision (see app.schema_info) instead of at import time.
     """
     __tablename__ = 'projects'
-    __table_args__ = get_table_args()
-    
-    # Dictionary to track which columns actually exist in the database
-    # Will be populated in __declare_last__
-    _existing_columns = None
-    
+    __table_args__ = get_table_args(
+        # Approved projects of a block, newest first (app.cache.get_approved_projects)
+        db.Index('ix_projects_block_id_status_created_at', 'block_id', 'status', 'created_at'),
+    )
+
+    OPTIONAL_COLUMNS = ('document_url', 'image_data', 'image_mimetype')
+
     @classmethod
-    def __declare_last__(cls):
-        """
-        SQLAlchemy hook called after mapper configuration is complete.
-        Detects which columns actually exist in the database and configures
-        the mapper to exclude non-existent columns from SQL operations.
-        """
-        from sqlalchemy import inspect
-        import logging
-        logger = logging.getLogger('app.models.project')
-        
-        try:
-            engine = db.engine
-            
-            # CRITICAL: Clear reflection cache to force fresh metadata
-            # This ensures we get current column types from database
-            engine.dialect._get_server_version_info.cache_clear() if hasattr(engine.dialect._get_server_version_info, 'cache_clear') else None
-            
-            # Create a fresh inspector without cached metadata
-            insp = inspect(engine)
-            
-            # Store existing columns at class level for later checks
-            cls._existing_columns = set()
-            
-            # Try to detect columns from different schema scenarios
-            schemas_to_check = ['brama', None]  # None = no schema (like in SQLite)
-            
-            for schema in schemas_to_check:
-                try:
-                    # Force reflection by clearing any cached metadata
-                    if hasattr(insp, '_cache'):
-                        insp._cache.clear()
-                    
-                    cols = insp.get_columns(cls.__tablename__, schema=schema)
-                    if cols:  # If we found columns, store them and break
-                        cls._existing_columns = {col['name'] for col in cols}
-                        logger.info(f"Found {len(cls._existing_columns)} columns in {cls.__tablename__} table")
-                        break
-                except Exception as e:
-                    logger.debug(f"Could not inspect schema {schema}: {e}")
-                    continue
-            
-            # Identify which columns are missing
-            missing_columns = []
-            optional_columns = ['document_url', 'image_data', 'image_mimetype']
-            
-            for col_name in optional_columns:
-                if col_name not in cls._existing_columns:
-                    missing_columns.append(col_name)
-                    logger.info(f"Column '{col_name}' does not exist in the database")
-            
-            # Configure the mapper to exclude these columns
-            if missing_columns:
-                # Get all columns that should be included
-                include_properties = [c.name for c in cls.__table__.c 
-                                     if c.name not in missing_columns]
-                
-                # Set the __mapper_args__ with include_properties
-                if not hasattr(cls, '__mapper_args__'):
-                    cls.__mapper_args__ = {}
-                
-                cls.__mapper_args__['include_properties'] = include_properties
-                logger.info(f"Set include_properties for {cls.__name__}: {include_properties}")
-                
-        except Exception as e:
-            logger.warning(f"Error in Project.__declare_last__: {e}")
-            # If any error occurs, continue without modifying mapper
+    def has_column(cls, name):
+        """Whether the column actually exists in the database table"""
+        from app.schema_info import has_column
+        return has_column(cls.__tablename__, name)
+
+    @classmethod
+    def missing_optional_columns(cls):
+        return [name for name in cls.OPTIONAL_COLUMNS if not cls.has_column(name)]
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(Text, nullable=False)
@@ -136,4 +80,6 @@ class Project(db.Model):
     block_id = db.Column(db.Integer, db.ForeignKey('blocks.id' if not get_table_args() else 'brama.blocks.id'), nullable=True)
     block = db.relationship('Block', backref=db.backref('projects', lazy='dynamic'))
 
-
+    def cache_tags(self):
+        """Cache tags to reset when the project changes (see app.cache)"""
+        return {'projects'} | {f'projects:{block_id}' for block_id in history_values(self, 'block_id')}
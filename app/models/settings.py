@@ -9,4 +9,8 @@ class Settings(db.Model):
     instagram = db.Column(db.String(256))
     telegram = db.Column(db.String(256))
     email = db.Column(db.String(256))
-    association_balance = db.Column(db.Numeric(10, 2), default=0.00)  # Баланс ферайна 
\ No newline at end of file
+    association_balance = db.Column(db.Numeric(10, 2), default=0.00)  # Баланс ферайна 
+
+    def cache_tags(self):
+        """Cache tags to reset when the settings change (see app.cache)"""
+        return {'settings'}
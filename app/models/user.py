@@ -32,6 +32,10 @@ class User(db.Model, UserMixin):
     meeting_votes = db.relationship('MeetingVote', backref='user', lazy='dynamic')
     messages = db.relationship('Message', backref='user', lazy='dynamic')
 
+    def cache_tags(self):
+        """Cache tags to reset when the user changes (see app.cache, app.principal)"""
+        return {f'principal:{self.id}'}
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
@@ -0,0 +1,148 @@
+"""
+Виклики OpenAI поза потоками, що обслуговують сторінки.
+
+  * get_client() — один клієнт на процес: SDK імпортується при першому
+    виклику, запити обмежені OPENAI_TIMEOUT. OPENAI_BASE_URL спрямовує їх
+    на інший сервер з тим самим API, напр. локальний мок scripts/mock_openai.py;
+  * submit_job(fn, ...) — виконує fn у пулі з OPENAI_POOL_WORKERS потоків.
+    Стан задачі зберігається у спільному кеші за job_id, тож статус може
+    опитати будь-який воркер. Якщо незавершених задач уже OPENAI_MAX_PENDING —
+    OpenAIBusy;
+  * upstream_slot(name) / acquire_slot(name) — не більше
+    OPENAI_SYNC_CONCURRENCY одночасних синхронних викликів (TTS, Whisper,
+    потокові відповіді асистента) на процес; понад це — OpenAIBusy,
+    маршрут відповідає 503, а решта потоків воркера лишається сторінкам.
+"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from flask import current_app
+
+from app.cache import cache
+
+logger = logging.getLogger('app.openai_client')
+
+JOB_TTL = 600  # секунд зберігається результат задачі
+
+_lock = threading.Lock()
+_client = None
+_client_signature = None
+_executor = None
+_pending = None
+_slots = {}
+
+
+class OpenAIUnavailable(RuntimeError):
+    """OPENAI_API_KEY не задано"""
+
+
+class OpenAIBusy(RuntimeError):
+    """Ліміт одночасних викликів OpenAI вичерпано — клієнту варто повторити пізніше"""
+
+
+def get_client():
+    """Спільний клієнт OpenAI для поточної конфігурації"""
+    global _client, _client_signature
+
+    config = current_app.config
+    api_key = config.get('OPENAI_API_KEY')
+    if not api_key:
+        raise OpenAIUnavailable('OpenAI API key not configured')
+    signature = (api_key, config.get('OPENAI_BASE_URL'), config.get('OPENAI_TIMEOUT'))
+    with _lock:
+        if _client is None or _client_signature != signature:
+            from openai import OpenAI
+
+            _client = OpenAI(
+                api_key=api_key,
+                base_url=config.get('OPENAI_BASE_URL') or None,
+                timeout=config.get('OPENAI_TIMEOUT', 60),
+                max_retries=1,
+            )
+            _client_signature = signature
+    return _client
+
+
+def _job_key(job_id):
+    return f"openai:job:{job_id}"
+
+
+def get_job(job_id):
+    """Стан задачі: {'status': 'processing' | 'done' | 'error', ...} або None"""
+    return cache.get(_job_key(job_id))
+
+
+def submit_job(fn, *args, **initial):
+    """
+    Ставить fn(*args) у пул і одразу повертає job_id.
+
+    fn виконується в контексті застосунку і повертає dict, який додається до
+    стану задачі; initial — поля стану, відомі наперед (напр. thread_id).
+    """
+    global _executor, _pending
+
+    config = current_app.config
+    if not config.get('OPENAI_API_KEY'):
+        # Без ключа — помилка одразу, а не в задачі (SDK тут не імпортується)
+        raise OpenAIUnavailable('OpenAI API key not configured')
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.get('OPENAI_POOL_WORKERS', 4),
+                thread_name_prefix='openai',
+            )
+            _pending = threading.BoundedSemaphore(config.get('OPENAI_MAX_PENDING', 32))
+    if not _pending.acquire(blocking=False):
+        raise OpenAIBusy('Too many pending assistant requests')
+
+    job_id = uuid.uuid4().hex
+    state = {**initial, 'status': 'processing', 'job_id': job_id}
+    try:
+        cache.set(_job_key(job_id), state, timeout=JOB_TTL)
+        app = current_app._get_current_object()
+        _executor.submit(_run_job, app, job_id, state, fn, args)
+    except Exception:
+        _pending.release()
+        raise
+    return job_id
+
+
+def _run_job(app, job_id, state, fn, args):
+    try:
+        with app.app_context():
+            try:
+                state = {**state, **fn(*args), 'status': 'done'}
+            except Exception as e:
+                logger.warning(f"Задача OpenAI {job_id} не вдалася: {e}")
+                state = {**state, 'status': 'error', 'error': str(e)}
+            cache.set(_job_key(job_id), state, timeout=JOB_TTL)
+    finally:
+        _pending.release()
+
+
+def acquire_slot(name):
+    """
+    Займає один із OPENAI_SYNC_CONCURRENCY слотів name або кидає OpenAIBusy.
+    Повертає функцію, що звільняє слот (напр. для response.call_on_close).
+    """
+    with _lock:
+        slots = _slots.get(name)
+        if slots is None:
+            slots = _slots[name] = threading.BoundedSemaphore(
+                current_app.config.get('OPENAI_SYNC_CONCURRENCY', 2))
+    if not slots.acquire(blocking=False):
+        raise OpenAIBusy(f"Too many concurrent {name} requests")
+    return slots.release
+
+
+@contextmanager
+def upstream_slot(name):
+    """Слот acquire_slot(name) на час блоку with"""
+    release = acquire_slot(name)
+    try:
+        yield
+    finally:
+        release()
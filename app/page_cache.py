@@ -0,0 +1,92 @@
+"""
+Кэш целых страниц с учётом языка и роли посетителя.
+
+Ключ страницы состоит из endpoint, пути, query-параметров, которые читает
+view (query_args; с любыми другими параметрами страница не кэшируется, чтобы
+?x=<случайное> не плодило записи), языка
+(app.babel.get_locale и выбранного в сессии), класса пользователя
+(anonymous/member/founder/admin) и версий тегов из app.cache — поэтому
+одну и ту же страницу разные посетители получают в своём варианте,
+а правка данных сбрасывает только зависящие от них страницы.
+
+Ответ получает ETag, и повторный запрос с If-None-Match отдаёт 304
+без рендеринга шаблона и без передачи тела.
+"""
+import functools
+import hashlib
+
+from flask import Response, current_app, request, session
+from flask_login import current_user
+
+from app.babel import get_locale
+from app.cache import cache, tagged_key
+from app.metrics import observe_cache
+
+
+def auth_class():
+    """Класс посетителя для ключа кэша: от него зависит меню в base.html"""
+    if not current_user.is_authenticated:
+        return 'anonymous'
+    if current_user.is_admin:
+        return 'admin-founder' if current_user.is_founder else 'admin'
+    if current_user.is_founder:
+        return 'founder'
+    return 'member'
+
+
+def page_variant():
+    """Всё, от чего зависит HTML страницы помимо данных в БД"""
+    # base.html и get_translated_content смотрят на язык из сессии,
+    # а переводы Babel — на get_locale() (может прийти из Accept-Language)
+    return f"{get_locale()}:{session.get('language', '-')}:{auth_class()}"
+
+
+def cached_page(*tags, timeout=None, anonymous_timeout=None, query_args=()):
+    """
+    Декоратор view: кэширует готовый HTML в общем кэше.
+
+    Args:
+        tags: теги данных, от которых зависит страница ('blocks', 'settings', ...)
+        query_args: query-параметры, которые читает view и которые входят в ключ
+        timeout: TTL для авторизованных пользователей (PAGE_CACHE_TIMEOUT)
+        anonymous_timeout: TTL для анонимных посетителей (PAGE_CACHE_ANONYMOUS_TIMEOUT)
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # Flash-сообщения выводятся один раз конкретному пользователю — такие
+            # страницы не кэшируем и не отдаём из кэша
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+            # Лишние параметры view не читает, но ключ от них зависел бы
+            if any(name not in query_args for name in request.args):
+                return view(*args, **kwargs)
+
+            variant = page_variant()
+            query = '&'.join(f"{name}={value}" for name in query_args
+                             for value in request.args.getlist(name))
+            key = tagged_key(f"page:{request.endpoint}:{request.path}?{query}:{variant}", tags)
+            hit = cache.get(key)
+            observe_cache('page', hit is not None)
+            if hit is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                body = response.get_data()
+                hit = (body, response.mimetype, hashlib.sha1(body).hexdigest())
+                if variant.endswith(':anonymous'):
+                    ttl = anonymous_timeout or current_app.config.get('PAGE_CACHE_ANONYMOUS_TIMEOUT', 3600)
+                else:
+                    ttl = timeout or current_app.config.get('PAGE_CACHE_TIMEOUT', 300)
+                cache.set(key, hit, timeout=ttl)
+
+            body, mimetype, etag = hit
+            response = Response(body, mimetype=mimetype)
+            response.set_etag(etag)
+            # Страница зависит от cookie сессии, поэтому общие прокси её не хранят,
+            # а браузер каждый раз перепроверяет по ETag
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.update(('Cookie', 'Accept-Language'))
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
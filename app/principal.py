@@ -0,0 +1,91 @@
+"""
+Поточний користувач (principal): один запит до БД на запит, а не на кожну перевірку.
+
+  * load_principal(user_id) — User у сесії SQLAlchemy; в межах запиту
+    запам'ятовується в g, тож user_loader Flask-Login, admin_required і
+    founder_required отримують той самий об'єкт;
+  * між запитами колонки користувача (без password_hash) живуть у спільному
+    кеші PRINCIPAL_CACHE_TTL секунд. Ключ містить версію тегу
+    'principal:<id>', яку User.cache_tags() змінює після commit будь-якої
+    зміни користувача (роль, блокування) — відкликання прав діє одразу.
+    Якщо тегу в кеші немає (витіснений), знімку не довіряємо і читаємо БД;
+  * із кешу об'єкт повертається в сесію через merge(load=False) — без
+    SELECT, а User.query.get(id) далі в запиті бере його з identity map;
+  * session_principal() — користувач із session['user_id'] (декоратори).
+"""
+from flask import current_app, g, has_request_context, session
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app import db
+from app.cache import cache, read_tag_versions
+from app.metrics import observe_cache
+
+# Не кладемо в спільний кеш: довантажиться з БД, якщо знадобиться
+_PRIVATE_COLUMNS = {'password_hash'}
+
+
+def principal_tag(user_id):
+    return f'principal:{user_id}'
+
+
+def _request_memo():
+    return g.setdefault('principals', {}) if has_request_context() else {}
+
+
+def _snapshot(user):
+    """Колонки користувача для кешу (звичайний dict, не pickled-об'єкт ORM)"""
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(user).mapper.column_attrs
+        if attr.key not in _PRIVATE_COLUMNS
+    }
+
+
+def _restore(values):
+    from app.models.user import User
+
+    user = User(**values)
+    make_transient_to_detached(user)  # password_hash лишається незавантаженим
+    return db.session.merge(user, load=False)
+
+
+def load_principal(user_id):
+    """User за id (або None) — щонайбільше один SELECT за запит"""
+    from app.models.user import User
+
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    memo = _request_memo()
+    if user_id in memo:
+        return memo[user_id]
+
+    ttl = current_app.config.get('PRINCIPAL_CACHE_TTL', 0)
+    user = None
+    if ttl:
+        (version,), tag_present = read_tag_versions([principal_tag(user_id)])
+        key = f"principal:{user_id}|{version}"
+        # Без тегу знімок міг пережити зміну ролі — лише свіжий SELECT
+        values = cache.get(key) if tag_present else None
+        if values is not None and values.get('_version') != version:
+            values = None
+        observe_cache('principal', values is not None)
+        if values is not None:
+            user = _restore({k: v for k, v in values.items() if k != '_version'})
+        else:
+            user = db.session.get(User, user_id)
+            if user is not None:
+                cache.set(key, dict(_snapshot(user), _version=version), timeout=ttl)
+    else:
+        user = db.session.get(User, user_id)
+
+    memo[user_id] = user
+    return user
+
+
+def session_principal():
+    """Користувач із session['user_id'] або None"""
+    user_id = session.get('user_id')
+    return load_principal(user_id) if user_id else None
@@ -2,12 +2,14 @@
 Модуль для автоматической генерации протоколов заседаний
 с использованием OpenAI API и fpdf2
 """
-import os
 from datetime import datetime
+from flask import current_app
 from fpdf import FPDF
-import openai
-from app.models.meeting import Meeting, Message, AgendaItem, MeetingVote, VoteType
+from app.models.meeting import Meeting, Message, AgendaItem
 from app.models.user import User
+from app.cache import get_meeting_tallies
+from app.dto import VoteTally
+from app.openai_client import get_client
 
 
 class ProtocolPDF(FPDF):
@@ -32,12 +34,13 @@ class ProtocolPDF(FPDF):
         self.cell(0, 10, f'Seite {self.page_no()}', 0, 0, 'C')
 
 
-def generate_protocol_text(meeting_id):
+def generate_protocol_text(meeting_id, timeout=None):
     """
     Генерирует текст протокола с помощью OpenAI API
     
     Args:
         meeting_id: ID заседания
+        timeout: тайм-аут запроса к OpenAI, с (по умолчанию OPENAI_TIMEOUT)
         
     Returns:
         str: Сгенерированный текст протокола на немецком языке
@@ -46,11 +49,28 @@ def generate_protocol_text(meeting_id):
     if not meeting:
         raise ValueError(f"Meeting {meeting_id} not found")
     
-    # Получаем OpenAI API ключ
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
+    # Проверяем OpenAI API ключ до сбора данных
+    if not current_app.config.get('OPENAI_API_KEY'):
         raise ValueError("OPENAI_API_KEY not found in environment")
     
+    return complete_protocol(build_protocol_prompt(meeting_id), timeout=timeout)
+
+
+def build_protocol_prompt(meeting_id):
+    """
+    Собирает из БД данные заседания (участники, чат, голосования)
+    в запрос к OpenAI
+    
+    Args:
+        meeting_id: ID заседания
+        
+    Returns:
+        str: Текст запроса на немецком языке
+    """
+    meeting = Meeting.query.get(meeting_id)
+    if not meeting:
+        raise ValueError(f"Meeting {meeting_id} not found")
+    
     # Собираем участников
     attendees = meeting.attendees.all()
     attendees_list = []
@@ -70,20 +90,19 @@ def generate_protocol_text(meeting_id):
     
     # Собираем результаты голосований
     agenda_items = AgendaItem.query.filter_by(meeting_id=meeting_id).order_by(AgendaItem.order).all()
+    # Все подсчёты одним GROUP BY, а не запрос голосов на каждый пункт
+    tallies = get_meeting_tallies(meeting_id)
     voting_results = []
     for item in agenda_items:
-        votes = MeetingVote.query.filter_by(agenda_item_id=item.id).all()
-        yes_count = sum(1 for v in votes if v.vote == VoteType.yes)
-        no_count = sum(1 for v in votes if v.vote == VoteType.no)
-        abstain_count = sum(1 for v in votes if v.vote == VoteType.abstain)
+        tally = tallies.get(item.id, VoteTally())
         
         voting_results.append({
             'title': item.title,
             'description': item.description or '',
-            'yes': yes_count,
-            'no': no_count,
-            'abstain': abstain_count,
-            'result': item.result
+            'yes': tally.yes,
+            'no': tally.no,
+            'abstain': tally.abstain,
+            'result': tally.result
         })
     
     # Формируем контекст для OpenAI
@@ -133,10 +152,25 @@ Das Protokoll sollte folgende Struktur haben:
 
 Das Protokoll sollte sachlich, präzise und formal sein.
 """
+    return context
+
+
+def complete_protocol(context, timeout=None):
+    """
+    Отправляет запрос в OpenAI; к БД не обращается
     
-    # Отправляем запрос в OpenAI
+    Args:
+        context: запрос (build_protocol_prompt)
+        timeout: тайм-аут запроса к OpenAI, с (по умолчанию OPENAI_TIMEOUT)
+        
+    Returns:
+        str: Сгенерированный текст протокола
+    """
     try:
-        client = openai.OpenAI(api_key=api_key)
+        # Общий клиент (OPENAI_BASE_URL, таймаут); SDK импортируется при первом вызове
+        client = get_client()
+        if timeout:
+            client = client.with_options(timeout=timeout)
         response = client.chat.completions.create(
             model="gpt-4",
             messages=[
@@ -201,8 +235,8 @@ def create_pdf_protocol(meeting_id, protocol_text):
         else:
             pdf.multi_cell(0, 6, line)
     
-    # Возвращаем PDF как байты
-    return pdf.output(dest='S').encode('latin-1')
+    # Возвращаем PDF как байты (fpdf2 отдаёт bytearray, а не str)
+    return bytes(pdf.output())
 
 
 def generate_and_save_protocol(meeting_id):
@@ -230,3 +264,75 @@ def generate_and_save_protocol(meeting_id):
     filename = f"protokoll_{meeting_id}_{date_str}.pdf"
     
     return pdf_bytes, filename
+
+
+def protocol_job(job, args):
+    """
+    Фоновая задача 'protocol' (app.jobs, процесс `flask jobs work`):
+    текст через OpenAI, PDF и документ заседания в blob store
+    
+    Args:
+        job: задача (app.models.job.Job)
+        args: {'meeting_id': ID заседания}
+        
+    Returns:
+        dict: {'document_id': ..., 'url': ...}
+    """
+    from flask import url_for
+    from app import db
+    from app.blob_store import get_blob_store
+    from app.events import publish
+    from app.jobs import JobFailed, set_progress
+    from app.models.meeting_document import MeetingDocument
+    
+    meeting_id = args['meeting_id']
+    meeting = Meeting.query.get(meeting_id)
+    if not meeting:
+        raise JobFailed(f"Meeting {meeting_id} not found")
+    if not current_app.config.get('OPENAI_API_KEY'):
+        raise JobFailed("OPENAI_API_KEY not found in environment")
+    
+    context = build_protocol_prompt(meeting_id)
+    # Завершаем читающую транзакцию: на время ответа OpenAI (до
+    # PROTOCOL_OPENAI_TIMEOUT) соединение возвращается в пул, а не висит
+    # "idle in transaction"
+    db.session.commit()
+    
+    set_progress(job, 10, 'Generating protocol text')
+    protocol_text = complete_protocol(context, timeout=current_app.config.get('PROTOCOL_OPENAI_TIMEOUT'))
+    
+    set_progress(job, 70, 'Rendering PDF')
+    pdf_bytes = create_pdf_protocol(meeting_id, protocol_text)
+    
+    set_progress(job, 90, 'Saving document')
+    author = User.query.get(job.created_by) if job.created_by else None
+    document = MeetingDocument(
+        meeting_id=meeting_id,
+        name=f"Protokoll {meeting.date.strftime('%d.%m.%Y')}",
+        description='Automatisch erstelltes Protokoll',
+        file_hash=get_blob_store().put(pdf_bytes),
+        file_mimetype='application/pdf',
+        file_size=len(pdf_bytes),
+        uploaded_by=author.id if author else meeting.creator_id,
+        is_public=False
+    )
+    # Локальное хранилище отдельного сервиса-воркера веб-воркеры не видят,
+    # поэтому содержимое остаётся и в file_data (download_document отдаёт его сам)
+    if current_app.config.get('BLOB_STORE_BACKEND', 'local') == 'local':
+        document.file_data = pdf_bytes
+    db.session.add(document)
+    db.session.flush()
+    
+    # url_for вне HTTP-запроса
+    with current_app.test_request_context():
+        url = url_for('meeting_document.download_document', document_id=document.id)
+    meeting.protocol_url = url
+    
+    publish(meeting_id, 'new_document', {
+        'id': document.id,
+        'name': document.name,
+        'is_public': document.is_public,
+        'uploaded_by': author.full_name if author else '',
+        'url': url
+    }, founders_only=True)
+    return {'document_id': document.id, 'url': url}
@@ -0,0 +1,176 @@
+"""
+Статистика SQL-запитів на кожен HTTP-запит.
+
+Слухачі before/after_cursor_execute на db.engine рахують кількість запитів,
+сумарний час у БД і найповільніші запити. Після запиту:
+  * заголовок Server-Timing (видно у вкладці Network браузера);
+  * рядок логу key=value у логері app.sql — INFO, якщо перевищено
+    SQL_QUERY_BUDGET або один і той самий запит повторився
+    SQL_N_PLUS_ONE_THRESHOLD разів (типовий N+1), інакше DEBUG.
+
+Для тестів є assert_max_queries():
+
+    with assert_max_queries(8, n_plus_one=3):
+        client.get('/meetings/1')
+"""
+import heapq
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Flask, current_app, g, has_app_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('app.sql')
+
+SLOWEST_KEPT = 3
+
+
+class QueryStats:
+    """Статистика SQL одного запиту (або блоку assert_max_queries)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0  # секунди
+        self.slowest = []  # мін-купа (тривалість, запит), не більше SLOWEST_KEPT
+        self.statements = Counter()
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.statements[statement] += 1
+        item = (elapsed, statement)
+        if len(self.slowest) < SLOWEST_KEPT:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    @property
+    def total_ms(self):
+        return self.total * 1000
+
+    def most_repeated(self):
+        """(запит, кількість) найчастішого запиту або (None, 0)"""
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+    def slowest_first(self):
+        return sorted(self.slowest, reverse=True)
+
+
+def _shorten(statement, limit=200):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def _collectors():
+    """Куди записувати: статистика запиту плюс активні assert_max_queries"""
+    if not has_app_context():
+        return ()
+    collectors = list(g.get('sql_collectors', ()))
+    stats = g.get('query_stats')
+    if stats is not None:
+        collectors.append(stats)
+    return collectors
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Час початку — на контексті виконання, а не в стеку на з'єднанні:
+    # after_cursor_execute не викликається для запитів з помилкою
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    for stats in _collectors():
+        stats.record(statement, elapsed)
+
+
+def _start_request():
+    g.query_stats = QueryStats()
+
+
+def _finish_request(response):
+    stats = g.pop('query_stats', None)
+    if stats is None:
+        return response
+    config = current_app.config
+
+    if config.get('SQL_SERVER_TIMING', True):
+        timing = f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"'
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = f"{existing}, {timing}" if existing else timing
+
+    statement, repeats = stats.most_repeated()
+    budget = config.get('SQL_QUERY_BUDGET', 30)
+    threshold = config.get('SQL_N_PLUS_ONE_THRESHOLD', 10)
+    suspicious = stats.count > budget or repeats >= threshold
+    level = logging.INFO if suspicious else logging.DEBUG
+    if logger.isEnabledFor(level):
+        slowest = stats.slowest_first()
+        fields = [
+            f"endpoint={request.endpoint}",
+            f"method={request.method}",
+            f"path={request.path}",
+            f"status={response.status_code}",
+            f"queries={stats.count}",
+            f"sql_ms={stats.total_ms:.1f}",
+            f"slowest_ms={slowest[0][0] * 1000:.1f}" if slowest else "slowest_ms=0",
+            f"max_repeats={repeats}",
+        ]
+        if repeats >= threshold:
+            fields.append(f"repeated_sql=\"{_shorten(statement)}\"")
+        if stats.count > budget and slowest:
+            fields.append(f"slowest_sql=\"{_shorten(slowest[0][1])}\"")
+        logger.log(level, 'sql_stats ' + ' '.join(fields))
+    return response
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Блок assert_max_queries виконав забагато запитів"""
+
+
+@contextmanager
+def assert_max_queries(limit, n_plus_one=None):
+    """
+    Перевіряє, що блок виконує не більше limit SQL-запитів, а жоден
+    однаковий запит не повторюється n_plus_one або більше разів.
+
+    Працює і з test_client(): запити маршрутів теж зараховуються,
+    якщо контекст застосунку відкритий навколо блоку.
+    """
+    stats = QueryStats()
+    collectors = g.setdefault('sql_collectors', [])
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+
+    problems = []
+    if stats.count > limit:
+        problems.append(f"{stats.count} queries (limit {limit})")
+    statement, repeats = stats.most_repeated()
+    if n_plus_one is not None and repeats >= n_plus_one:
+        problems.append(f"N+1: executed {repeats} times: {_shorten(statement)}")
+    if problems:
+        raise QueryBudgetExceeded('; '.join(problems))
+
+
+def init_query_stats(app: Flask):
+    """Підключає лічильник SQL до db.engine і хуки запиту"""
+    from app import db
+
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
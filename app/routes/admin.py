@@ -6,7 +6,9 @@ from app.models.gallery_image import GalleryImage
 from app.models.project import Project
 from app.models.settings import Settings
 from app.models.report import Report
-from app.cache import cache
+from app.blob_store import db_copy, send_model_image
+from app.image_pipeline import ingest_image
+from app.principal import session_principal
 from functools import wraps
 import io
 import traceback
@@ -16,8 +18,7 @@ admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_id = session.get('user_id')
-        user = User.query.get(user_id) if user_id else None
+        user = session_principal()
         if not user or not user.is_admin:
             flash('Доступ лише для адміністратора!', 'danger')
             return redirect(url_for('main.login'))
@@ -34,11 +35,9 @@ def dashboard():
     # Try to load projects with detailed error handling
     projects = []
     try:
-        # Force schema refresh by checking table first
-        from sqlalchemy import inspect
-        inspector = inspect(db.engine)
-        columns = inspector.get_columns('projects', schema='brama')
-        current_app.logger.info(f"Projects table has {len(columns)} columns")
+        # Columns are reflected once per Alembic revision (app.schema_info)
+        from app.schema_info import table_columns
+        current_app.logger.info(f"Projects table has {len(table_columns('projects'))} columns")
         
         # Now try to load projects
         projects = Project.query.order_by(Project.created_at.desc()).limit(50).all()
@@ -82,44 +81,13 @@ def create_block():
         type_ = request.form['type']
         image_url = request.form.get('image_url')
         
-        # Обработка загруженного файла
+        # Обработка загруженного файла — сохраняем в хранилище файлов (копия в БД — см. db_copy)
         image_file = request.files.get('image_file')
-        image_data = None
+        image_hash = None
         image_mimetype = None
         
         if image_file and image_file.filename:
-            # Читаем файл целиком в память для сохранения в базе данных
-            image_data = image_file.read()
-            image_mimetype = image_file.mimetype
-            
-            # Можем опционально сохранить и URL, если нужна совместимость
-            try:
-                # Генерируем уникальное имя файла
-                import os
-                from werkzeug.utils import secure_filename
-                from datetime import datetime
-                
-                # Создаем директорию для загрузок, если она не существует
-                upload_dir = os.path.join(os.getcwd(), 'app', 'static', 'uploads')
-                if not os.path.exists(upload_dir):
-                    os.makedirs(upload_dir)
-                
-                # Создаем уникальное имя файла
-                filename = secure_filename(image_file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                unique_filename = f"{timestamp}_{filename}"
-                file_path = os.path.join(upload_dir, unique_filename)
-                
-                # Сохраняем файл и с диска тоже (для совместимости)
-                with open(file_path, 'wb') as f:
-                    f.write(image_data)
-                
-                # Устанавливаем URL для сохранения в БД
-                image_url = url_for('static', filename=f'uploads/{unique_filename}')
-            except Exception as e:
-                # В случае ошибки сохранения файла на диск,
-                # продолжаем работу, так как изображение уже есть в памяти
-                print(f"Warning: Could not save image to disk: {e}")
+            image_hash, image_mimetype = ingest_image(image_file)
         
         # Создаем блок только с существующими полями
         block = Block(
@@ -127,15 +95,13 @@ def create_block():
             content=content, 
             type=type_, 
             image_url=image_url,
-            image_data=image_data,
+            image_hash=image_hash,
+            image_data=db_copy(image_hash),
             image_mimetype=image_mimetype
         )
         db.session.add(block)
         db.session.commit()
         
-        # Очищаем кеш для обновления контента на главной странице
-        cache.clear()
-        
         flash('Блок створено!', 'success')
         return redirect(url_for('admin.dashboard'))
     return render_template('admin/edit_block.html', block=None)
@@ -152,60 +118,33 @@ def edit_block(block_id):
         # Сначала проверяем загруженный файл
         image_file = request.files.get('image_file')
         if image_file and image_file.filename:
-            # Читаем файл целиком в память для сохранения в базе данных
-            image_data = image_file.read()
-            block.image_data = image_data
-            block.image_mimetype = image_file.mimetype
-            
-            # Также сохраняем на диск для совместимости
-            try:
-                # Генерируем уникальное имя файла
-                import os
-                from werkzeug.utils import secure_filename
-                from datetime import datetime
-                
-                # Создаем директорию для загрузок, если она не существует
-                upload_dir = os.path.join(os.getcwd(), 'app', 'static', 'uploads')
-                if not os.path.exists(upload_dir):
-                    os.makedirs(upload_dir)
-                
-                # Создаем уникальное имя файла
-                filename = secure_filename(image_file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                unique_filename = f"{timestamp}_{filename}"
-                file_path = os.path.join(upload_dir, unique_filename)
-                
-                # Сохраняем файл
-                with open(file_path, 'wb') as f:
-                    f.write(image_data)
-                
-                # Устанавливаем URL для сохранения в БД (для совместимости)
-                block.image_url = url_for('static', filename=f'uploads/{unique_filename}')
-            except Exception as e:
-                # В случае ошибки сохранения файла на диск,
-                # продолжаем работу, так как изображение уже есть в памяти
-                print(f"Warning: Could not save image to disk: {e}")
+            # Сохраняем файл в хранилище; копия в БД — пока хранилище не долговечное
+            image_hash, image_mimetype = ingest_image(image_file)
+            if image_hash:
+                block.image_hash = image_hash
+                block.image_mimetype = image_mimetype
+                block.image_data = db_copy(image_hash)
+                block.image_url = None
         elif request.form.get('remove_image') == '1':
             # Если пользователь хочет удалить изображение
             block.image_url = None
             block.image_data = None
+            block.image_hash = None
             block.image_mimetype = None
             flash('Зображення видалено!', 'success')
         else:
             # Если файл не загружен, используем URL из формы
-            url = request.form.get('image_url')
+            url = request.form.get('image_url') or None
             if url != block.image_url:  # Если URL изменился
                 block.image_url = url
-                # Если URL изменился и изображение сохранено в БД, очистим его
-                if block.image_data:
-                    block.image_data = None
-                    block.image_mimetype = None
+                # Если URL изменился, сохраненное изображение больше не используется
+                # (в том числе старый BLOB без хеша)
+                block.image_hash = None
+                block.image_data = None
+                block.image_mimetype = None
                 
         db.session.commit()
         
-        # Очищаем кеш для обновления контента на главной странице
-        cache.clear()
-        
         flash('Блок оновлено!', 'success')
         return redirect(url_for('admin.dashboard'))
     return render_template('admin/edit_block.html', block=block)
@@ -217,9 +156,6 @@ def delete_block(block_id):
     db.session.delete(block)
     db.session.commit()
     
-    # Очищаем кеш для обновления контента на главной странице
-    cache.clear()
-    
     flash('Блок видалено!', 'success')
     return redirect(url_for('admin.dashboard'))
 
@@ -240,15 +176,16 @@ def add_gallery_image():
             added_images = 0
             for idx, file in enumerate(files):
                 if file and file.filename:
-                    # Читаем файл целиком в память
-                    file_data = file.read()
-                    if not file_data:
+                    # Сохраняем файл в хранилище (и копию в БД, пока хранилище не долговечное)
+                    image_hash, image_mimetype = ingest_image(file)
+                    if not image_hash:
                         continue
                     
                     # Создаем запись в базе данных
                     img = GalleryImage(
-                        image_data=file_data,
-                        image_mimetype=file.mimetype,
+                        image_hash=image_hash,
+                        image_data=db_copy(image_hash),
+                        image_mimetype=image_mimetype,
                         description=descriptions[idx] if idx < len(descriptions) else '',
                         block_id=block_id
                     )
@@ -269,25 +206,9 @@ def add_gallery_image():
     return render_template('admin/add_gallery_image.html', blocks=blocks)
 
 @admin_bp.route('/gallery/image/<int:image_id>')
-@cache.cached(timeout=86400)  # Кэш на 24 часа для изображений галереи
 def gallery_image_file(image_id):
     try:
-        img = GalleryImage.query.get_or_404(image_id)
-        if img.image_data:
-            response = send_file(
-                io.BytesIO(img.image_data), 
-                mimetype=img.image_mimetype
-            )
-            # Устанавливаем заголовок кэширования вручную с длительным сроком
-            response.headers['Cache-Control'] = 'public, max-age=31536000'
-            # Добавляем ETag для проверки изменений
-            response.add_etag()
-            return response
-        elif img.image_url:
-            return redirect(img.image_url)
-        else:
-            print(f"Error: Gallery image {image_id} has no data or URL")
-            return '', 404
+        return send_model_image(GalleryImage, image_id)
     except Exception as e:
         print(f"Error serving gallery image {image_id}: {str(e)}")
         return '', 500
@@ -308,11 +229,6 @@ def approve_project(project_id):
     project.status = 'approved'
     db.session.commit()
     
-    # Clear cache so approved project appears on homepage immediately
-    from app.cache import get_approved_projects
-    cache.delete_memoized(get_approved_projects, project.block_id)
-    cache.delete('view//')  # Clear cached homepage view
-    
     flash('Проєкт підтверджено!', 'success')
     return redirect(url_for('admin.dashboard'))
 
@@ -323,11 +239,6 @@ def reject_project(project_id):
     project.status = 'rejected'
     db.session.commit()
     
-    # Clear cache in case project was previously approved
-    from app.cache import get_approved_projects
-    cache.delete_memoized(get_approved_projects, project.block_id)
-    cache.delete('view//')  # Clear cached homepage view
-    
     flash('Проєкт відхилено.', 'info')
     return redirect(url_for('admin.dashboard'))
 
@@ -445,6 +356,8 @@ def manage_founders():
             user.role = 'member'
             flash(f'{user.email} видалено з засновників!', 'success')
         
+        # The commit bumps the principal version of the user (User.cache_tags),
+        # so cached copies in app.principal stop granting the old role at once
         db.session.commit()
         return redirect(url_for('admin.manage_founders'))
     
@@ -1,16 +1,20 @@
-from flask import Blueprint, request, jsonify, send_file, after_this_request
+from flask import Blueprint, Response, request, jsonify, send_file, after_this_request, stream_with_context
+import hashlib
 import os
 import time
-from openai import OpenAI
-import openai
 from werkzeug.utils import secure_filename
 import io
 import tempfile
 
+from app.cache import cache
+from app.events import format_sse
+from app.openai_client import (
+    OpenAIBusy, OpenAIUnavailable, acquire_slot, get_client, get_job, submit_job, upstream_slot
+)
+
 api_bp = Blueprint('api', __name__)
 
-# Get API key and Assistant ID from environment
-api_key = os.getenv('OPENAI_API_KEY')
+# Get Assistant ID from environment
 ASSISTANT_ID = os.getenv('OPENAI_ASSISTANT_ID')
 
 # Явно задаем ID ассистента, если его нет в переменных окружения
@@ -19,93 +23,102 @@ if not ASSISTANT_ID:
     print(f"[assistant] Використовую хардкодний ASSISTANT_ID: {ASSISTANT_ID}")
 
 # Вывод в лог текущих значений
-print(f"[assistant] API ключ: {'Присутній' if api_key else 'Відсутній'}")
+print(f"[assistant] API ключ: {'Присутній' if os.getenv('OPENAI_API_KEY') else 'Відсутній'}")
 print(f"[assistant] ID асистента: {ASSISTANT_ID}")
 
-# Create a client instance (в локальном режиме используем заглушку)
-openai.api_key = api_key
+# Скільки фонова задача асистента чекає на завершення run і як часто перевіряє.
+# Чекає потік пулу app.openai_client, а не потік воркера
+MAX_WAIT_SECONDS = float(os.getenv('ASSISTANT_MAX_WAIT_SECONDS', '60'))
+POLL_INTERVAL_SEC = float(os.getenv('ASSISTANT_POLL_INTERVAL_SEC', '1.0'))
+
+# Озвучений текст кешується: віджет часто озвучує ту саму відповідь повторно
+TTS_CACHE_TIMEOUT = 24 * 3600
+TTS_CACHE_MAX_BYTES = 2 * 1024 * 1024
+
+
+def _busy_response(error):
+    response = jsonify({'error': str(error), 'success': False})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+
+def _extract_answer(msgs):
+    """Текст останньої відповіді асистента або None, якщо остання репліка — користувача"""
+    for message in msgs.data:  # від нових до старих
+        if message.role != 'assistant':
+            return None
+        parts = [part.text.value for part in message.content if getattr(part, 'type', None) == 'text']
+        if parts:
+            return '\n'.join(parts).strip() or None
+    return None
 
-# Only create the client if API key is available
-try:
-    client = OpenAI(api_key=api_key) if api_key else None
-except Exception as e:
-    print(f"Warning: Failed to initialize OpenAI client: {e}")
-    client = None
 
 @api_bp.route('/tts', methods=['GET'])
 def text_to_speech():
     text = request.args.get('text')
     if not text:
         return jsonify({'error': 'No text provided'}), 400
-    
-    if not client:
-        return jsonify({'error': 'OpenAI API key not configured'}), 503
-    
-    try:
-        # Create a temporary file to store the audio
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-        temp_file_path = temp_file.name
-        temp_file.close()
-        
-        # Use OpenAI TTS API to convert text to speech
-        response = client.audio.speech.create(
-            model="tts-1", # or "tts-1-hd" for higher quality
-            voice="alloy", # options: alloy, echo, fable, onyx, nova, and shimmer
-            input=text
-        )
-        
-        # Save the audio to the temporary file
-        response.stream_to_file(temp_file_path)
-        
-        # Instead of trying to delete after response, create a copy of the data
-        with open(temp_file_path, 'rb') as f:
-            audio_data = f.read()
-        
-        # Remove the file immediately after reading
+
+    cache_key = f"openai:tts:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+    audio_data = cache.get(cache_key)
+    if audio_data is None:
         try:
-            os.unlink(temp_file_path)
+            client = get_client()
+            # Не більше OPENAI_SYNC_CONCURRENCY потоків воркера чекають на TTS
+            with upstream_slot('tts'):
+                # Use OpenAI TTS API to convert text to speech
+                response = client.audio.speech.create(
+                    model="tts-1", # or "tts-1-hd" for higher quality
+                    voice="alloy", # options: alloy, echo, fable, onyx, nova, and shimmer
+                    input=text
+                )
+                audio_data = response.read()
+        except OpenAIUnavailable as e:
+            return jsonify({'error': str(e)}), 503
+        except OpenAIBusy as e:
+            return _busy_response(e)
         except Exception as e:
-            print(f"Error removing temporary file: {e}")
-        
-        # Return the data as a response from memory
-        return send_file(
-            io.BytesIO(audio_data),
-            mimetype="audio/mpeg",
-            as_attachment=False,
-            download_name="speech.mp3"
-        )
-        
-    except Exception as e:
-        print(f"TTS API Error: {str(e)}")
-        return jsonify({
-            'error': f"Failed to generate speech: {str(e)}",
-            'success': False
-        }), 500
+            print(f"TTS API Error: {str(e)}")
+            return jsonify({
+                'error': f"Failed to generate speech: {str(e)}",
+                'success': False
+            }), 500
+        if len(audio_data) <= TTS_CACHE_MAX_BYTES:
+            cache.set(cache_key, audio_data, timeout=TTS_CACHE_TIMEOUT)
+
+    # Return the data as a response from memory
+    return send_file(
+        io.BytesIO(audio_data),
+        mimetype="audio/mpeg",
+        as_attachment=False,
+        download_name="speech.mp3"
+    )
 
 @api_bp.route('/api/whisper', methods=['POST'])
 def transcribe_audio():
     if 'audio' not in request.files:
         return jsonify({'error': 'No audio file provided'}), 400
-        
+
     audio_file = request.files['audio']
-    
+
     # Validate file extension
     filename = audio_file.filename
     if not filename or '.' not in filename:
         return jsonify({'error': 'Invalid filename'}), 400
-    
+
     # Make sure extension is supported by OpenAI Whisper
     valid_extensions = ['flac', 'm4a', 'mp3', 'mp4', 'mpeg', 'mpga', 'oga', 'ogg', 'wav', 'webm']
     ext = filename.rsplit('.', 1)[1].lower()
-    
+
     if ext not in valid_extensions:
         ext = 'mp3'  # Default to mp3 if unsupported extension
-    
+
     # Save the received audio to a temporary file with correct extension
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f'.{ext}')
     audio_file.save(temp_file.name)
     temp_file.close()
-    
+
     try:
         # Check if file is too short (minimum 0.1 seconds)
         file_size = os.path.getsize(temp_file.name)
@@ -116,38 +129,82 @@ def transcribe_audio():
                 'warning': 'Audio too short to transcribe'
             })
 
-        # Open the file for reading before passing to the API
-        with open(temp_file.name, "rb") as audio_data:
-            # Use OpenAI Whisper API to transcribe the audio
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_data
-            )
-
-        # Cleanup temporary file
-        os.unlink(temp_file.name)
+        client = get_client()
+        # Не більше OPENAI_SYNC_CONCURRENCY потоків воркера чекають на Whisper
+        with upstream_slot('whisper'):
+            # Open the file for reading before passing to the API
+            with open(temp_file.name, "rb") as audio_data:
+                # Use OpenAI Whisper API to transcribe the audio
+                transcript = client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_data
+                )
 
         # Return transcription result
         return jsonify({
             'text': transcript.text,
             'success': True
         })
+    except OpenAIUnavailable as e:
+        return jsonify({'error': str(e), 'success': False}), 503
+    except OpenAIBusy as e:
+        return _busy_response(e)
     except Exception as e:
-        # Cleanup temporary file in case of error
-        if os.path.exists(temp_file.name):
-            os.unlink(temp_file.name)
-        
         print(f"Whisper API Error: {str(e)}")
         return jsonify({
             'error': f"Failed to transcribe audio: {str(e)}",
             'success': False
         }), 500
+    finally:
+        # Cleanup temporary file
+        if os.path.exists(temp_file.name):
+            os.unlink(temp_file.name)
+
+
+def _answer_question(user_message, thread_id):
+    """Фонова задача: додає питання в thread, запускає run і чекає на відповідь"""
+    client = get_client()
+
+    # 1) Гарантуємо thread
+    if thread_id:
+        client.beta.threads.retrieve(thread_id=thread_id)
+    else:
+        thread_id = client.beta.threads.create().id
+
+    # 2) Додаємо повідомлення
+    client.beta.threads.messages.create(
+        thread_id=thread_id,
+        role="user",
+        content=user_message
+    )
+
+    # 3) Запускаємо run
+    run = client.beta.threads.runs.create(
+        thread_id=thread_id,
+        assistant_id=ASSISTANT_ID
+    )
+
+    # 4) Чекаємо НЕ ДОВШЕ за MAX_WAIT_SECONDS
+    deadline = time.monotonic() + MAX_WAIT_SECONDS
+    while run.status not in ("completed", "requires_action", "failed", "cancelled", "expired"):
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Assistant did not answer in {MAX_WAIT_SECONDS:.0f} s")
+        time.sleep(POLL_INTERVAL_SEC)
+        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+
+    msgs = client.beta.threads.messages.list(thread_id=thread_id, limit=10)
+    answer = _extract_answer(msgs)
+    if not answer:
+        raise RuntimeError(f"Assistant run ended with status '{run.status}' and no answer")
+    return {'answer': answer, 'thread_id': thread_id}
+
 
 @api_bp.route('/api/assistant', methods=['POST'])
 def assistant_ask():
     """
     Приймає question і (опціонально) thread_id.
-    Повертає готову відповідь або статус 'processing' з thread_id для подальшого опитування.
+    Відповідь готує фонова задача; одразу повертається статус 'processing'
+    з job_id, за яким віджет опитує /api/assistant/status.
     """
     data = request.get_json(silent=True) or {}
     user_message = (data.get('question') or data.get('message') or '').strip()
@@ -157,68 +214,172 @@ def assistant_ask():
         return jsonify({'error': 'question is required'}), 400
 
     try:
-        client = _get_client()
+        job_id = submit_job(_answer_question, user_message, thread_id, thread_id=thread_id)
+    except OpenAIUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+    except OpenAIBusy as e:
+        return _busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # 1) Гарантуємо thread
-        if thread_id:
-            thread = client.beta.threads.retrieve(thread_id=thread_id)
-        else:
-            thread = client.beta.threads.create()
-            thread_id = thread.id
-
-        # 2) Додаємо повідомлення
-        client.beta.threads.messages.create(
-            thread_id=thread_id,
-            role="user",
-            content=user_message
-        )
-
-        # 3) Запускаємо run
-        run = client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=ASSISTANT_ID
-        )
-
-        # 4) Чекаємо НЕ ДОВШЕ за MAX_WAIT_SECONDS
-        waited = 0.0
-        answer = None
-        while waited < MAX_WAIT_SECONDS:
-            run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-            if run.status in ("completed", "requires_action", "failed", "cancelled", "expired"):
-                # спробуємо взяти відповідь
-                msgs = client.beta.threads.messages.list(thread_id=thread_id, limit=10)
-                answer = _extract_answer(msgs)
-                break
-            time.sleep(POLL_INTERVAL_SEC)
-            waited += POLL_INTERVAL_SEC
+    return jsonify({'status': 'processing', 'job_id': job_id, 'thread_id': thread_id}), 202
 
-        if answer:
-            return jsonify({'status': 'done', 'answer': answer, 'thread_id': thread_id})
 
-        # Якщо ще немає — повертаємо processing (фронт сам допитає status)
-        return jsonify({'status': 'processing', 'thread_id': thread_id})
+def _stream_answer(thread_id, stream):
+    """Перекладає події run.stream OpenAI у SSE-кадри віджета: token → done | error"""
+    parts = []
+    try:
+        with stream:
+            for event in stream:
+                if event.event == 'thread.message.delta':
+                    for part in event.data.delta.content or ():
+                        if part.type == 'text' and part.text and part.text.value:
+                            parts.append(part.text.value)
+                            yield format_sse('token', {'text': part.text.value})
+                elif event.event in ('thread.run.failed', 'thread.run.cancelled', 'thread.run.expired'):
+                    yield format_sse('error', {'error': f"Assistant run {event.data.status}"})
+                    return
+                elif event.event == 'error':
+                    yield format_sse('error', {'error': str(event.data)})
+                    return
+    except Exception as e:
+        yield format_sse('error', {'error': str(e)})
+        return
+    yield format_sse('done', {'answer': ''.join(parts).strip(), 'thread_id': thread_id})
+
+
+@api_bp.route('/api/assistant/stream', methods=['POST'])
+def assistant_stream():
+    """
+    Як /api/assistant, але відповідь надходить потоком text/event-stream:
+    thread {thread_id}, далі token {text} у міру генерації, наприкінці
+    done {answer, thread_id} або error {error}. Без опитування статусу.
+
+    Потік займає потік воркера, поки асистент пише, тому одночасних потоків
+    не більше OPENAI_SYNC_CONCURRENCY; понад це — 503, і віджет переходить
+    на фонову задачу (/api/assistant).
+    """
+    data = request.get_json(silent=True) or {}
+    user_message = (data.get('question') or data.get('message') or '').strip()
+    thread_id = data.get('thread_id')
+
+    if not user_message:
+        return jsonify({'error': 'question is required'}), 400
+
+    try:
+        release_slot = acquire_slot('assistant_stream')
+    except OpenAIBusy as e:
+        return _busy_response(e)
 
+    # 503 лише доки питання не додано в тред: віджет тоді повторює його
+    # через /api/assistant, а після messages.create повтор задублював би питання
+    try:
+        client = get_client()
+    except OpenAIUnavailable as e:
+        release_slot()
+        return jsonify({'error': str(e), 'thread_id': thread_id}), 503
+    try:
+        if thread_id:
+            client.beta.threads.retrieve(thread_id=thread_id)
+        else:
+            thread_id = client.beta.threads.create().id
+        client.beta.threads.messages.create(thread_id=thread_id, role="user", content=user_message)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        release_slot()
+        return jsonify({'error': str(e), 'thread_id': thread_id}), 500
+    try:
+        stream = client.beta.threads.runs.create(thread_id=thread_id, assistant_id=ASSISTANT_ID, stream=True)
+    except Exception as e:
+        # Питання вже в треді: 502 означає «не повторювати», thread_id — для продовження розмови
+        release_slot()
+        return jsonify({'error': str(e), 'thread_id': thread_id}), 502
+
+    def generate():
+        yield format_sse('thread', {'thread_id': thread_id})
+        yield from _stream_answer(thread_id, stream)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    # Слот звільняється і тоді, коли клієнт закрив з'єднання посеред відповіді
+    response.call_on_close(stream.close)
+    response.call_on_close(release_slot)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx/Render proxy: don't buffer the stream
+    return response
 
 
 @api_bp.route('/api/assistant/status', methods=['GET'])
 def assistant_status():
     """
-    GET /api/assistant/status?thread_id=...
-    Перевіряє, чи з'явилася відповідь у thread.
+    GET /api/assistant/status?job_id=...
+    Стан фонової задачі зі спільного кешу, без звернень до OpenAI.
+    Старий варіант ?thread_id=... перевіряє thread напряму.
     """
+    job_id = request.args.get('job_id', '').strip()
+    if job_id:
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'unknown or expired job_id'}), 404
+        if job['status'] == 'error':
+            return jsonify(job), 502
+        return jsonify(job)
+
     thread_id = request.args.get('thread_id', '').strip()
     if not thread_id:
-        return jsonify({'error': 'thread_id is required'}), 400
+        return jsonify({'error': 'job_id or thread_id is required'}), 400
 
     try:
-        client = _get_client()
-        msgs = client.beta.threads.messages.list(thread_id=thread_id, limit=10)
+        client = get_client()
+        with upstream_slot('assistant_status'):
+            msgs = client.beta.threads.messages.list(thread_id=thread_id, limit=10)
         answer = _extract_answer(msgs)
         if answer:
             return jsonify({'status': 'done', 'answer': answer, 'thread_id': thread_id})
         # ще обробляється
         return jsonify({'status': 'processing', 'thread_id': thread_id})
+    except OpenAIUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+    except OpenAIBusy as e:
+        return _busy_response(e)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+def _visible_job(job_id):
+    """
+    Фонова задача з БД (app.jobs), якщо поточний користувач може її бачити:
+    засновники й адміністратори — усі, решта — лише свої
+    """
+    from flask_login import current_user
+    from app.models.job import Job
+
+    if not current_user.is_authenticated:
+        return None, (jsonify({'error': 'login required'}), 401)
+    job = Job.query.get(job_id)
+    if job is None or not (current_user.is_founder or current_user.is_admin or job.created_by == current_user.id):
+        return None, (jsonify({'error': 'unknown job'}), 404)
+    return job, None
+
+
+@api_bp.route('/api/jobs/<int:job_id>', methods=['GET'])
+def job_status(job_id):
+    """GET /api/jobs/<id> — повний стан задачі, з результатом або помилкою"""
+    job, error = _visible_job(job_id)
+    if error:
+        return error
+    return jsonify(job.to_dict())
+
+
+@api_bp.route('/api/jobs/<int:job_id>/progress', methods=['GET'])
+def job_progress(job_id):
+    """GET /api/jobs/<id>/progress — лише поля для індикатора, для частого опитування"""
+    from app.jobs import run_inline
+
+    job, error = _visible_job(job_id)
+    if error:
+        return error
+    if job.status == job.QUEUED:
+        # Без окремого воркера (JOBS_INLINE) черга рушить, поки на неї чекають
+        run_inline()
+    response = jsonify({'id': job.id, 'status': job.status, 'progress': job.progress, 'message': job.message})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -1,14 +1,18 @@
 """
 Routes for meeting documents
 """
-from flask import Blueprint, render_template, redirect, url_for, request, flash, send_file, jsonify, abort
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, abort, Response, current_app
 from flask_login import login_required, current_user
 from app.models.meeting import Meeting
 from app.models.meeting_document import MeetingDocument
 from app.models.user import UserRole, User
 from app.routes.meeting import founder_required, admin_required
 from app import db  # REMOVED: socketio import (Socket.IO disabled)
-import io
+from app.blob_store import BlobTooLarge, db_copy, get_blob_store
+from app.events import publish
+from app.http_cache import content_disposition, not_modified, partial_response, requested_range, set_validators
+from sqlalchemy import func
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
 import os
 from flask_babel import _
 
@@ -49,6 +53,14 @@ def upload_document(meeting_id):
     meeting = Meeting.query.get_or_404(meeting_id)
     
     if request.method == 'POST':
+        max_size = current_app.config['DOCUMENT_MAX_SIZE']
+        
+        # Reject obviously oversized bodies before the form is parsed at all
+        # (the extra 64 KB leaves room for the other form fields)
+        if request.content_length and request.content_length > max_size + 64 * 1024:
+            flash(_('File too large. Maximum size is 10MB.'), 'error')
+            return render_template('meetings/upload_document.html', meeting=meeting)
+        
         try:
             name = request.form.get('name')
             description = request.form.get('description', '')
@@ -59,10 +71,12 @@ def upload_document(meeting_id):
                 flash(_('Please provide a name and select a file'), 'error')
                 return render_template('meetings/upload_document.html', meeting=meeting)
             
-            # Read file data and create document
-            file_data = file.read()
-            
-            if len(file_data) > 10 * 1024 * 1024:  # 10MB limit
+            # Stream the file into the blob store chunk by chunk, hashing and
+            # checking the size on the fly; the contents go to the DB as well
+            # only while the store is not durable (local ephemeral disk)
+            try:
+                file_hash, file_size = get_blob_store().put_stream(file.stream, max_size=max_size)
+            except BlobTooLarge:
                 flash(_('File too large. Maximum size is 10MB.'), 'error')
                 return render_template('meetings/upload_document.html', meeting=meeting)
             
@@ -70,19 +84,26 @@ def upload_document(meeting_id):
                 meeting_id=meeting_id,
                 name=name,
                 description=description,
-                file_data=file_data,
+                file_hash=file_hash,
+                file_data=db_copy(file_hash),
                 file_mimetype=file.mimetype,
-                file_size=len(file_data),
+                file_size=file_size,
                 uploaded_by=current_user.id,
                 is_public=is_public
             )
             
             db.session.add(document)
-            db.session.commit()
+            db.session.flush()
             
-            # Notify founders about the new document
-            # from app.websockets import notify_about_new_document  # DISABLED: Socket.IO removed
-            # notify_about_new_document(meeting_id, document)
+            # Notify meeting viewers about the new document (private ones only founders)
+            publish(meeting_id, 'new_document', {
+                'id': document.id,
+                'name': document.name,
+                'is_public': document.is_public,
+                'uploaded_by': current_user.full_name,
+                'url': url_for('meeting_document.download_document', document_id=document.id)
+            }, founders_only=not is_public)
+            db.session.commit()
             
             flash(_('Document uploaded successfully'), 'success')
             return redirect(url_for('meeting_document.list_documents', meeting_id=meeting_id))
@@ -94,44 +115,78 @@ def upload_document(meeting_id):
     
     return render_template('meetings/upload_document.html', meeting=meeting)
 
+# File extensions for the download name, by MIME type
+DOCUMENT_EXTENSIONS = {
+    'application/pdf': '.pdf',
+    'application/msword': '.doc',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '.docx',
+    'application/vnd.ms-excel': '.xls',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': '.xlsx',
+    'application/vnd.ms-powerpoint': '.ppt',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation': '.pptx',
+}
+
 # Download a document
 @document_bp.route('/meetings/documents/<int:document_id>')
 @login_required
 def download_document(document_id):
+    # file_data is deferred, so this loads metadata only
     document = MeetingDocument.query.get_or_404(document_id)
     
     # Check if user can access this document
     if not can_access_document(document):
         abort(403)  # Forbidden
     
-    # Create a file-like object from the binary data
-    file_data = io.BytesIO(document.file_data)
-    
-    # Try to determine a reasonable filename extension from MIME type
-    extension = ''
-    if document.file_mimetype == 'application/pdf':
-        extension = '.pdf'
-    elif document.file_mimetype == 'application/msword':
-        extension = '.doc'
-    elif document.file_mimetype == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-        extension = '.docx'
-    elif document.file_mimetype == 'application/vnd.ms-excel':
-        extension = '.xls'
-    elif document.file_mimetype == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet':
-        extension = '.xlsx'
-    elif document.file_mimetype == 'application/vnd.ms-powerpoint':
-        extension = '.ppt'
-    elif document.file_mimetype == 'application/vnd.openxmlformats-officedocument.presentationml.presentation':
-        extension = '.pptx'
-    
-    filename = f"{document.name}{extension}"
-    
-    return send_file(
-        file_data,
-        download_name=filename,
-        mimetype=document.file_mimetype,
-        as_attachment=True
-    )
+    store = get_blob_store()
+    
+    # Documents uploaded before the blob store existed are copied there
+    # (and get their hash) on first download
+    if not document.file_hash:
+        document.file_hash = store.put(document.file_data)
+        db.session.commit()
+    
+    etag = document.file_hash
+    last_modified = document.uploaded_at
+    
+    # 304 straight from the stored validators, without touching file contents
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+    
+    filename = f"{document.name}{DOCUMENT_EXTENSIONS.get(document.file_mimetype, '')}"
+    
+    if store.exists(etag):
+        # Streamed from the blob store; send_file handles Range/If-Range itself
+        response = store.send(etag, document.file_mimetype, max_age=0,
+                              download_name=filename, as_attachment=True,
+                              last_modified=last_modified)
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
+    
+    # Fallback for rows whose contents only exist in file_data
+    # Range request (resumed download): read only the requested slice in SQL
+    try:
+        byte_range = requested_range(document.file_size, etag, last_modified)
+    except RequestedRangeNotSatisfiable as e:
+        return e.get_response()
+    if byte_range is not None:
+        start, stop = byte_range
+        chunk = db.session.query(
+            func.substr(MeetingDocument.file_data, start + 1, stop - start)
+        ).filter(MeetingDocument.id == document_id).scalar()
+        if chunk is None:
+            return '', 404
+        return partial_response(chunk, start, stop, document.file_size,
+                                document.file_mimetype, etag, last_modified)
+    
+    if document.file_data is None:
+        print(f"Document {document_id} is missing from the blob store")
+        return '', 404
+    
+    response = Response(document.file_data, mimetype=document.file_mimetype)
+    response.headers['Content-Disposition'] = content_disposition(filename)
+    return set_validators(response, etag, last_modified)
 
 # Delete a document
 @document_bp.route('/meetings/documents/<int:document_id>/delete', methods=['POST'])
@@ -2,20 +2,21 @@ from flask import Blueprint, render_template, redirect, url_for, session, flash,
 from app import db
 from app.models.user import User, UserRole
 from app.models.meeting import Meeting, AgendaItem, MeetingAttendee, MeetingVote, Message, MeetingStatus, VoteType
+from app.routes.meeting import note_new_message, attendee_event, cast_vote
+from app.events import publish
+from app.principal import session_principal
 from functools import wraps
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
 import uuid
-from fpdf import FPDF
 
 founder_bp = Blueprint('founder', __name__, url_prefix='/founder')
 
 def founder_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_id = session.get('user_id')
-        user = User.query.get(user_id) if user_id else None
+        user = session_principal()
         if not user or not user.is_founder:
             flash('Доступ лише для засновників!', 'danger')
             return redirect(url_for('main.login'))
@@ -211,6 +212,7 @@ def start_meeting(meeting_id):
             joined_at=datetime.utcnow()
         )
         db.session.add(attendee)
+        publish(meeting_id, 'user_joined', attendee_event(User.query.get(current_user_id)))
     
     db.session.commit()
     flash('Зустріч розпочата!', 'success')
@@ -236,6 +238,7 @@ def join_meeting(meeting_id):
             joined_at=datetime.utcnow()
         )
         db.session.add(attendee)
+        publish(meeting_id, 'user_joined', attendee_event(User.query.get(current_user_id)))
         db.session.commit()
         flash('Ви приєдналися до зустрічі!', 'success')
     else:
@@ -254,6 +257,7 @@ def leave_meeting(meeting_id):
     
     if attendee:
         attendee.left_at = datetime.utcnow()
+        publish(meeting_id, 'user_left', attendee_event(User.query.get(current_user_id)))
         db.session.commit()
         flash('Ви вийшли із зустрічі!', 'success')
     
@@ -275,6 +279,7 @@ def end_meeting(meeting_id):
     for attendee in meeting.attendees:
         if not attendee.left_at:
             attendee.left_at = datetime.utcnow()
+            publish(meeting_id, 'user_left', attendee_event(attendee.user))
     
     # Generate protocol
     protocol_url = generate_protocol(meeting)
@@ -306,9 +311,17 @@ def add_message(meeting_id):
     )
     
     db.session.add(message)
-    db.session.commit()
-    
+    db.session.flush()
     user = User.query.get(current_user_id)
+    publish(meeting_id, 'new_message', {
+        'id': message.id,
+        'user_name': user.full_name,
+        'user_id': user.id,
+        'content': message.content,
+        'created_at': message.created_at.strftime('%H:%M:%S')
+    })
+    db.session.commit()
+    note_new_message(meeting_id, message.id)
     
     return jsonify({
         'id': message.id,
@@ -337,22 +350,7 @@ def vote(meeting_id, agenda_item_id):
     vote_value = request.form.get('vote')
     comment = request.form.get('comment', '')
     
-    # Check if this user already voted
-    existing_vote = MeetingVote.query.filter_by(agenda_item_id=agenda_item_id, user_id=current_user_id).first()
-    
-    if existing_vote:
-        existing_vote.vote = VoteType(vote_value)
-        existing_vote.comment = comment
-        existing_vote.voted_at = datetime.utcnow()
-    else:
-        vote = MeetingVote(
-            agenda_item_id=agenda_item_id,
-            user_id=current_user_id,
-            vote=VoteType(vote_value),
-            comment=comment
-        )
-        db.session.add(vote)
-    
+    cast_vote(agenda_item, current_user_id, VoteType(vote_value), comment)
     db.session.commit()
     flash('Ваш голос враховано!', 'success')
     return redirect(url_for('founder.view_meeting', meeting_id=meeting_id))
@@ -365,6 +363,8 @@ def generate_protocol(meeting):
     filename = f"protocol_{meeting.id}_{uuid.uuid4().hex[:8]}.pdf"
     filepath = os.path.join(upload_folder, filename)
     
+    from fpdf import FPDF  # loaded on first use: fpdf2 is only needed here
+
     pdf = FPDF()
     pdf.add_page()
     pdf.add_font('DejaVu', '', 'app/static/fonts/DejaVuSansCondensed.ttf', uni=True)
@@ -11,7 +11,9 @@ from app.models.settings import Settings
 from app.forms import EditProfileForm, LoginForm, RegistrationForm
 from flask_login import current_user, login_required, login_user, logout_user
 from werkzeug.utils import secure_filename
-from app.cache import cache, get_active_blocks, get_gallery_images, get_approved_projects, get_settings
+from app.cache import get_active_blocks, get_gallery_images, get_approved_projects, get_settings
+from app.blob_store import get_blob_store, send_model_image
+from app.page_cache import cached_page
 import io
 import os
 import traceback
@@ -32,10 +34,20 @@ def get_language_specific_template(base_name):
         return f"{base_name}.html"
 
 @main_bp.route('/')
-@cache.cached(timeout=300)  # Кэширование главной страницы на 5 минут
+# Кэш страницы отдельно для каждого языка и роли; сбрасывается при изменении
+# блоков, галереи, проектов или настроек (см. теги в app.cache)
+@cached_page('blocks', 'gallery', 'projects', 'settings')
 def index():
-    # Используем кэшированные функции для оптимизации
-    all_active_blocks = get_active_blocks()
+    # Используем кэшированные функции для оптимизации.
+    # BlockDTO неизменяемы и общие для всех запросов, поэтому переводы
+    # подставляем в копии через _replace
+    all_active_blocks = [
+        block._replace(
+            translated_title=get_translated_content(block, 'title'),
+            translated_content=get_translated_content(block, 'content'),
+        )
+        for block in get_active_blocks()
+    ]
 
     # Разделяем блоки по типам для обратной совместимости с шаблоном
     info_block = next((block for block in all_active_blocks if block.type == 'info'), None)
@@ -66,13 +78,6 @@ def index():
     # Получаем настройки
     settings = get_settings()
 
-    # Process translations for blocks (оптимизировано - только для видимых блоков)
-    blocks_to_translate = [b for b in [info_block, gallery_block, projects_block] + additional_blocks if b]
-
-    for block in blocks_to_translate:
-        block.translated_title = get_translated_content(block, 'title')
-        block.translated_content = get_translated_content(block, 'content')
-
     return render_template(
         'index.html',
         info_block=info_block,
@@ -121,7 +126,7 @@ def submit_project():
             }
             
             # Log what columns exist for debugging
-            current_app.logger.info(f"Project._existing_columns: {Project._existing_columns}")
+            current_app.logger.info(f"Project optional columns missing: {Project.missing_optional_columns()}")
             
             # DO NOT add image_data, image_mimetype, or document_url at all
             # These columns don't exist in the database
@@ -149,33 +154,21 @@ def submit_project():
 @main_bp.route('/project/image/<int:project_id>')
 def project_image_file(project_id):
     project = Project.query.get_or_404(project_id)
-    if project.image_data:
-        return send_file(io.BytesIO(project.image_data), mimetype=project.image_mimetype)
+    # У таблиці projects немає колонок із зображенням (див. Project), тому
+    # віддаємо файл зі сховища лише якщо хеш колись з'явиться у моделі
+    image_hash = getattr(project, 'image_hash', None)
+    store = get_blob_store()
+    if image_hash and store.exists(image_hash):
+        return store.send(image_hash, getattr(project, 'image_mimetype', None))
     elif project.image_url:
         return redirect(project.image_url)
     else:
         return '', 404
 
 @main_bp.route('/gallery/image/<int:image_id>')
-@cache.cached(timeout=86400)  # Кэш на 24 часа для изображений галереи
 def gallery_image_file(image_id):
     try:
-        img = GalleryImage.query.get_or_404(image_id)
-        if img.image_data:
-            response = send_file(
-                io.BytesIO(img.image_data), 
-                mimetype=img.image_mimetype
-            )
-            # Устанавливаем заголовок кэширования вручную с длительным сроком
-            response.headers['Cache-Control'] = 'public, max-age=31536000'
-            # Добавляем ETag для проверки изменений
-            response.add_etag()
-            return response
-        elif img.image_url:
-            return redirect(img.image_url)
-        else:
-            print(f"Error: Gallery image {image_id} has no data or URL")
-            return '', 404
+        return send_model_image(GalleryImage, image_id)
     except Exception as e:
         print(f"Error serving gallery image {image_id}: {str(e)}")
         return '', 500
@@ -248,9 +241,8 @@ def logout():
 @main_bp.route('/dashboard')
 @login_required
 def dashboard():
-    # Получаем баланс ферайна из настроек
-    from app.models.settings import Settings
-    settings = Settings.query.first()
+    # Получаем баланс ферайна из настроек (снимок в памяти воркера)
+    settings = get_settings()
     
     # Contributions field removed from User model
     last_contributor = None
@@ -0,0 +1,41 @@
+import re
+
+from flask import Blueprint
+
+from app.blob_store import IMMUTABLE_MAX_AGE, BlobNotFound, get_blob_store, restore_image
+from app.image_pipeline import (
+    VARIANT_WIDTHS, render_variant, variant_formats, variant_key, variant_mimetype
+)
+
+media_bp = Blueprint('media', __name__, url_prefix='/media')
+
+_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+@media_bp.route('/<image_hash>/<int:width>.<fmt>')
+def image_variant(image_hash, width, fmt):
+    """
+    Serve a resized variant of an image from the blob store.
+
+    URL contains the content hash, so the response is cached forever.
+    If the background pipeline has not finished yet, the variant is rendered on demand.
+    """
+    if not _HASH_RE.match(image_hash) or width not in VARIANT_WIDTHS or fmt not in variant_formats():
+        return '', 404
+
+    store = get_blob_store()
+    key = variant_key(image_hash, width, fmt)
+
+    try:
+        if not store.exists(key):
+            # The original may only survive as the DB copy (ephemeral disk)
+            if not store.exists(image_hash) and not restore_image(image_hash):
+                return '', 404
+            with store.open(image_hash) as f:
+                store.write(key, render_variant(f.read(), width, fmt))
+        return store.send(key, variant_mimetype(fmt), max_age=IMMUTABLE_MAX_AGE)
+    except BlobNotFound:
+        return '', 404
+    except Exception as e:
+        print(f"Error serving image variant {key}: {str(e)}")
+        return '', 500
@@ -1,9 +1,14 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, abort
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, abort, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
 from app.models.meeting import Meeting, AgendaItem, MeetingAttendee, MeetingVote, VoteType, MeetingStatus
 from app.models.user import UserRole
 from app import db
+from app.cache import cache, get_meeting_tallies
+from app.dto import VoteTally
+from app.loaders import get_loader
+from app.events import publish, broker, events_after, last_event_id, format_sse
 from datetime import datetime
+import time
 from flask_babel import _
 
 meeting_bp = Blueprint('meeting', __name__)
@@ -54,19 +59,29 @@ def meeting_detail(meeting_id):
         flash(_('This meeting is not yet available for viewing'), 'warning')
         return redirect(url_for('meeting.meetings_list'))
     
-    agenda_items = AgendaItem.query.filter_by(meeting_id=meeting.id).order_by(AgendaItem.order).all()
+    # Batched loaders: a constant number of queries however long the agenda is
+    loader = get_loader()
+    agenda_items = loader.agenda_items(meeting.id)
+    attendees = loader.attendees(meeting.id)
     
-    # Check if user has already voted on each agenda item
+    # Check if user has already voted on each agenda item (one IN query)
     user_votes = {}
     if current_user.is_founder:
-        for item in agenda_items:
-            vote = MeetingVote.query.filter_by(agenda_item_id=item.id, user_id=current_user.id).first()
-            user_votes[item.id] = vote.vote.value if vote else None
+        user_votes = loader.user_votes(meeting.id, current_user.id)
+    
+    # Latest protocol generation job (progress / error in the protocol card)
+    protocol_job = None
+    if meeting.status == MeetingStatus.completed and current_user.is_founder:
+        from app.jobs import latest_job
+        protocol_job = latest_job(f'protocol:{meeting.id}')
     
     return render_template('meetings/detail.html', 
                           meeting=meeting, 
                           agenda_items=agenda_items,
-                          user_votes=user_votes)
+                          attendees=attendees,
+                          has_quorum=len(attendees) >= Meeting.QUORUM,
+                          user_votes=user_votes,
+                          protocol_job=protocol_job)
 
 # Create new meeting - only for founders and admins
 @meeting_bp.route('/meetings/new', methods=['GET', 'POST'])
@@ -223,38 +238,10 @@ def vote_agenda_item(item_id):
     if vote_value not in [v.value for v in VoteType]:
         return jsonify({'error': _('Invalid vote value')}), 400
     
-    # Check if user has already voted
-    existing_vote = MeetingVote.query.filter_by(
-        agenda_item_id=item_id,
-        user_id=current_user.id
-    ).first()
-    
     try:
-        if existing_vote:
-            # Update existing vote
-            existing_vote.vote = VoteType(vote_value)
-            existing_vote.comment = comment
-            existing_vote.voted_at = datetime.utcnow()
-        else:
-            # Create new vote
-            new_vote = MeetingVote(
-                agenda_item_id=item_id,
-                user_id=current_user.id,
-                vote=VoteType(vote_value),
-                comment=comment
-            )
-            db.session.add(new_vote)
-        
+        results = cast_vote(item, current_user.id, VoteType(vote_value), comment)
         db.session.commit()
         
-        # Get updated vote counts
-        results = {
-            'yes': item.yes_votes,
-            'no': item.no_votes,
-            'abstain': item.abstain_votes,
-            'result': item.result
-        }
-        
         return jsonify({
             'success': True,
             'message': _('Vote recorded successfully'),
@@ -265,20 +252,46 @@ def vote_agenda_item(item_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def cast_vote(item, user_id, vote, comment=''):
+    """
+    Insert or replace the vote of a user (one upsert statement), then read
+    the fresh counts in the same transaction and push them to everyone
+    watching the meeting. The caller commits; returns the counts.
+    """
+    MeetingVote.upsert(item.id, user_id, vote, comment)
+    results = vote_results(item, fresh=True)
+    publish(item.meeting_id, 'vote_update', results)
+    return results
+
+def vote_results(item, fresh=False):
+    """
+    Vote counts of an agenda item (JSON responses and vote_update events).
+    fresh=True right after a vote is written, before the commit resets the cache.
+    """
+    tally = get_meeting_tallies(item.meeting_id, fresh=fresh).get(item.id, VoteTally())
+    return {
+        'item_id': item.id,
+        'yes': tally.yes,
+        'no': tally.no,
+        'abstain': tally.abstain,
+        'result': tally.result
+    }
+
+def attendee_event(user):
+    """Payload of user_joined / user_left events"""
+    return {
+        'user_id': user.id,
+        'name': user.full_name,
+        'time': datetime.utcnow().strftime('%H:%M:%S')
+    }
+
 # Get vote results for an item
 @meeting_bp.route('/meetings/agenda/<int:item_id>/results')
 @login_required
 def get_vote_results(item_id):
     item = AgendaItem.query.get_or_404(item_id)
     
-    results = {
-        'yes': item.yes_votes,
-        'no': item.no_votes,
-        'abstain': item.abstain_votes,
-        'result': item.result
-    }
-    
-    return jsonify(results)
+    return jsonify(vote_results(item))
 
 # Mark attendance for a meeting
 @meeting_bp.route('/meetings/<int:meeting_id>/attend', methods=['POST'])
@@ -304,6 +317,7 @@ def mark_attendance(meeting_id):
             joined_at=datetime.utcnow()
         )
         db.session.add(attendance)
+        publish(meeting_id, 'user_joined', attendee_event(current_user))
         db.session.commit()
         flash(_('Attendance marked successfully'), 'success')
     
@@ -375,32 +389,30 @@ def upload_protocol(meeting_id):
 @login_required
 @founder_required
 def generate_protocol(meeting_id):
-    """Генерирует протокол автоматически с помощью OpenAI"""
+    """
+    Ставит генерацию протокола (OpenAI + PDF) в очередь фоновых задач:
+    её выполняет `flask jobs work` (или поток этого процесса при JOBS_INLINE),
+    а готовый PDF появляется среди документов засідання. Повторное нажатие,
+    пока задача не завершена, возвращает её же.
+    """
+    from app.jobs import enqueue, run_inline
     meeting = Meeting.query.get_or_404(meeting_id)
     
-    try:
-        from app.protocol_generator import generate_and_save_protocol
-        from flask import send_file
-        import io
-        
-        # Генерируем протокол
-        pdf_bytes, filename = generate_and_save_protocol(meeting_id)
-        
-        # Сохраняем информацию о протоколе в БД
-        meeting.protocol_url = filename
-        db.session.commit()
-        
-        # Отправляем PDF файл пользователю
-        return send_file(
-            io.BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
-        
-    except Exception as e:
-        flash(_('Error generating protocol: {}').format(str(e)), 'error')
-        return redirect(url_for('meeting.meeting_detail', meeting_id=meeting_id))
+    job = enqueue('protocol', {'meeting_id': meeting.id}, key=f'protocol:{meeting.id}',
+                  created_by=current_user.id)
+    db.session.commit()
+    run_inline()
+    
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('api.job_status', job_id=job.id),
+            'progress_url': url_for('api.job_progress', job_id=job.id)
+        }), 202
+    
+    flash(_('Protocol generation has started. The PDF will appear in the meeting documents.'), 'info')
+    return redirect(url_for('meeting.meeting_detail', meeting_id=meeting_id))
 
 # Delete a meeting - only for admins
 @meeting_bp.route('/meetings/<int:meeting_id>/delete', methods=['POST'])
@@ -441,33 +453,80 @@ def delete_meeting(meeting_id):
 
 # ============= CHAT ROUTES =============
 
+def _last_message_key(meeting_id):
+    return f"chat:last:{meeting_id}"
+
+def note_new_message(meeting_id, message_id):
+    """
+    Remember the newest message id of a meeting in the shared cache, so
+    long-polling clients in any worker can wait for it without querying the DB.
+
+    The marker only moves forward; a concurrent request may still overwrite it
+    with a lower id, so waiters check the DB once when their wait times out.
+    """
+    key = _last_message_key(meeting_id)
+    last_id = cache.get(key)
+    if last_id is None or message_id > last_id:
+        cache.set(key, message_id, timeout=24 * 3600)
+
+def _messages_after(meeting_id, after_id, current_user_id):
+    """New messages with their authors, in one query (no per-message User lookup)"""
+    from app.models.meeting import Message
+    from app.models.user import User
+    rows = db.session.query(
+        Message.id, Message.user_id, Message.content, Message.created_at,
+        User.first_name, User.last_name, User.email,
+    ).outerjoin(User, User.id == Message.user_id).filter(
+        Message.meeting_id == meeting_id,
+        Message.id > after_id,
+    ).order_by(Message.id.asc()).all()
+    
+    return [{
+        'id': row.id,
+        'user_name': f"{row.first_name} {row.last_name}" if row.first_name else row.email,
+        'user_id': row.user_id,
+        'content': row.content,
+        'created_at': row.created_at.strftime('%H:%M:%S'),
+        'is_own': row.user_id == current_user_id
+    } for row in rows]
+
 @meeting_bp.route('/meetings/<int:meeting_id>/messages', methods=['GET'])
 @login_required
 def get_messages(meeting_id):
-    """Get all messages for a meeting (AJAX polling)"""
+    """
+    Get messages for a meeting (AJAX polling).
+
+    ?after_id=N returns only messages newer than N. With ?wait=S (and
+    CHAT_LONG_POLL_TIMEOUT > 0) the request is held until a new message
+    appears or S seconds pass; while waiting only the shared cache is checked,
+    and the DB is queried once at the end.
+    """
     meeting = Meeting.query.get_or_404(meeting_id)
     
     # Check access rights
     if meeting.status == MeetingStatus.planned and current_user.role not in [UserRole.admin, UserRole.founder]:
         return jsonify({'error': 'Access denied'}), 403
     
-    from app.models.meeting import Message
-    messages = Message.query.filter_by(meeting_id=meeting_id).order_by(Message.created_at.asc()).all()
-    
-    messages_data = []
-    for msg in messages:
-        from app.models.user import User
-        user = User.query.get(msg.user_id)
-        messages_data.append({
-            'id': msg.id,
-            'user_name': f"{user.first_name} {user.last_name}" if user.first_name else user.email,
-            'user_id': msg.user_id,
-            'content': msg.content,
-            'created_at': msg.created_at.strftime('%H:%M:%S'),
-            'is_own': msg.user_id == current_user.id
-        })
-    
-    return jsonify({'messages': messages_data})
+    after_id = request.args.get('after_id', 0, type=int)
+    wait = min(request.args.get('wait', 0, type=float), current_app.config.get('CHAT_LONG_POLL_TIMEOUT', 0))
+    current_user_id = current_user.id
+    
+    if wait > 0 and after_id:
+        last_id = cache.get(_last_message_key(meeting_id))
+        if last_id is not None and last_id <= after_id:
+            # Nothing new yet: give the DB connection back to the pool while waiting
+            db.session.close()
+            deadline = time.monotonic() + wait
+            interval = current_app.config.get('CHAT_LONG_POLL_INTERVAL', 0.5)
+            while last_id is not None and last_id <= after_id and time.monotonic() < deadline:
+                time.sleep(interval)
+                last_id = cache.get(_last_message_key(meeting_id))
+            # On timeout the DB is asked anyway: the marker may lag behind
+    
+    messages_data = _messages_after(meeting_id, after_id, current_user_id)
+    last_id = messages_data[-1]['id'] if messages_data else after_id
+    
+    return jsonify({'messages': messages_data, 'last_id': last_id})
 
 @meeting_bp.route('/meetings/<int:meeting_id>/messages', methods=['POST'])
 @login_required
@@ -491,16 +550,84 @@ def send_message(meeting_id):
     )
     
     db.session.add(message)
+    db.session.flush()
+    message_data = {
+        'id': message.id,
+        'user_name': f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email,
+        'user_id': message.user_id,
+        'content': message.content,
+        'created_at': message.created_at.strftime('%H:%M:%S'),
+    }
+    publish(meeting_id, 'new_message', message_data)
     db.session.commit()
+    note_new_message(meeting_id, message_data['id'])
     
     return jsonify({
         'success': True,
-        'message': {
-            'id': message.id,
-            'user_name': f"{current_user.first_name} {current_user.last_name}" if current_user.first_name else current_user.email,
-            'user_id': message.user_id,
-            'content': message.content,
-            'created_at': message.created_at.strftime('%H:%M:%S'),
-            'is_own': True
-        }
+        'message': dict(message_data, is_own=True)
     })
+
+# ============= PUSH EVENTS (SSE) =============
+
+@meeting_bp.route('/meetings/<int:meeting_id>/events')
+@login_required
+def meeting_events(meeting_id):
+    """
+    Server-Sent Events stream of a meeting: user_joined, user_left,
+    new_message, vote_update, new_document.
+
+    Resumes after the Last-Event-ID header (or ?last_event_id=); a fresh
+    connection starts from the newest event. The stream is closed after
+    SSE_STREAM_TIMEOUT seconds and the browser reconnects by itself.
+    """
+    meeting = Meeting.query.get_or_404(meeting_id)
+    
+    # Check access rights
+    if meeting.status == MeetingStatus.planned and current_user.role not in [UserRole.admin, UserRole.founder]:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    config = current_app.config
+    if not config.get('SSE_ENABLED', True):
+        return jsonify({'error': 'Event stream is disabled'}), 404
+    
+    include_private = current_user.is_admin or current_user.is_founder
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = request.args.get('last_event_id', type=int)
+    if last_id is None:
+        last_id = last_event_id(meeting_id)
+    
+    stream_timeout = config.get('SSE_STREAM_TIMEOUT', 300)
+    heartbeat = config.get('SSE_HEARTBEAT_INTERVAL', 15)
+    poll_interval = config.get('SSE_POLL_INTERVAL', 1.0)
+    broker.ensure_listener(db.engine)
+    # The stream may stay open for minutes: don't hold a pooled connection meanwhile
+    db.session.close()
+    
+    batch = 100
+    
+    def generate():
+        cursor = last_id
+        deadline = time.monotonic() + stream_timeout
+        yield "retry: 3000\n\n"
+        while True:
+            events = events_after(meeting_id, cursor, limit=batch)
+            db.session.close()
+            for event_id, event_name, data, founders_only in events:
+                cursor = event_id
+                if founders_only and not include_private:
+                    continue
+                yield format_sse(event_name, data, event_id)
+            if len(events) == batch:
+                continue  # more events are waiting
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not broker.wait(meeting_id, cursor, min(heartbeat, remaining), poll_interval):
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx/Render proxy: don't buffer the stream
+    return response
@@ -4,6 +4,8 @@ from app.models.block import Block
 import json
 from functools import wraps
 from app.routes.admin import admin_required
+from app.blob_store import db_copy
+from app.image_pipeline import ingest_image
 
 multilingual_admin_bp = Blueprint('multilingual_admin', __name__, url_prefix='/admin/multilingual')
 
@@ -52,36 +54,15 @@ def edit_block_multilingual(block_id):
         # Save translations as JSON string
         block.translations = json.dumps(translations)
         
-        # Process image uploads - сохраняем и в БД и на диск для надежности
+        # Process image uploads - сохраняем в хранилище файлов (копия в БД — см. db_copy)
         image_file = request.files.get('image_file')
         if image_file and image_file.filename:
-            # Generate unique filename
-            import os
-            from werkzeug.utils import secure_filename
-            from datetime import datetime
-            
-            # Create upload directory if it doesn't exist
-            upload_dir = os.path.join(os.getcwd(), 'app', 'static', 'uploads')
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-            
-            # Create unique filename
-            filename = secure_filename(image_file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            unique_filename = f"{timestamp}_{filename}"
-            file_path = os.path.join(upload_dir, unique_filename)
-            
-            # Сохраняем изображение в базе данных
-            image_data = image_file.read()
-            block.image_data = image_data
-            block.image_mimetype = image_file.mimetype
-            
-            # Сохраняем также файл на диск для совместимости
-            with open(file_path, 'wb') as f:
-                f.write(image_data)
-            
-            # Устанавливаем URL для совместимости
-            block.image_url = url_for('static', filename=f'uploads/{unique_filename}')
+            image_hash, image_mimetype = ingest_image(image_file)
+            if image_hash:
+                block.image_hash = image_hash
+                block.image_mimetype = image_mimetype
+                block.image_data = db_copy(image_hash)
+                block.image_url = None
         else:
             # If no file uploaded, use URL from form
             image_url = request.form.get('image_url')
@@ -157,36 +138,17 @@ def create_block_multilingual():
         # Save translations as JSON string if there are any
         if translations_dict:
             # Сохраняем как строку JSON, а не как словарь
-            block.translations = json.dumps(translations_dict)        # Process image uploads - сохраняем и в БД и на диск для надежности
+            block.translations = json.dumps(translations_dict)
+
+        # Process image uploads - сохраняем в хранилище файлов (копия в БД — см. db_copy)
         image_file = request.files.get('image_file')
         if image_file and image_file.filename:
-            # Generate unique filename
-            import os
-            from werkzeug.utils import secure_filename
-            from datetime import datetime
-            
-            # Create upload directory if it doesn't exist
-            upload_dir = os.path.join(os.getcwd(), 'app', 'static', 'uploads')
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-            
-            # Create unique filename
-            filename = secure_filename(image_file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            unique_filename = f"{timestamp}_{filename}"
-            file_path = os.path.join(upload_dir, unique_filename)
-            
-            # Сохраняем изображение в базе данных
-            image_data = image_file.read()
-            block.image_data = image_data
-            block.image_mimetype = image_file.mimetype
-            
-            # Сохраняем также файл на диск для совместимости
-            with open(file_path, 'wb') as f:
-                f.write(image_data)
-            
-            # Устанавливаем URL для совместимости
-            block.image_url = url_for('static', filename=f'uploads/{unique_filename}')
+            image_hash, image_mimetype = ingest_image(image_file)
+            if image_hash:
+                block.image_hash = image_hash
+                block.image_mimetype = image_mimetype
+                block.image_data = db_copy(image_hash)
+                block.image_url = None
         else:
             # If no file uploaded, use URL from form
             image_url = request.form.get('image_url')
@@ -0,0 +1,116 @@
+"""
+Відомості про фактичну схему БД (які колонки є в таблицях).
+
+Колонки визначаються ліниво — під час першого звернення, а не під час
+імпорту моделей чи старту воркера, — і кешуються:
+  * у пам'яті процесу;
+  * у файлі instance/schema_cache.json з ключем за ревізією Alembic, тож
+    інші воркери та наступні старти не роблять рефлексію взагалі.
+Після нової міграції ревізія змінюється і кеш перебудовується сам.
+Без таблиці alembic_version (база з db.create_all()) кешується лише в пам'яті.
+
+    from app.schema_info import has_column
+    if has_column('projects', 'image_data'): ...
+"""
+import json
+import logging
+import os
+import threading
+
+from flask import current_app
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger('app.schema_info')
+
+_lock = threading.Lock()
+_columns = {}  # назва таблиці -> frozenset колонок
+
+
+def _cache_path():
+    return current_app.config.get('SCHEMA_CACHE_PATH') or os.path.join(
+        current_app.instance_path, 'schema_cache.json')
+
+
+def _current_revision(connection):
+    try:
+        return connection.execute(text('SELECT version_num FROM alembic_version')).scalar()
+    except Exception:
+        # У PostgreSQL помилка псує транзакцію — відкочуємо перед рефлексією
+        connection.rollback()
+        return None
+
+
+def _read_file(revision, dialect):
+    try:
+        with open(_cache_path(), encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('revision') != revision or data.get('dialect') != dialect:
+        return {}
+    return data.get('tables', {})
+
+
+def _write_file(revision, dialect, tables):
+    path = _cache_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'revision': revision, 'dialect': dialect, 'tables': tables}, f)
+        # Атомарна заміна: воркери, що стартують одночасно, не прочитають половину файлу
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Не вдалося записати кеш схеми {path}: {e}")
+
+
+def _reflect(connection, table_name):
+    """Колонки таблиці: спочатку у схемі з get_table_args(), потім у схемі за замовчуванням"""
+    from app.models.helpers import get_table_args
+
+    insp = inspect(connection)
+    schemas = [get_table_args().get('schema'), None]
+    for schema in dict.fromkeys(schemas):
+        try:
+            columns = insp.get_columns(table_name, schema=schema)
+        except Exception as e:
+            logger.debug(f"Не вдалося прочитати {table_name} у схемі {schema}: {e}")
+            continue
+        if columns:
+            return sorted(col['name'] for col in columns)
+    return []
+
+
+def table_columns(table_name):
+    """Множина колонок, які реально існують у таблиці (порожня, якщо таблиці немає)"""
+    columns = _columns.get(table_name)
+    if columns is not None:
+        return columns
+
+    from app import db
+
+    with _lock:
+        if table_name in _columns:
+            return _columns[table_name]
+        with db.engine.connect() as connection:
+            revision = _current_revision(connection)
+            dialect = connection.dialect.name
+            tables = _read_file(revision, dialect) if revision else {}
+            if table_name not in tables:
+                tables[table_name] = _reflect(connection, table_name)
+                logger.info(f"Колонки {table_name}: {len(tables[table_name])} (ревізія {revision})")
+                if revision:
+                    _write_file(revision, dialect, tables)
+        for name, names in tables.items():
+            _columns.setdefault(name, frozenset(names))
+        return _columns[table_name]
+
+
+def has_column(table_name, column):
+    return column in table_columns(table_name)
+
+
+def reset_schema_cache():
+    """Забуває кеш процесу (напр. після міграції в тому ж процесі); файл лишається за ревізією"""
+    with _lock:
+        _columns.clear()
@@ -28,6 +28,7 @@ document.addEventListener('DOMContentLoaded', () => {
         el.textContent = text;
         chatMessages.appendChild(el);
         chatMessages.scrollTop = chatMessages.scrollHeight;
+        return el;
     }
 
     function addLoader() {
@@ -39,12 +40,13 @@ document.addEventListener('DOMContentLoaded', () => {
         return el;
     }
 
-    async function pollStatus(threadId, loaderEl) {
-        let keepPolling = true;
-        while (keepPolling) {
+    async function pollStatus(jobId, loaderEl) {
+        // Статус задачі читається зі спільного кешу сервера, без звернень до OpenAI
+        while (true) {
             await new Promise(r => setTimeout(r, 800));
-            const res = await fetch(`/api/assistant/status?thread_id=${encodeURIComponent(threadId)}`);
+            const res = await fetch(`/api/assistant/status?job_id=${encodeURIComponent(jobId)}`);
             const data = await res.json();
+            if (data.thread_id) threadId = data.thread_id;
             if (data.error) {
                 loaderEl.textContent = 'Помилка: ' + data.error;
                 break;
@@ -52,13 +54,90 @@ document.addEventListener('DOMContentLoaded', () => {
             if (data.status === 'done' && data.answer) {
                 loaderEl.remove();
                 addAssistantMessage(data.answer);
-                keepPolling = false;
                 break;
             }
             // if processing — продовжуємо
         }
     }
 
+    // Потоковий режим: слова відповіді з'являються одразу, без опитування статусу.
+    // Вимкнути: window.BRAMA_CHAT_STREAMING = false
+    const streamingSupported = window.BRAMA_CHAT_STREAMING !== false
+        && 'ReadableStream' in window && 'TextDecoder' in window;
+
+    // Повертає true, якщо відповідь отримано потоком; false — треба фонова задача
+    async function streamAnswer(text, loaderEl) {
+        const res = await fetch('/api/assistant/stream', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json', 'Accept': 'text/event-stream'},
+            body: JSON.stringify({ question: text, thread_id: threadId })
+        });
+        // 503 — питання ще не дійшло до асистента (слоти зайняті, OpenAI
+        // недоступний): відповідь прийде через /api/assistant. Інші помилки
+        // можуть настати вже після того, як питання додано в тред, тож
+        // повторне надсилання задублювало б його — показуємо помилку
+        if (res.status === 503) return false;
+        if (!res.ok || !res.body) {
+            const data = await res.json().catch(() => ({}));
+            if (data.thread_id) threadId = data.thread_id;
+            loaderEl.textContent = 'Помилка: ' + (data.error || res.status);
+            return true;
+        }
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let answerEl = null;
+
+        const handleFrame = (frame) => {
+            let eventName = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) eventName = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            if (!data) return;
+            const payload = JSON.parse(data);
+            if (eventName === 'thread' && payload.thread_id) {
+                threadId = payload.thread_id;
+            } else if (eventName === 'token') {
+                if (!answerEl) {
+                    loaderEl.remove();
+                    answerEl = addAssistantMessage('');
+                }
+                answerEl.textContent += payload.text;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else if (eventName === 'done') {
+                if (payload.thread_id) threadId = payload.thread_id;
+                if (!answerEl) {
+                    loaderEl.remove();
+                    answerEl = addAssistantMessage(payload.answer || '');
+                }
+            } else if (eventName === 'error') {
+                if (answerEl) answerEl.textContent += ' [' + payload.error + ']';
+                else loaderEl.textContent = 'Помилка: ' + payload.error;
+            }
+        };
+
+        try {
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    handleFrame(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                }
+            }
+        } catch (e) {
+            // Потік обірвався, коли питання вже в треді — не питаємо вдруге
+            if (answerEl) answerEl.textContent += ' [' + e.message + ']';
+            else loaderEl.textContent = 'Помилка мережі: ' + e.message;
+        }
+        return true;
+    }
+
     async function sendMessage() {
         const text = (messageInput.value || '').trim();
         if (!text) return;
@@ -67,6 +146,14 @@ document.addEventListener('DOMContentLoaded', () => {
         messageInput.value = '';
         const loaderEl = addLoader();
 
+        if (streamingSupported) {
+            try {
+                if (await streamAnswer(text, loaderEl)) return;
+            } catch (e) {
+                // Запит не дійшов до сервера (мережа/проксі) — пробуємо звичайний режим
+            }
+        }
+
         try {
             const res = await fetch('/api/assistant', {
                 method: 'POST',
@@ -85,9 +172,9 @@ document.addEventListener('DOMContentLoaded', () => {
             if (data.status === 'done' && data.answer) {
                 loaderEl.remove();
                 addAssistantMessage(data.answer);
-            } else if (data.status === 'processing') {
-                // Не блокуємо: починаємо опитування статусу
-                await pollStatus(threadId, loaderEl);
+            } else if (data.status === 'processing' && data.job_id) {
+                // Не блокуємо: починаємо опитування статусу задачі
+                await pollStatus(data.job_id, loaderEl);
             } else {
                 loaderEl.textContent = 'Невідомий статус відповіді.';
             }
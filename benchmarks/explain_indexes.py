@@ -0,0 +1,150 @@
+"""
+Query plans and timings of the hot queries the add_hot_path_indexes migration covers.
+
+For every query prints the plan (EXPLAIN QUERY PLAN on SQLite,
+EXPLAIN ANALYZE on PostgreSQL) and the median time of --runs executions.
+Parameters are taken from the database itself (the meeting with the most
+messages, its busiest voter, the block with the most approved projects), so
+it works on any seeded database (benchmarks/seed.py). migrations/env.py takes
+the database from DATABASE_URL, hence the two variables for one SQLite file:
+
+    DATABASE_URL=sqlite:////tmp/bench.db flask db downgrade add_meeting_events
+    SQLITE_PATH=/tmp/bench.db python benchmarks/explain_indexes.py --json before.json
+    DATABASE_URL=sqlite:////tmp/bench.db flask db upgrade
+    SQLITE_PATH=/tmp/bench.db python benchmarks/explain_indexes.py --baseline before.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import our application modules
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from sqlalchemy import func, select, text
+
+from app import create_app, db
+from app.models.meeting import AgendaItem, MeetingAttendee, MeetingVote, Message
+from app.models.meeting_document import MeetingDocument
+from app.models.project import Project
+
+
+def pick_parameters():
+    """Ids that make the queries touch as many rows as the seeded data allows"""
+    meeting_id = db.session.scalar(
+        select(Message.meeting_id).group_by(Message.meeting_id).order_by(func.count().desc()).limit(1))
+    user_id = db.session.scalar(
+        select(MeetingVote.user_id).join(AgendaItem, AgendaItem.id == MeetingVote.agenda_item_id)
+        .where(AgendaItem.meeting_id == meeting_id)
+        .group_by(MeetingVote.user_id).order_by(func.count().desc()).limit(1))
+    block_id = db.session.scalar(
+        select(Project.block_id).where(Project.status == 'approved')
+        .group_by(Project.block_id).order_by(func.count().desc()).limit(1))
+    last_message_id = db.session.scalar(
+        select(func.max(Message.id)).where(Message.meeting_id == meeting_id)) or 0
+    item_ids = db.session.scalars(
+        select(AgendaItem.id).where(AgendaItem.meeting_id == meeting_id)).all()
+    return {
+        'meeting_id': meeting_id or 0, 'user_id': user_id or 0, 'block_id': block_id or 0,
+        'after_id': max(last_message_id - 5, 0), 'item_ids': item_ids or [0],
+    }
+
+
+def hot_queries(p):
+    """The statements of the routes and loaders, with the parameters bound"""
+    return {
+        # app.routes.meeting._messages_after (chat polling)
+        'chat_poll': select(Message.id, Message.user_id, Message.content, Message.created_at)
+        .where(Message.meeting_id == p['meeting_id'], Message.id > p['after_id'])
+        .order_by(Message.id),
+        # founder.py / protocol_generator: the whole chat in order
+        'chat_history': select(Message.id, Message.user_id, Message.content)
+        .where(Message.meeting_id == p['meeting_id'])
+        .order_by(Message.created_at),
+        # app.cache._meeting_tallies
+        'vote_tallies': select(MeetingVote.agenda_item_id, MeetingVote.vote, func.count(MeetingVote.id))
+        .join(AgendaItem, AgendaItem.id == MeetingVote.agenda_item_id)
+        .where(AgendaItem.meeting_id == p['meeting_id'])
+        .group_by(MeetingVote.agenda_item_id, MeetingVote.vote),
+        # MeetingLoader.user_votes
+        'user_votes': select(MeetingVote.agenda_item_id, MeetingVote.vote)
+        .where(MeetingVote.agenda_item_id.in_(p['item_ids']), MeetingVote.user_id == p['user_id']),
+        # mark_attendance / founder chat: is the user still in the meeting
+        'open_attendance': select(MeetingAttendee)
+        .where(MeetingAttendee.meeting_id == p['meeting_id'], MeetingAttendee.user_id == p['user_id'],
+               MeetingAttendee.left_at.is_(None)).limit(1),
+        # MeetingLoader.agenda_items
+        'agenda': select(AgendaItem).where(AgendaItem.meeting_id == p['meeting_id'])
+        .order_by(AgendaItem.order),
+        # app.cache.get_approved_projects
+        'approved_projects': select(Project.id, Project.title, Project.created_at)
+        .where(Project.status == 'approved', Project.block_id == p['block_id'])
+        .order_by(Project.created_at.desc()),
+        # document list for non-founders
+        'public_documents': select(MeetingDocument.id, MeetingDocument.name)
+        .where(MeetingDocument.meeting_id == p['meeting_id'], MeetingDocument.is_public.is_(True)),
+    }
+
+
+def explain(statement):
+    """Plan lines of one statement"""
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    if dialect.name == 'sqlite':
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return [row[-1] for row in rows]
+    rows = db.session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")).all()
+    return [row[0] for row in rows]
+
+
+def time_query(statement, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        db.session.execute(statement).all()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN and timings of the indexed hot queries')
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', help='results of an earlier run to compare with')
+    parser.add_argument('--quiet', action='store_true', help='timings only, no plans')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        params = pick_parameters()
+        print(f"{db.engine.dialect.name}, parameters: "
+              f"meeting {params['meeting_id']}, user {params['user_id']}, block {params['block_id']}")
+        results = {}
+        for name, statement in hot_queries(params).items():
+            plan = explain(statement)
+            db.session.execute(statement).all()  # warm up
+            results[name] = {'median_ms': time_query(statement, args.runs), 'plan': plan}
+            if not args.quiet:
+                print(f"\n== {name}")
+                for line in plan:
+                    print(f"   {line}")
+        db.session.rollback()
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else {}
+    print(f"\n{'query':<18} {'median ms':>10}" + (f" {'baseline':>10} {'change':>8}" if baseline else ''))
+    for name, result in results.items():
+        line = f"{name:<18} {result['median_ms']:>10.3f}"
+        if name in baseline:
+            before = baseline[name]['median_ms']
+            line += f" {before:>10.3f} {(result['median_ms'] - before) / before:>+8.0%}"
+        print(line)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Locust load test over real HTTP (gunicorn, proxy, keep-alive, compression).
+
+Uses the ids and founder credentials from benchmarks/seed.json, so seed the
+target database first. Example against a local gunicorn:
+
+    locust -f benchmarks/locustfile.py --host http://127.0.0.1:8080 \
+        --headless -u 50 -r 10 -t 2m --csv benchmarks/results/run
+
+Locust prints p50/p95/p99 and requests/s per endpoint; --csv keeps them
+for comparing runs. Visitors browse the public site, founders sit in the
+active meeting: chat polling, history, voting and document downloads.
+"""
+import json
+import random
+import re
+from itertools import count
+from pathlib import Path
+
+from locust import HttpUser, between, task
+
+MANIFEST = json.loads((Path(__file__).resolve().parent / 'seed.json').read_text())
+_founder_numbers = count()
+
+CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+class Visitor(HttpUser):
+    """Anonymous visitor of the public site"""
+    weight = 4
+    wait_time = between(1, 4)
+
+    @task(5)
+    def index(self):
+        self.client.get('/', name='/')
+
+    @task(3)
+    def block_image(self):
+        self.client.get(f"/block-images/{random.choice(MANIFEST['block_ids'])}",
+                        name='/block-images/[id]')
+
+    @task(3)
+    def gallery_image(self):
+        self.client.get(f"/gallery/image/{random.choice(MANIFEST['gallery_ids'])}",
+                        name='/gallery/image/[id]')
+
+    @task(2)
+    def image_variant(self):
+        image_hash = random.choice(MANIFEST['image_hashes'])
+        self.client.get(f"/media/{image_hash}/{random.choice((320, 640))}.webp",
+                        name='/media/[hash]/[width].webp')
+
+
+class Founder(HttpUser):
+    """Founder in the active meeting: polls the chat, reads, votes"""
+    weight = 1
+    wait_time = between(2, 5)
+
+    def on_start(self):
+        number = next(_founder_numbers)
+        email = MANIFEST['founder_emails'][number % len(MANIFEST['founder_emails'])]
+        page = self.client.get('/login', name='/login')
+        match = CSRF_RE.search(page.text)
+        self.client.post('/login', name='/login', data={
+            'email': email,
+            'password': MANIFEST['password'],
+            'csrf_token': match.group(1) if match else '',
+        })
+        self.meeting_id = MANIFEST['active_meeting_id']
+        self.last_message_id = MANIFEST['last_message_id']
+
+    @task(10)
+    def chat_poll(self):
+        response = self.client.get(f"/meetings/{self.meeting_id}/messages?after_id={self.last_message_id}",
+                                   name='/meetings/[id]/messages?after_id')
+        if response.ok:
+            self.last_message_id = response.json().get('last_id', self.last_message_id)
+
+    @task(1)
+    def chat_history(self):
+        self.client.get(f"/meetings/{self.meeting_id}/messages", name='/meetings/[id]/messages')
+
+    @task(2)
+    def meeting_detail(self):
+        self.client.get(f"/meetings/{self.meeting_id}", name='/meetings/[id]')
+
+    @task(2)
+    def vote(self):
+        item_id = random.choice(MANIFEST['agenda_item_ids'])
+        self.client.post(f"/meetings/agenda/{item_id}/vote", name='/meetings/agenda/[id]/vote',
+                         data={'vote': random.choice(('yes', 'no', 'abstain'))})
+
+    @task(1)
+    def document_download(self):
+        self.client.get(f"/meeting/meetings/documents/{random.choice(MANIFEST['document_ids'])}",
+                        name='/meeting/meetings/documents/[id]')
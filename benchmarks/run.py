@@ -0,0 +1,202 @@
+"""
+In-process benchmark of the hot paths (no server, no network).
+
+Drives the app through Flask's test client from several threads and
+reports p50/p95/p99 latency and throughput per scenario. Needs a database
+seeded by benchmarks/seed.py (same DATABASE_URL / SQLITE_PATH):
+
+    SQLITE_PATH=/tmp/bench.db python benchmarks/run.py --requests 300 --concurrency 4
+    python benchmarks/run.py --json after.json --baseline before.json --tolerance 0.2
+
+With --baseline the run fails (exit code 1) when a scenario's p95 got
+slower than the baseline by more than the tolerance, so it can gate a deploy.
+For load over real HTTP (gunicorn, proxies, keep-alive) use locustfile.py.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add the parent directory to the path so we can import our application modules
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from app import create_app
+
+MANIFEST = Path(__file__).resolve().parent / 'seed.json'
+
+
+# Every scenario gets (client, manifest, rng) and returns the response.
+# Founder scenarios run with a logged-in founder client.
+
+def index(client, manifest, rng):
+    return client.get('/')
+
+
+def block_image(client, manifest, rng):
+    return client.get(f"/block-images/{rng.choice(manifest['block_ids'])}")
+
+
+def gallery_image(client, manifest, rng):
+    return client.get(f"/gallery/image/{rng.choice(manifest['gallery_ids'])}")
+
+
+def image_variant(client, manifest, rng):
+    image_hash = rng.choice(manifest['image_hashes'])
+    return client.get(f"/media/{image_hash}/{rng.choice((320, 640))}.webp")
+
+
+def chat_poll(client, manifest, rng):
+    # A client that is a few messages behind, as with 5 s polling
+    after_id = manifest['last_message_id'] - rng.randrange(0, 5)
+    return client.get(f"/meetings/{manifest['active_meeting_id']}/messages?after_id={after_id}")
+
+
+def chat_history(client, manifest, rng):
+    return client.get(f"/meetings/{manifest['active_meeting_id']}/messages")
+
+
+def meeting_detail(client, manifest, rng):
+    return client.get(f"/meetings/{manifest['active_meeting_id']}")
+
+
+def vote(client, manifest, rng):
+    item_id = rng.choice(manifest['agenda_item_ids'])
+    return client.post(f"/meetings/agenda/{item_id}/vote",
+                       data={'vote': rng.choice(('yes', 'no', 'abstain'))})
+
+
+def document_download(client, manifest, rng):
+    return client.get(f"/meeting/meetings/documents/{rng.choice(manifest['document_ids'])}")
+
+
+SCENARIOS = {
+    'index': (index, False),
+    'block_image': (block_image, False),
+    'gallery_image': (gallery_image, False),
+    'image_variant': (image_variant, False),
+    'chat_poll': (chat_poll, True),
+    'chat_history': (chat_history, True),
+    'meeting_detail': (meeting_detail, True),
+    'vote': (vote, True),
+    'document_download': (document_download, True),
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def make_client(app, manifest, founder_index):
+    client = app.test_client()
+    if founder_index is not None:
+        user_id = manifest['founder_ids'][founder_index % len(manifest['founder_ids'])]
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+    return client
+
+
+def run_scenario(app, manifest, name, requests, concurrency, seed):
+    func, needs_founder = SCENARIOS[name]
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(worker_index):
+        nonlocal errors
+        rng = random.Random(seed + worker_index)
+        client = make_client(app, manifest, worker_index if needs_founder else None)
+        local, failed = [], 0
+        for _ in range(requests // concurrency):
+            started = time.perf_counter()
+            response = func(client, manifest, rng)
+            local.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                failed += 1
+            response.close()
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    # Warm-up: caches, lazy imports, first connections
+    warm_client = make_client(app, manifest, 0 if needs_founder else None)
+    for _ in range(3):
+        func(warm_client, manifest, random.Random(seed)).close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Scenarios whose p95 regressed by more than the tolerance"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and before['p95_ms'] > 0 and result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='In-process benchmark of the hot paths')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='run only these scenarios (repeatable)')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=4, help='client threads')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', help='results of an earlier run (--json) to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 slowdown (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    if not MANIFEST.exists():
+        parser.error(f"{MANIFEST} not found: run benchmarks/seed.py first")
+    manifest = json.loads(MANIFEST.read_text())
+
+    app = create_app()
+    # Logging every request would dominate the numbers
+    app.logger.setLevel('WARNING')
+
+    print(f"{'scenario':<18} {'reqs':>6} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(app, manifest, name, args.requests, args.concurrency, args.seed)
+        results[name] = result
+        print(f"{name:<18} {result['requests']:>6} {result['errors']:>5} {result['rps']:>8.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['max_ms']:>8.1f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print('\nRegressions:\n  ' + '\n  '.join(regressions))
+            sys.exit(1)
+        print('\nNo regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Seed a database with realistic volumes for the benchmarks.
+
+Works on SQLite and PostgreSQL (it only goes through the models), e.g.:
+
+    SQLITE_PATH=/tmp/bench.db python benchmarks/seed.py --create-tables
+    DATABASE_URL=postgresql://... python benchmarks/seed.py --users 5000
+
+Writes benchmarks/seed.json with the ids and credentials used by
+benchmarks/run.py and benchmarks/locustfile.py. Rows are added, never
+removed: use a fresh database for reproducible numbers.
+"""
+import argparse
+import io
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to the path so we can import our application modules
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.blob_store import get_blob_store
+from app.models import (
+    AgendaItem, Block, GalleryImage, Meeting, MeetingAttendee, MeetingDocument,
+    MeetingStatus, MeetingVote, Message, User, VoteType,
+)
+
+MANIFEST = Path(__file__).resolve().parent / 'seed.json'
+PASSWORD = 'bench-password'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--founders', type=int, default=12)
+    parser.add_argument('--blocks', type=int, default=8, help='info blocks with a cover image')
+    parser.add_argument('--gallery-images', type=int, default=300)
+    parser.add_argument('--meetings', type=int, default=5)
+    parser.add_argument('--agenda-items', type=int, default=12, help='per meeting')
+    parser.add_argument('--messages', type=int, default=5000, help='chat history of the active meeting')
+    parser.add_argument('--documents', type=int, default=20)
+    parser.add_argument('--document-size', type=int, default=512 * 1024)
+    parser.add_argument('--create-tables', action='store_true', help='db.create_all() first (fresh SQLite)')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    return parser.parse_args()
+
+
+def make_image(rng, width=1600, height=1067):
+    """A JPEG with a random gradient (every image has different bytes)"""
+    from PIL import Image
+
+    base = tuple(rng.randrange(256) for _ in range(3))
+    img = Image.new('RGB', (width, height), base)
+    img.putpixel((rng.randrange(width), rng.randrange(height)), (255, 255, 255))
+    img = img.resize((width // 8, height // 8)).resize((width, height))
+    out = io.BytesIO()
+    img.save(out, format='JPEG', quality=85)
+    return out.getvalue()
+
+
+def bulk_insert(model, rows):
+    if rows:
+        db.session.execute(insert(model), rows)
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+    store = get_blob_store()
+    run = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    # One hash for every user: scrypt per user would take minutes
+    password_hash = generate_password_hash(PASSWORD)
+
+    print(f"Users: {args.users} (+{args.founders} founders)")
+    bulk_insert(User, [{
+        'email': f"bench-{run}-user-{i}@example.com",
+        'password_hash': password_hash,
+        'first_name': f"User{i}",
+        'last_name': 'Bench',
+        'role': 'user',
+    } for i in range(args.users)] + [{
+        'email': f"bench-{run}-founder-{i}@example.com",
+        'password_hash': password_hash,
+        'first_name': f"Founder{i}",
+        'last_name': 'Bench',
+        'role': 'founder',
+    } for i in range(args.founders)])
+    founders = [row[0] for row in db.session.query(User.id).filter(
+        User.email.like(f"bench-{run}-founder-%")).order_by(User.id)]
+
+    print(f"Blocks: {args.blocks} + 3 gallery blocks, {args.gallery_images} gallery images")
+    block_ids = []
+    for i in range(args.blocks):
+        block = Block(title=f"Bench block {i}", content='Lorem ipsum ' * 40, type='info',
+                      is_active=True, image_hash=store.put(make_image(rng)), image_mimetype='image/jpeg')
+        db.session.add(block)
+        db.session.flush()
+        block_ids.append(block.id)
+    gallery_blocks = []
+    for i in range(3):
+        block = Block(title=f"Bench gallery {i}", content='', type='gallery', is_active=True)
+        db.session.add(block)
+        db.session.flush()
+        gallery_blocks.append(block.id)
+    image_hashes = [store.put(make_image(rng)) for _ in range(args.gallery_images)]
+    bulk_insert(GalleryImage, [{
+        'block_id': gallery_blocks[i % len(gallery_blocks)],
+        'image_hash': image_hash,
+        'image_mimetype': 'image/jpeg',
+        'description': f"Bench image {i}",
+    } for i, image_hash in enumerate(image_hashes)])
+    gallery_ids = [row[0] for row in db.session.query(GalleryImage.id).filter(
+        GalleryImage.block_id.in_(gallery_blocks))]
+
+    print(f"Meetings: {args.meetings} x {args.agenda_items} agenda items, {args.messages} messages")
+    meetings = []
+    now = datetime.utcnow()
+    for i in range(args.meetings):
+        # The last meeting is the active one: chat, voting and documents
+        status = MeetingStatus.active if i == args.meetings - 1 else MeetingStatus.completed
+        meeting = Meeting(title=f"Bench meeting {i}", description='Bench', creator_id=founders[0],
+                          date=now - timedelta(days=args.meetings - i), status=status)
+        db.session.add(meeting)
+        db.session.flush()
+        meetings.append(meeting.id)
+        bulk_insert(AgendaItem, [{
+            'meeting_id': meeting.id, 'title': f"Item {k}", 'description': 'Bench item',
+            'order': k, 'requires_voting': k % 2 == 0,
+        } for k in range(args.agenda_items)])
+        bulk_insert(MeetingAttendee, [{
+            'meeting_id': meeting.id, 'user_id': founder_id, 'joined_at': meeting.date,
+        } for founder_id in founders])
+    active = meetings[-1]
+    agenda_ids = [row[0] for row in db.session.query(AgendaItem.id).filter(
+        AgendaItem.meeting_id == active, AgendaItem.requires_voting.is_(True)).order_by(AgendaItem.order)]
+    bulk_insert(MeetingVote, [{
+        'agenda_item_id': item_id, 'user_id': founder_id,
+        'vote': rng.choice(list(VoteType)), 'voted_at': now,
+    } for item_id in agenda_ids for founder_id in founders[1:]])
+    bulk_insert(Message, [{
+        'meeting_id': active, 'user_id': rng.choice(founders),
+        'content': f"Message {i}: " + 'bla ' * rng.randrange(3, 40),
+        'created_at': now - timedelta(seconds=args.messages - i),
+    } for i in range(args.messages)])
+    last_message_id = db.session.query(db.func.max(Message.id)).filter(Message.meeting_id == active).scalar()
+
+    print(f"Documents: {args.documents} x {args.document_size} bytes")
+    document_ids = []
+    for i in range(args.documents):
+        data = rng.randbytes(args.document_size)
+        document = MeetingDocument(meeting_id=active, name=f"Bench document {i}", description='',
+                                   file_hash=store.put(data), file_mimetype='application/pdf',
+                                   file_size=len(data), uploaded_by=founders[0], is_public=i % 2 == 0)
+        db.session.add(document)
+        db.session.flush()
+        document_ids.append(document.id)
+
+    db.session.commit()
+    return {
+        'password': PASSWORD,
+        'founder_emails': [f"bench-{run}-founder-{i}@example.com" for i in range(args.founders)],
+        'founder_ids': founders,
+        'block_ids': block_ids,
+        'gallery_ids': gallery_ids,
+        'image_hashes': image_hashes[:50],
+        'meeting_ids': meetings,
+        'active_meeting_id': active,
+        'agenda_item_ids': agenda_ids,
+        'last_message_id': last_message_id,
+        'document_ids': document_ids,
+    }
+
+
+def main():
+    args = parse_args()
+    app = create_app()
+    with app.app_context():
+        if args.create_tables:
+            db.create_all()
+        manifest = seed(args)
+        manifest['dialect'] = db.engine.dialect.name
+    MANIFEST.write_text(json.dumps(manifest, indent=2))
+    print(f"Manifest written to {MANIFEST}")
+
+
+if __name__ == '__main__':
+    main()
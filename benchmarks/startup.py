@@ -0,0 +1,111 @@
+"""
+Worker startup benchmark: how long a fresh process needs to serve its first request.
+
+Every run is a new Python process (like a gunicorn worker after a cold start
+on Render) that measures three phases:
+
+  * import   — `import app` (modules, extensions, blueprints);
+  * create   — create_app();
+  * first    — the first GET / through the test client (connections, lazy
+               schema detection, template compilation);
+and the peak RSS of the process. --importtime N lists the slowest imports.
+
+    SQLITE_PATH=/tmp/bench.db python benchmarks/startup.py --runs 10
+    python benchmarks/startup.py --path /meetings/1 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+status = application.test_client().get(sys.argv[1]).status_code
+served = time.perf_counter()
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kilobytes on Linux
+except ImportError:
+    rss = 0
+print(json.dumps({'import': imported - started, 'create': created - imported,
+                  'first': served - created, 'rss_mb': rss, 'status': status}))
+"""
+
+PHASES = ('import', 'create', 'first')
+
+
+def run_once(path):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, path],
+        cwd=ROOT, capture_output=True, text=True, env=dict(os.environ), check=True,
+    )
+    # Last line is ours, everything before it is the app's own startup output
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top):
+    """Slowest modules by cumulative time from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import run'],
+        cwd=ROOT, capture_output=True, text=True, env=dict(os.environ), check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.strip()))
+    print(f"\nTop {top} imports by cumulative time (import run):")
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker startup benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/', help='URL of the first request')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                        help='also list the N slowest imports (python -X importtime)')
+    args = parser.parse_args()
+
+    # One untimed run warms the OS file cache and writes .pyc files
+    run_once(args.path)
+    samples = [run_once(args.path) for _ in range(args.runs)]
+
+    statuses = {sample['status'] for sample in samples}
+    print(f"{args.runs} runs, GET {args.path} -> {', '.join(map(str, sorted(statuses)))}")
+    print(f"{'phase':<8} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    results = {}
+    for phase in PHASES + ('total',):
+        values = [sum(s[p] for p in PHASES) if phase == 'total' else s[phase] for s in samples]
+        results[phase] = {
+            'median_ms': statistics.median(values) * 1000,
+            'min_ms': min(values) * 1000,
+            'max_ms': max(values) * 1000,
+        }
+        print(f"{phase:<8} {results[phase]['median_ms']:>10.1f} "
+              f"{results[phase]['min_ms']:>8.1f} {results[phase]['max_ms']:>8.1f}")
+
+    rss = [sample['rss_mb'] for sample in samples]
+    results['rss_mb'] = {'median': statistics.median(rss), 'max': max(rss)}
+    print(f"peak RSS after the first request: {results['rss_mb']['median']:.1f} MB (median)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.importtime:
+        import_profile(args.importtime)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Concurrent voting stress test: many founders, each double-clicking at once.
+
+Creates its own active meeting with one voting agenda item and --founders
+founders, then fires --clicks simultaneous vote requests per founder
+(random yes/no/abstain) from --concurrency threads through the real route.
+Afterwards checks that:
+
+  * no request failed;
+  * every founder has exactly one row in meeting_votes;
+  * the stored vote is one of the votes that founder sent;
+  * the counts returned by the last request of each founder and the
+    cached /results agree with the rows in the database.
+
+Exits with code 1 when any check fails. The rows it created are removed
+at the end (--keep leaves them for inspection).
+
+    SQLITE_PATH=/tmp/stress.db python benchmarks/vote_stress.py --create-tables
+    DATABASE_URL=postgresql://... python benchmarks/vote_stress.py --founders 50 --clicks 4
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add the parent directory to the path so we can import our application modules
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from app import create_app, db
+from app.models import AgendaItem, Meeting, MeetingStatus, MeetingVote, User
+from app.models.meeting_event import MeetingEvent
+
+
+def create_fixture(founders):
+    run = uuid.uuid4().hex[:8]
+    users = [User(email=f"stress-{run}-founder-{i}@example.com", password_hash='-',
+                  first_name=f"Founder{i}", last_name='Stress', role='founder')
+             for i in range(founders)]
+    db.session.add_all(users)
+    db.session.flush()
+    meeting = Meeting(title=f"Vote stress {run}", creator_id=users[0].id, status=MeetingStatus.active)
+    db.session.add(meeting)
+    db.session.flush()
+    item = AgendaItem(meeting_id=meeting.id, title='Stress item', order=0, requires_voting=True)
+    db.session.add(item)
+    db.session.commit()
+    return meeting.id, item.id, [user.id for user in users]
+
+
+def remove_fixture(meeting_id, item_id, user_ids):
+    MeetingEvent.query.filter_by(meeting_id=meeting_id).delete()
+    MeetingVote.query.filter_by(agenda_item_id=item_id).delete()
+    AgendaItem.query.filter_by(id=item_id).delete()
+    Meeting.query.filter_by(id=meeting_id).delete()
+    User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent voting stress test')
+    parser.add_argument('--founders', type=int, default=20)
+    parser.add_argument('--clicks', type=int, default=3, help='simultaneous votes per founder')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--create-tables', action='store_true', help='db.create_all() first (fresh SQLite)')
+    parser.add_argument('--keep', action='store_true', help='leave the created rows in the database')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        if args.create_tables:
+            db.create_all()
+        meeting_id, item_id, user_ids = create_fixture(args.founders)
+
+    rng = random.Random(args.seed)
+    ballots = [(user_id, rng.choice(('yes', 'no', 'abstain')))
+               for user_id in user_ids for _ in range(args.clicks)]
+    rng.shuffle(ballots)
+    sent = {}
+    for user_id, vote in ballots:
+        sent.setdefault(user_id, set()).add(vote)
+
+    # All threads start voting at the same moment
+    barrier = threading.Barrier(min(args.concurrency, len(ballots)))
+    local = threading.local()
+
+    def cast(ballot):
+        user_id, vote = ballot
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            try:
+                barrier.wait(timeout=10)
+            except threading.BrokenBarrierError:
+                pass
+        login(local.client, user_id)
+        response = local.client.post(f"/meetings/agenda/{item_id}/vote", data={'vote': vote})
+        return user_id, response.status_code, response.get_json(silent=True) or {}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        responses = list(executor.map(cast, ballots))
+    elapsed = time.perf_counter() - started
+
+    failures = []
+    errors = [(status, body.get('error')) for _, status, body in responses if status != 200]
+    if errors:
+        failures.append(f"{len(errors)} failed requests, e.g. {errors[0]}")
+
+    with app.app_context():
+        rows = MeetingVote.query.filter_by(agenda_item_id=item_id).all()
+        per_user = Counter(row.user_id for row in rows)
+        duplicated = [user_id for user_id, count in per_user.items() if count > 1]
+        if duplicated:
+            failures.append(f"{len(duplicated)} founders have more than one vote row")
+        missing = set(user_ids) - set(per_user)
+        if missing and not errors:
+            failures.append(f"{len(missing)} founders have no vote row")
+        foreign = [row.user_id for row in rows if row.vote.value not in sent[row.user_id]]
+        if foreign:
+            failures.append(f"{len(foreign)} stored votes were never sent by their founder")
+
+        stored = Counter(row.vote.value for row in rows)
+        client = app.test_client()
+        login(client, user_ids[0])
+        results = client.get(f"/meetings/agenda/{item_id}/results").get_json()
+        if any(results[key] != stored[key] for key in ('yes', 'no', 'abstain')):
+            failures.append(f"/results {results} does not match the stored votes {dict(stored)}")
+        oversized = [body['results'] for _, status, body in responses
+                     if status == 200 and sum(body['results'][k] for k in ('yes', 'no', 'abstain')) > args.founders]
+        if oversized:
+            failures.append(f"{len(oversized)} responses counted more votes than founders, e.g. {oversized[0]}")
+
+        if not args.keep:
+            remove_fixture(meeting_id, item_id, user_ids)
+
+    print(f"{len(ballots)} votes from {args.founders} founders x {args.clicks} clicks, "
+          f"{args.concurrency} threads: {elapsed:.2f} s ({len(ballots) / elapsed:.0f} votes/s)")
+    print(f"stored: {dict(stored)} in {len(rows)} rows")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
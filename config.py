@@ -10,21 +10,107 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     
     if not SQLALCHEMY_DATABASE_URI:
-        SQLALCHEMY_DATABASE_URI = f"sqlite:///{basedir / 'site.db'}"
-        # SQLite doesn't use engine options
-        SQLALCHEMY_ENGINE_OPTIONS = {}
-    else:
-        # PostgreSQL specific options
-        SQLALCHEMY_ENGINE_OPTIONS = {
-            "connect_args": {
-                # правильный формат: опция -c и пробел
-                "options": f"-c search_path={os.getenv('DB_SCHEMA', 'brama')}"
-            }
-        }
+        # SQLITE_PATH — окрема база, напр. для бенчмарків (benchmarks/seed.py)
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.getenv('SQLITE_PATH', basedir / 'site.db')}"
+
+    # SQLALCHEMY_ENGINE_OPTIONS (PostgreSQL: search_path, размер пула на воркер,
+    # pre-ping/recycle, statement_timeout, режим PgBouncer) задаёт create_app()
+    # через app.db_pool.build_engine_options — config.py не импортирует пакет app.
+    # SQLite doesn't use engine options
+
+    # Бюджеты statement_timeout (мс) по blueprint'ам; остальные — DB_STATEMENT_TIMEOUT_MS.
+    # Публичные страницы должны отвечать быстро, админка и протоколы могут дольше,
+    # но всё равно меньше 60 с тайм-аута gunicorn
+    DB_STATEMENT_TIMEOUTS = {
+        'main': 5000,
+        'meeting': 5000,
+        'media': 5000,
+        'block_images': 5000,
+        'api': 10000,
+        'admin': 45000,
+        'founder': 45000,
+    }
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Сховище файлів (зображення): 'local' або 's3'
+    BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+    BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", str(basedir / 'instance' / 'blobs'))
+    # true — BLOB_STORE_PATH на постійному диску (Render disk); інакше локальний
+    # вміст дублюється в БД, бо ефемерний диск очищається з кожним деплоєм
+    BLOB_STORE_DURABLE = os.getenv("BLOB_STORE_DURABLE", "false").lower() in ("true", "1", "t")
+    BLOB_STORE_S3_BUCKET = os.getenv("BLOB_STORE_S3_BUCKET")
+    BLOB_STORE_S3_ENDPOINT = os.getenv("BLOB_STORE_S3_ENDPOINT")  # напр. MinIO для локальної розробки
+    BLOB_STORE_S3_PREFIX = os.getenv("BLOB_STORE_S3_PREFIX", "blobs")
+    # Віддача файлів через nginx/проксі (X-Sendfile) замість читання у Python
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "false").lower() in ("true", "1", "t")
+    # Кількість потоків для створення похідних зображень (WebP/AVIF)
+    IMAGE_PIPELINE_WORKERS = int(os.getenv("IMAGE_PIPELINE_WORKERS", "2"))
+    # Кэш, общий для всех воркеров: Redis (если задан URL и установлен redis),
+    # иначе файловый кэш в CACHE_DIR. CACHE_TYPE=SimpleCache — кэш в памяти процесса
+    CACHE_TYPE = os.getenv("CACHE_TYPE")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+    CACHE_DIR = os.getenv("CACHE_DIR", str(basedir / 'instance' / 'cache'))
+    # TTL кешу сторінок (app.page_cache); для анонімних відвідувачів довший,
+    # бо сторінка однакова для всіх і скидається тегами при зміні даних
+    PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "300"))
+    PAGE_CACHE_ANONYMOUS_TIMEOUT = int(os.getenv("PAGE_CACHE_ANONYMOUS_TIMEOUT", "3600"))
+    # Скільки секунд користувач (app.principal) живе у спільному кеші між запитами; 0 — вимкнено
+    PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    # Максимальний розмір тіла запиту: більші запити відхиляються з 413 ще до
+    # розбору форми (кілька фото галереї за раз вкладаються в цей ліміт)
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(50 * 1024 * 1024)))
+    # Ліміт на один документ засідання (перевіряється під час потокового запису)
+    DOCUMENT_MAX_SIZE = int(os.getenv("DOCUMENT_MAX_SIZE", str(10 * 1024 * 1024)))
+    # Long-poll чату засідання: скільки секунд запит може чекати на нові повідомлення.
+    # 0 — вимкнено (з sync-воркерами gunicorn кожен запит, що чекає, займає воркер)
+    CHAT_LONG_POLL_TIMEOUT = float(os.getenv("CHAT_LONG_POLL_TIMEOUT", "0"))
+    CHAT_LONG_POLL_INTERVAL = float(os.getenv("CHAT_LONG_POLL_INTERVAL", "0.5"))
+    # Push-канал засідань (SSE, app.events). Кожен відкритий потік займає потік
+    # воркера, тому потрібні gthread/gevent-воркери; без них — SSE_ENABLED=false.
+    # Потік закривається через SSE_STREAM_TIMEOUT секунд, браузер перепідключається
+    # з Last-Event-ID і нічого не губить
+    SSE_ENABLED = os.getenv("SSE_ENABLED", "true").lower() in ("1", "true", "yes")
+    SSE_STREAM_TIMEOUT = float(os.getenv("SSE_STREAM_TIMEOUT", "300"))
+    SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+    SSE_POLL_INTERVAL = float(os.getenv("SSE_POLL_INTERVAL", "1.0"))
+    # Статистика SQL на запит (app.query_stats): заголовок Server-Timing і рядок
+    # у лозі app.sql, коли запитів більше за бюджет або один запит повторюється
+    # SQL_N_PLUS_ONE_THRESHOLD разів (ознака N+1)
+    SQL_SERVER_TIMING = os.getenv("SQL_SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+    SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "30"))
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+    # Метрики Prometheus (app.metrics, маршрут /metrics; потрібен prometheus_client).
+    # Якщо задано METRICS_TOKEN, /metrics вимагає "Authorization: Bearer <токен>";
+    # без токена метрики відкриті лише поза production (METRICS_PUBLIC)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    METRICS_PUBLIC = os.getenv(
+        "METRICS_PUBLIC", "false" if os.getenv("FLASK_ENV") == "production" else "true"
+    ).lower() in ("1", "true", "yes")
     BABEL_DEFAULT_LOCALE = 'uk'
     
+    # OpenAI (асистент, TTS, Whisper, протоколи). OPENAI_BASE_URL — інший сервер
+    # з тим самим API, напр. локальний мок для тестів: python scripts/mock_openai.py
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+    # Відповіді асистента готує пул потоків (app.openai_client), а не потоки
+    # воркера; понад OPENAI_MAX_PENDING незавершених задач — 503 з Retry-After
+    OPENAI_POOL_WORKERS = int(os.getenv("OPENAI_POOL_WORKERS", "4"))
+    OPENAI_MAX_PENDING = int(os.getenv("OPENAI_MAX_PENDING", "32"))
+    # Скільки потоків воркера одночасно можуть чекати на TTS / Whisper (кожен окремо)
+    OPENAI_SYNC_CONCURRENCY = int(os.getenv("OPENAI_SYNC_CONCURRENCY", "2"))
+    # Фонові задачі (app.jobs, процес `flask jobs work`): як часто порожня черга
+    # перевіряється і через скільки секунд задачу впалого воркера бере інший
+    JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "2"))
+    JOBS_LOCK_TIMEOUT = int(os.getenv("JOBS_LOCK_TIMEOUT", "900"))
+    # true — окремого воркера немає (безкоштовний план, локальна розробка):
+    # задачі виконуються у фоновому потоці веб-процесу (app.jobs.run_inline)
+    JOBS_INLINE = os.getenv("JOBS_INLINE", "true").lower() in ("true", "1", "t")
+    # Протокол генерується у воркері задач, тож GPT-4 може відповідати довше за тайм-аут gunicorn
+    PROTOCOL_OPENAI_TIMEOUT = float(os.getenv("PROTOCOL_OPENAI_TIMEOUT", "300"))
+
     # Base URL for links in emails
     BASE_URL = os.getenv("BASE_URL", "http://localhost:8080")
     
@@ -0,0 +1,49 @@
+# Файл: gunicorn.conf.py
+# Gunicorn читает этот файл автоматически (из текущего каталога), параметры
+# командной строки в start.sh / render.yaml имеют приоритет над ним.
+import os
+import shutil
+import tempfile
+
+# Метрики Prometheus (app.metrics) в multiprocess-режиме: каждый воркер пишет
+# значения в файлы этого каталога, а /metrics в любом воркере суммирует их.
+# Переменная должна быть задана до того, как воркер импортирует prometheus_client.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "brama-prometheus"),
+)
+
+
+def on_starting(server):
+    """Чистим файлы метрик прошлого запуска мастер-процесса"""
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Живые gauge-метрики завершившегося воркера больше не учитываются"""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+# GUNICORN_PRELOAD=true — приложение загружается один раз в мастер-процессе
+# (--preload), воркеры получают его через fork и делят страницы памяти
+# (copy-on-write) вместо того, чтобы каждый импортировал всё заново.
+# Минус: изменения кода подхватываются только полным рестартом мастера.
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+
+def post_fork(server, worker):
+    """Соединения пула, открытые в мастере до fork, воркеру использовать нельзя"""
+    if not preload_app:
+        return
+    from app import db
+
+    application = server.app.wsgi()
+    with application.app_context():
+        # close=False: не закрываем сокеты, которыми ещё владеет мастер
+        db.engine.dispose(close=False)
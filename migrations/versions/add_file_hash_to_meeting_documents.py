@@ -0,0 +1,45 @@
+"""add file_hash to meeting_documents
+
+Revision ID: add_file_hash_to_meeting_documents
+Revises: add_image_hash_to_images
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_file_hash_to_meeting_documents'
+down_revision = 'add_image_hash_to_images'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add file_hash (SHA-256, served as ETag) to meeting_documents, with support for SQLite"""
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    try:
+        if is_sqlite:
+            with op.batch_alter_table('meeting_documents') as batch_op:
+                batch_op.add_column(sa.Column('file_hash', sa.String(64), nullable=True))
+        else:
+            op.add_column('meeting_documents', sa.Column('file_hash', sa.String(64), nullable=True), schema='brama')
+    except Exception as e:
+        print(f"Warning: Error adding file_hash to meeting_documents: {e}")
+    # Existing rows get their hash on first download (see routes/document.py)
+
+
+def downgrade():
+    """Drop column added in upgrade"""
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    try:
+        if is_sqlite:
+            with op.batch_alter_table('meeting_documents') as batch_op:
+                batch_op.drop_column('file_hash')
+        else:
+            op.drop_column('meeting_documents', 'file_hash', schema='brama')
+    except Exception as e:
+        print(f"Warning: Error removing file_hash from meeting_documents: {e}")
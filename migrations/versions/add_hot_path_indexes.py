@@ -0,0 +1,124 @@
+"""composite indexes for the meeting, chat and project hot queries
+
+Replaces sql/add_indexes.sql, which was SQLite-only and never applied.
+
+Revision ID: add_hot_path_indexes
+Revises: add_meeting_events
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_path_indexes'
+down_revision = 'add_meeting_events'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, unique) — the same indexes are declared on the models
+INDEXES = [
+    ('ix_messages_meeting_id_created_at', 'messages', ['meeting_id', 'created_at'], False),
+    ('uq_meeting_votes_agenda_item_id_user_id', 'meeting_votes', ['agenda_item_id', 'user_id'], True),
+    ('ix_meeting_attendees_meeting_id_user_id_left_at', 'meeting_attendees', ['meeting_id', 'user_id', 'left_at'], False),
+    ('ix_agenda_items_meeting_id_order', 'agenda_items', ['meeting_id', 'order'], False),
+    ('ix_projects_block_id_status_created_at', 'projects', ['block_id', 'status', 'created_at'], False),
+    ('ix_meeting_documents_meeting_id_is_public', 'meeting_documents', ['meeting_id', 'is_public'], False),
+]
+
+
+def upgrade():
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+    schema = None if is_sqlite else 'brama'
+
+    if not is_sqlite:
+        # A failed CREATE INDEX CONCURRENTLY (earlier run) leaves an INVALID
+        # index that if_not_exists would keep forever
+        _drop_invalid_indexes(schema)
+
+    # MeetingVote.upsert (ON CONFLICT) needs the unique index, so its failure
+    # aborts the migration instead of being printed and skipped
+    _create_unique_vote_index(is_sqlite, schema)
+
+    if is_sqlite:
+        for name, table, columns, unique in INDEXES:
+            if unique:
+                continue
+            try:
+                op.create_index(name, table, columns, if_not_exists=True)
+            except Exception as e:
+                print(f"Warning: Error creating index {name}: {e}")
+        _analyze(schema)
+        return
+
+    # CONCURRENTLY does not lock the tables for writes but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            if unique:
+                continue
+            try:
+                op.create_index(name, table, columns, schema=schema,
+                                if_not_exists=True, postgresql_concurrently=True)
+            except Exception as e:
+                print(f"Warning: Error creating index {name}: {e}")
+                _drop_invalid_indexes(schema, [name])
+        _analyze(schema)
+
+
+def _create_unique_vote_index(is_sqlite, schema):
+    """
+    Removes duplicate votes (keeps the latest one) and builds the unique index
+    in one transaction. On PostgreSQL the table is locked against writes
+    meanwhile, so no duplicate can slip in between the DELETE and the build;
+    the index is built without CONCURRENTLY, which cannot leave it INVALID
+    (meeting_votes is small, the lock lasts well under a second)
+    """
+    name, table, columns, _ = next(index for index in INDEXES if index[3])
+    votes_table = table if is_sqlite else f'{schema}.{table}'
+    if not is_sqlite:
+        op.execute(sa.text(f"LOCK TABLE {votes_table} IN SHARE ROW EXCLUSIVE MODE"))
+    op.execute(sa.text(
+        f"DELETE FROM {votes_table} WHERE id NOT IN ("
+        f"SELECT MAX(id) FROM {votes_table} GROUP BY agenda_item_id, user_id)"
+    ))
+    op.create_index(name, table, columns, unique=True, schema=schema, if_not_exists=True)
+
+
+def _drop_invalid_indexes(schema, names=None):
+    """Drops the INVALID leftovers of interrupted concurrent builds (PostgreSQL)"""
+    names = names or [name for name, _, _, _ in INDEXES]
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = :schema AND c.relname = ANY(:names) AND NOT i.indisvalid"
+    ), {'schema': schema, 'names': names}).scalars().all()
+    for name in invalid:
+        print(f"Dropping invalid index {schema}.{name}")
+        op.execute(sa.text(f"DROP INDEX IF EXISTS {schema}.{name}"))
+
+
+def _analyze(schema):
+    """
+    Fresh planner statistics. Without them SQLite prefers the new
+    messages(meeting_id, created_at) index to the primary key for the chat
+    polling query (meeting_id = ? AND id > ?), which then sorts the whole chat
+    """
+    for table in sorted({table for _, table, _, _ in INDEXES}):
+        try:
+            op.execute(sa.text(f"ANALYZE {schema}.{table}" if schema else f"ANALYZE {table}"))
+        except Exception as e:
+            print(f"Warning: Error analyzing {table}: {e}")
+
+
+def downgrade():
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+    schema = None if is_sqlite else 'brama'
+
+    for name, table, columns, unique in reversed(INDEXES):
+        try:
+            op.drop_index(name, table_name=table, schema=schema, if_exists=True)
+        except Exception as e:
+            print(f"Warning: Error dropping index {name}: {e}")
@@ -0,0 +1,48 @@
+"""add image_hash to blocks and gallery_images
+
+Revision ID: add_image_hash_to_images
+Revises: 7d21f02eb495
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_image_hash_to_images'
+down_revision = '7d21f02eb495'
+branch_labels = None
+depends_on = None
+
+TABLES = ('blocks', 'gallery_images')
+
+
+def upgrade():
+    """Add image_hash (SHA-256 key in the blob store) to image tables, with support for SQLite"""
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    for table in TABLES:
+        try:
+            if is_sqlite:
+                with op.batch_alter_table(table) as batch_op:
+                    batch_op.add_column(sa.Column('image_hash', sa.String(64), nullable=True))
+            else:
+                op.add_column(table, sa.Column('image_hash', sa.String(64), nullable=True), schema='brama')
+        except Exception as e:
+            print(f"Warning: Error adding image_hash to {table}: {e}")
+
+
+def downgrade():
+    """Drop columns added in upgrade"""
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    for table in TABLES:
+        try:
+            if is_sqlite:
+                with op.batch_alter_table(table) as batch_op:
+                    batch_op.drop_column('image_hash')
+            else:
+                op.drop_column(table, 'image_hash', schema='brama')
+        except Exception as e:
+            print(f"Warning: Error removing image_hash from {table}: {e}")
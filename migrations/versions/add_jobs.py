@@ -0,0 +1,64 @@
+"""add jobs table (durable background job queue, see app.jobs)
+
+Revision ID: add_jobs
+Revises: add_hot_path_indexes
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_jobs'
+down_revision = 'add_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+    schema = None if is_sqlite else 'brama'
+    users_fk = 'users.id' if is_sqlite else 'brama.users.id'
+
+    try:
+        op.create_table(
+            'jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=64), nullable=False),
+            sa.Column('key', sa.String(length=128), nullable=True),
+            sa.Column('payload', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(length=16), nullable=False),
+            sa.Column('progress', sa.Integer(), nullable=False),
+            sa.Column('message', sa.String(length=255), nullable=True),
+            sa.Column('result', sa.Text(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('max_attempts', sa.Integer(), nullable=False),
+            sa.Column('run_at', sa.DateTime(), nullable=False),
+            sa.Column('locked_by', sa.String(length=128), nullable=True),
+            sa.Column('locked_at', sa.DateTime(), nullable=True),
+            sa.Column('created_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['created_by'], [users_fk], ),
+            sa.PrimaryKeyConstraint('id'),
+            schema=schema
+        )
+        op.create_index('ix_jobs_status_run_at', 'jobs', ['status', 'run_at'], schema=schema)
+        op.create_index('ix_jobs_key', 'jobs', ['key'], schema=schema)
+    except Exception as e:
+        print(f"Warning: Error creating jobs: {e}")
+
+
+def downgrade():
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+    schema = None if is_sqlite else 'brama'
+
+    try:
+        op.drop_index('ix_jobs_key', table_name='jobs', schema=schema)
+        op.drop_index('ix_jobs_status_run_at', table_name='jobs', schema=schema)
+        op.drop_table('jobs', schema=schema)
+    except Exception as e:
+        print(f"Warning: Error dropping jobs: {e}")
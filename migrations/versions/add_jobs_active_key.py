@@ -0,0 +1,47 @@
+"""unique key of active jobs (one queued/running job per key)
+
+Revision ID: add_jobs_active_key
+Revises: add_jobs
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_jobs_active_key'
+down_revision = 'add_jobs'
+branch_labels = None
+depends_on = None
+
+ACTIVE = "status IN ('queued', 'running')"
+
+
+def upgrade():
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+    schema = None if is_sqlite else 'brama'
+    jobs_table = 'jobs' if is_sqlite else 'brama.jobs'
+
+    try:
+        # Parallel clicks could enqueue the same job twice before this index:
+        # keep the newest active job of every key
+        op.execute(sa.text(
+            f"UPDATE {jobs_table} SET status = 'failed', error = 'Duplicate of a newer job' "
+            f"WHERE key IS NOT NULL AND {ACTIVE} AND id NOT IN ("
+            f"SELECT MAX(id) FROM {jobs_table} WHERE key IS NOT NULL AND {ACTIVE} GROUP BY key)"
+        ))
+        op.create_index('uq_jobs_key_active', 'jobs', ['key'], unique=True, schema=schema,
+                        postgresql_where=sa.text(ACTIVE), sqlite_where=sa.text(ACTIVE))
+    except Exception as e:
+        print(f"Warning: Error creating uq_jobs_key_active: {e}")
+
+
+def downgrade():
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+    schema = None if is_sqlite else 'brama'
+
+    try:
+        op.drop_index('uq_jobs_key_active', table_name='jobs', schema=schema)
+    except Exception as e:
+        print(f"Warning: Error dropping uq_jobs_key_active: {e}")
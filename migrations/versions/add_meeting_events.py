@@ -0,0 +1,51 @@
+"""add meeting_events table (log behind the SSE push channel)
+
+Revision ID: add_meeting_events
+Revises: meeting_documents_file_data_nullable
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_meeting_events'
+down_revision = 'meeting_documents_file_data_nullable'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Events are appended in the same transaction as the change they describe"""
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+    schema = None if is_sqlite else 'brama'
+    meetings_fk = 'meetings.id' if is_sqlite else 'brama.meetings.id'
+
+    try:
+        op.create_table(
+            'meeting_events',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('meeting_id', sa.Integer(), nullable=True),
+            sa.Column('event', sa.String(length=32), nullable=False),
+            sa.Column('payload', sa.Text(), nullable=False),
+            sa.Column('founders_only', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['meeting_id'], [meetings_fk], ),
+            sa.PrimaryKeyConstraint('id'),
+            schema=schema
+        )
+        op.create_index('ix_meeting_events_meeting_id', 'meeting_events', ['meeting_id'], schema=schema)
+    except Exception as e:
+        print(f"Warning: Error creating meeting_events: {e}")
+
+
+def downgrade():
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+    schema = None if is_sqlite else 'brama'
+
+    try:
+        op.drop_index('ix_meeting_events_meeting_id', table_name='meeting_events', schema=schema)
+        op.drop_table('meeting_events', schema=schema)
+    except Exception as e:
+        print(f"Warning: Error dropping meeting_events: {e}")
@@ -0,0 +1,46 @@
+"""make meeting_documents.file_data nullable (contents moved to the blob store)
+
+Revision ID: meeting_documents_file_data_nullable
+Revises: add_file_hash_to_meeting_documents
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'meeting_documents_file_data_nullable'
+down_revision = 'add_file_hash_to_meeting_documents'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """New uploads store only metadata; contents live in the blob store under file_hash"""
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    try:
+        if is_sqlite:
+            with op.batch_alter_table('meeting_documents') as batch_op:
+                batch_op.alter_column('file_data', existing_type=sa.LargeBinary(), nullable=True)
+        else:
+            op.alter_column('meeting_documents', 'file_data', existing_type=sa.LargeBinary(),
+                            nullable=True, schema='brama')
+    except Exception as e:
+        print(f"Warning: Error altering meeting_documents.file_data: {e}")
+
+
+def downgrade():
+    """Restore NOT NULL (fails if documents without file_data exist)"""
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+
+    try:
+        if is_sqlite:
+            with op.batch_alter_table('meeting_documents') as batch_op:
+                batch_op.alter_column('file_data', existing_type=sa.LargeBinary(), nullable=False)
+        else:
+            op.alter_column('meeting_documents', 'file_data', existing_type=sa.LargeBinary(),
+                            nullable=False, schema='brama')
+    except Exception as e:
+        print(f"Warning: Error altering meeting_documents.file_data: {e}")
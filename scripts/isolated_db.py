@@ -0,0 +1,54 @@
+"""
+Runner for test scripts that need their own database
+
+Each check runs as a separate Python process against a fresh SQLite file
+(SQLITE_PATH in a temporary directory, DATABASE_URL removed), so the app it
+creates never shares a database or module state with other tests.
+
+A test script keeps only its assertions in a flow() function:
+
+    def test_something():
+        run_isolated(__file__, '--flow')
+
+    if __name__ == '__main__':
+        main(flow, test_something)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_isolated(*argv, env=None, timeout=300):
+    """
+    Runs `python <argv>` in the repository root with a fresh SQLite database
+    and asserts that it exits successfully.
+
+    Args:
+        argv: script path and its arguments
+        env: extra environment variables for the process
+
+    Returns:
+        subprocess.CompletedProcess with the captured stdout/stderr
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        process_env = dict(os.environ, SQLITE_PATH=os.path.join(tmp, 'test.db'), **(env or {}))
+        process_env.pop('DATABASE_URL', None)
+        result = subprocess.run(
+            [sys.executable, *[str(arg) for arg in argv]],
+            cwd=ROOT, env=process_env, capture_output=True, text=True, timeout=timeout,
+        )
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+    return result
+
+
+def main(flow, test):
+    """Entry point of a test script: `--flow` runs the checks in this process, otherwise the test"""
+    if '--flow' in sys.argv:
+        flow()
+    else:
+        test()
+        print(f"{test.__name__}: OK")
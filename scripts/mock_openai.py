@@ -0,0 +1,177 @@
+"""
+Local mock of the OpenAI API for tests and load testing
+
+Implements the endpoints the app uses: Assistants threads/messages/runs
+(including streamed runs), audio speech (TTS), audio transcriptions
+(Whisper) and chat completions.
+Every upstream call waits --delay seconds, so slow OpenAI responses can be
+reproduced without a key or network access. The assistant echoes the question.
+
+    python scripts/mock_openai.py --port 8089 --delay 2
+    OPENAI_API_KEY=test OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python run.py
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+
+from flask import Flask, Response, jsonify, request
+
+# A few bytes that look like an MP3 frame header are enough for the app
+FAKE_MP3 = b'\xff\xfb\x90\x64' + b'\x00' * 2048
+
+
+def create_mock_app(delay=0.5):
+    """Flask app imitating the OpenAI REST API (state lives in memory)"""
+    app = Flask('mock_openai')
+    app.config['MOCK_DELAY'] = delay
+    ids = itertools.count(1)
+    lock = threading.Lock()
+    threads = {}  # thread_id -> list of messages (oldest first)
+    runs = {}  # run_id -> run
+    app.stats = {'requests': 0}
+
+    def new_id(prefix):
+        return f"{prefix}_{next(ids):06d}"
+
+    def upstream_latency():
+        time.sleep(app.config['MOCK_DELAY'])
+
+    def message(thread_id, role, text):
+        return {
+            'id': new_id('msg'), 'object': 'thread.message', 'created_at': int(time.time()),
+            'thread_id': thread_id, 'role': role, 'status': 'completed',
+            'content': [{'type': 'text', 'text': {'value': text, 'annotations': []}}],
+            'attachments': [], 'metadata': {},
+        }
+
+    def thread_object(thread_id):
+        return {'id': thread_id, 'object': 'thread', 'created_at': int(time.time()), 'metadata': {}}
+
+    def last_question(thread_id):
+        questions = [m for m in threads[thread_id] if m['role'] == 'user']
+        return questions[-1]['content'][0]['text']['value'] if questions else ''
+
+    @app.before_request
+    def count_request():
+        app.stats['requests'] += 1
+
+    @app.route('/v1/threads', methods=['POST'])
+    def create_thread():
+        with lock:
+            thread_id = new_id('thread')
+            threads[thread_id] = []
+        return jsonify(thread_object(thread_id))
+
+    @app.route('/v1/threads/<thread_id>', methods=['GET'])
+    def retrieve_thread(thread_id):
+        if thread_id not in threads:
+            return jsonify({'error': {'message': 'No thread found', 'type': 'invalid_request_error'}}), 404
+        return jsonify(thread_object(thread_id))
+
+    @app.route('/v1/threads/<thread_id>/messages', methods=['POST'])
+    def create_message(thread_id):
+        content = (request.get_json(silent=True) or {}).get('content', '')
+        with lock:
+            item = message(thread_id, 'user', content)
+            threads.setdefault(thread_id, []).append(item)
+        return jsonify(item)
+
+    @app.route('/v1/threads/<thread_id>/messages', methods=['GET'])
+    def list_messages(thread_id):
+        limit = request.args.get('limit', 20, type=int)
+        data = list(reversed(threads.get(thread_id, [])))[:limit]  # newest first, like the API
+        return jsonify({
+            'object': 'list', 'data': data, 'has_more': False,
+            'first_id': data[0]['id'] if data else None, 'last_id': data[-1]['id'] if data else None,
+        })
+
+    @app.route('/v1/threads/<thread_id>/runs', methods=['POST'])
+    def create_run(thread_id):
+        body = request.get_json(silent=True) or {}
+        run = {
+            'id': new_id('run'), 'object': 'thread.run', 'created_at': int(time.time()),
+            'thread_id': thread_id, 'assistant_id': body.get('assistant_id'),
+            'status': 'queued', 'ready_at': time.monotonic() + app.config['MOCK_DELAY'],
+        }
+        with lock:
+            runs[run['id']] = run
+        if body.get('stream'):
+            return Response(stream_run(run), mimetype='text/event-stream')
+        return jsonify({k: v for k, v in run.items() if k != 'ready_at'})
+
+    def stream_run(run):
+        """Assistant stream events: the answer arrives word by word over --delay seconds"""
+        def frame(event, data):
+            return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+        public = {k: v for k, v in run.items() if k != 'ready_at'}
+        yield frame('thread.run.created', public)
+        words = f"Echo: {last_question(run['thread_id'])}".split(' ')
+        reply = message(run['thread_id'], 'assistant', '')
+        yield frame('thread.message.created', reply)
+        for i, word in enumerate(words):
+            time.sleep(app.config['MOCK_DELAY'] / len(words))
+            token = word if i == 0 else ' ' + word
+            yield frame('thread.message.delta', {'id': reply['id'], 'object': 'thread.message.delta', 'delta': {
+                'content': [{'index': 0, 'type': 'text', 'text': {'value': token, 'annotations': []}}]}})
+        reply['content'][0]['text']['value'] = ' '.join(words)
+        with lock:
+            threads[run['thread_id']].append(reply)
+            run['status'] = 'completed'
+        yield frame('thread.message.completed', reply)
+        yield frame('thread.run.completed', {**public, 'status': 'completed'})
+        yield 'event: done\ndata: [DONE]\n\n'
+
+    @app.route('/v1/threads/<thread_id>/runs/<run_id>', methods=['GET'])
+    def retrieve_run(thread_id, run_id):
+        with lock:
+            run = runs[run_id]
+            if run['status'] != 'completed':
+                if time.monotonic() >= run['ready_at']:
+                    run['status'] = 'completed'
+                    threads[thread_id].append(message(thread_id, 'assistant', f"Echo: {last_question(thread_id)}"))
+                else:
+                    run['status'] = 'in_progress'
+        return jsonify({k: v for k, v in run.items() if k != 'ready_at'})
+
+    @app.route('/v1/audio/speech', methods=['POST'])
+    def speech():
+        upstream_latency()
+        return Response(FAKE_MP3, mimetype='audio/mpeg')
+
+    @app.route('/v1/audio/transcriptions', methods=['POST'])
+    def transcriptions():
+        upstream_latency()
+        size = len(request.files['file'].read()) if 'file' in request.files else 0
+        return jsonify({'text': f"Transcribed {size} bytes"})
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        upstream_latency()
+        body = request.get_json(silent=True) or {}
+        prompt = body.get('messages', [{}])[-1].get('content', '')
+        return jsonify({
+            'id': new_id('chatcmpl'), 'object': 'chat.completion', 'created': int(time.time()),
+            'model': body.get('model', 'gpt-4'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': f"Mock protocol ({len(prompt)} chars of context)"}}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        })
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock of the OpenAI API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--delay', type=float, default=0.5, help='seconds every upstream call takes')
+    args = parser.parse_args()
+    print(f"Mock OpenAI API on http://{args.host}:{args.port}/v1 (delay {args.delay}s)")
+    create_mock_app(args.delay).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -41,8 +41,10 @@ psql "$DATABASE_URL" -c "UPDATE brama.blocks SET name = 'legacy' WHERE name IS N
 echo "[start.sh] Добавляем поле association_balance в таблицу settings..."
 psql "$DATABASE_URL" -c "ALTER TABLE brama.settings ADD COLUMN IF NOT EXISTS association_balance NUMERIC(10, 2) DEFAULT 0.00;" || echo "[start.sh] Couldn't add association_balance column, may already exist"
 
-# 3) Start the app with sync workers (no Socket.IO)
-echo "[start.sh] Starting Gunicorn with sync workers"
+# 3) Start the app with threaded workers (no Socket.IO)
+# Потоки (gthread) нужны для SSE: открытый поток событий собрания занимает
+# поток воркера, а не весь воркер
+echo "[start.sh] Starting Gunicorn with gthread workers"
 
 # Вычисляем количество воркеров (2 * CPU + 1) или минимум 3
 NUM_WORKERS=${WEB_CONCURRENCY:-3}  # По умолчанию используем 3 воркера
@@ -50,10 +52,12 @@ NUM_WORKERS=${WEB_CONCURRENCY:-3}  # По умолчанию используе
 # Настройки таймаута
 TIMEOUT=${GUNICORN_TIMEOUT:-60}  # 60 секунд таймаута для воркеров
 KEEPALIVE=${GUNICORN_KEEPALIVE:-5}  # 5 секунд keepalive для соединений
+NUM_THREADS=${GUNICORN_THREADS:-8}  # Потоков на воркер (SSE + обычные запросы)
 
-# Запускаем с sync workers (без Socket.IO/eventlet)
-exec gunicorn --worker-class sync \
+# Запускаем с gthread workers (без Socket.IO/eventlet)
+exec gunicorn --worker-class gthread \
     --workers $NUM_WORKERS \
+    --threads $NUM_THREADS \
     --timeout $TIMEOUT \
     --keep-alive $KEEPALIVE \
     --log-level info \
@@ -0,0 +1,149 @@
+"""
+Test script for the OpenAI-backed endpoints against the local mock API
+
+Starts scripts/mock_openai.py in a thread and points the app at it through
+OPENAI_BASE_URL, so no key or network access is needed. Checks that the
+assistant answers through a background job (the request returns at once),
+that the streaming endpoint relays tokens as they arrive, that TTS results
+are cached and that busy TTS slots give 503.
+
+Usage:
+    python test_assistant.py
+    python -m pytest -q test_assistant.py
+"""
+import json
+import threading
+import time
+from contextlib import ExitStack
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.openai_client import OpenAIBusy, upstream_slot
+from scripts.mock_openai import create_mock_app
+
+MOCK_DELAY = 0.3
+
+
+def start_mock():
+    mock = create_mock_app(delay=MOCK_DELAY)
+    server = make_server('127.0.0.1', 0, mock, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return mock, server
+
+
+def make_app(server):
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        OPENAI_API_KEY='test-key',
+        OPENAI_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1",
+    )
+    return app
+
+
+def test_assistant_answers_in_background():
+    mock, server = start_mock()
+    try:
+        client = make_app(server).test_client()
+
+        started = time.perf_counter()
+        response = client.post('/api/assistant', json={'question': 'Hello'})
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 202, response.get_json()
+        job_id = response.get_json()['job_id']
+        # The worker thread does not wait for the upstream run
+        assert elapsed < MOCK_DELAY
+
+        deadline = time.monotonic() + 10
+        data = {}
+        while time.monotonic() < deadline:
+            data = client.get(f"/api/assistant/status?job_id={job_id}").get_json()
+            if data['status'] != 'processing':
+                break
+            time.sleep(0.1)
+        assert data['status'] == 'done', data
+        assert data['answer'] == 'Echo: Hello'
+        assert data['thread_id']
+
+        # The next question continues the same thread
+        response = client.post('/api/assistant', json={'question': 'Again', 'thread_id': data['thread_id']})
+        assert response.get_json()['thread_id'] == data['thread_id']
+    finally:
+        server.shutdown()
+
+
+def test_assistant_stream_relays_tokens():
+    mock, server = start_mock()
+    try:
+        client = make_app(server).test_client()
+        started = time.perf_counter()
+        response = client.post('/api/assistant/stream', json={'question': 'one two three four'}, buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+
+        events, first_token = [], None
+        for chunk in response.response:
+            for frame in chunk.decode('utf-8').split('\n\n'):
+                if not frame.strip():
+                    continue
+                fields = dict(line.split(': ', 1) for line in frame.splitlines())
+                events.append((fields['event'], json.loads(fields['data'])))
+                if fields['event'] == 'token' and first_token is None:
+                    first_token = time.perf_counter() - started
+        response.close()
+
+        names = [name for name, _ in events]
+        assert names[0] == 'thread' and names[-1] == 'done', names
+        assert names.count('token') > 1
+        # The first words arrive before the whole answer is ready
+        assert first_token < MOCK_DELAY
+        done = events[-1][1]
+        assert done['answer'] == 'Echo: one two three four'
+        assert done['thread_id'] == events[0][1]['thread_id']
+    finally:
+        server.shutdown()
+
+
+def test_unknown_job_is_404():
+    mock, server = start_mock()
+    try:
+        client = make_app(server).test_client()
+        assert client.get('/api/assistant/status?job_id=nope').status_code == 404
+    finally:
+        server.shutdown()
+
+
+def test_tts_is_cached_and_limited():
+    mock, server = start_mock()
+    try:
+        app = make_app(server)
+        client = app.test_client()
+        text = f"Hello {time.time()}"
+
+        response = client.get('/tts', query_string={'text': text})
+        assert response.status_code == 200
+        assert response.mimetype == 'audio/mpeg'
+        requests_before = mock.stats['requests']
+        assert client.get('/tts', query_string={'text': text}).status_code == 200
+        assert mock.stats['requests'] == requests_before
+
+        # All TTS slots are taken: a new text is refused instead of blocking a worker thread
+        with app.app_context(), ExitStack() as stack:
+            try:
+                while True:
+                    stack.enter_context(upstream_slot('tts'))
+            except OpenAIBusy:
+                pass
+            response = client.get('/tts', query_string={'text': text + ' new'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    for test in (test_assistant_answers_in_background, test_assistant_stream_relays_tokens,
+                 test_unknown_job_is_404, test_tts_is_cached_and_limited):
+        test()
+        print(f"{test.__name__}: OK")
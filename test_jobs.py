@@ -0,0 +1,137 @@
+"""
+Test script for background protocol generation
+
+Runs the whole flow against a fresh SQLite database (scripts/isolated_db.py)
+and the local OpenAI mock (scripts/mock_openai.py): the route only enqueues
+a job, a second click returns the same job, the worker (app.jobs.work)
+generates the PDF into a meeting document and the status endpoints report
+the result.
+Then the same without a worker (JOBS_INLINE): the job runs in a thread of
+the web process while the page polls its progress.
+
+Usage:
+    python test_jobs.py
+    python -m pytest -q test_jobs.py
+"""
+import os
+import socket
+import threading
+import time
+
+from scripts.isolated_db import main, run_isolated
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_flow():
+    """The flow itself; expects SQLITE_PATH and OPENAI_BASE_URL of a mock in the environment"""
+    from werkzeug.serving import make_server
+
+    from sqlalchemy.exc import IntegrityError
+
+    from app import create_app, db
+    from app.jobs import work
+    from app.models import AgendaItem, Meeting, MeetingStatus, User
+    from app.models.job import Job
+    from app.models.meeting_document import MeetingDocument
+    from scripts.mock_openai import create_mock_app
+
+    port = int(os.environ['OPENAI_BASE_URL'].rsplit(':', 1)[1].split('/')[0])
+    mock = make_server('127.0.0.1', port, create_mock_app(delay=0.1), threaded=True)
+    threading.Thread(target=mock.serve_forever, daemon=True).start()
+
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['JOBS_INLINE'] = False
+    with app.app_context():
+        db.create_all()
+        founder = User(email='founder@example.com', password_hash='-', first_name='Anna',
+                       last_name='Test', role='founder')
+        member = User(email='member@example.com', password_hash='-', first_name='Petro',
+                      last_name='Test', role='member')
+        db.session.add_all([founder, member])
+        db.session.flush()
+        meeting = Meeting(title='Jahresversammlung', creator_id=founder.id, status=MeetingStatus.completed)
+        db.session.add(meeting)
+        db.session.flush()
+        db.session.add(AgendaItem(meeting_id=meeting.id, title='Haushalt', order=0, requires_voting=True))
+        db.session.commit()
+        founder_id, member_id, meeting_id = founder.id, member.id, meeting.id
+
+    def client_for(user_id):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return client
+
+    client = client_for(founder_id)
+    headers = {'Accept': 'application/json'}
+    response = client.post(f"/meetings/{meeting_id}/generate-protocol", headers=headers)
+    assert response.status_code == 202, response.data
+    job = response.get_json()
+    assert job['status'] == 'queued'
+
+    again = client.post(f"/meetings/{meeting_id}/generate-protocol", headers=headers).get_json()
+    assert again['job_id'] == job['job_id'], 'a second click must not enqueue a second job'
+    assert client_for(member_id).get(job['status_url']).status_code == 404
+
+    with app.app_context():
+        # The partial unique index holds even when two requests race past find_active()
+        db.session.add(Job(kind='protocol', key=f'protocol:{meeting_id}', payload='{}'))
+        try:
+            db.session.commit()
+            raise AssertionError('a second active job with the same key was stored')
+        except IntegrityError:
+            db.session.rollback()
+        assert MeetingDocument.query.filter_by(meeting_id=meeting_id).count() == 0
+        assert work('test-worker', once=True) == 1
+        assert Job.query.count() == 1
+
+    progress = client.get(job['progress_url']).get_json()
+    assert progress['status'] == 'done' and progress['progress'] == 100, progress
+    status = client.get(job['status_url']).get_json()
+    assert status['attempts'] == 1 and status['error'] is None, status
+
+    download = client.get(status['result']['url'])
+    assert download.status_code == 200 and download.data.startswith(b'%PDF'), download.status_code
+    with app.app_context():
+        document = db.session.get(MeetingDocument, status['result']['document_id'])
+        assert document.meeting_id == meeting_id and not document.is_public
+        assert db.session.get(Meeting, meeting_id).protocol_url == status['result']['url']
+
+    # No worker: the job runs in a background thread of the web process
+    app.config['JOBS_INLINE'] = True
+    with app.app_context():
+        meeting = Meeting(title='Vorstandssitzung', creator_id=founder_id, status=MeetingStatus.completed)
+        db.session.add(meeting)
+        db.session.commit()
+        inline_meeting_id = meeting.id
+    job = client.post(f"/meetings/{inline_meeting_id}/generate-protocol", headers=headers).get_json()
+    deadline = time.monotonic() + 60
+    progress = {}
+    while time.monotonic() < deadline:
+        progress = client.get(job['progress_url']).get_json()
+        if progress['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.2)
+    assert progress['status'] == 'done', progress
+    with app.app_context():
+        assert db.session.get(Meeting, inline_meeting_id).protocol_url
+    mock.shutdown()
+
+
+def test_protocol_generation_runs_in_background_job():
+    run_isolated(__file__, '--flow', env={
+        'OPENAI_API_KEY': 'test',
+        'OPENAI_BASE_URL': f"http://127.0.0.1:{free_port()}/v1",
+    })
+
+
+if __name__ == '__main__':
+    main(run_flow, test_protocol_generation_runs_in_background_job)
@@ -0,0 +1,92 @@
+"""
+Test script for SQL query budgets of the hot meeting pages
+
+Seeds a fresh SQLite database with an active meeting (agenda items, votes,
+attendees, chat) and checks with app.query_stats.assert_max_queries that
+the meeting page and the chat poll stay within their query budgets and do
+not repeat a statement per row (N+1). Twice as much data must not cost a
+single extra query. Runs on its own database (scripts/isolated_db.py).
+
+Usage:
+    python test_query_budget.py
+    python -m pytest -q test_query_budget.py
+"""
+from scripts.isolated_db import main, run_isolated
+
+# endpoint -> (max queries, a statement repeated this often is an N+1)
+BUDGETS = {
+    'meeting_detail': (7, 2),
+    'get_messages': (2, 2),
+}
+
+
+def seed_meeting(db, founders, items, messages_per_user):
+    from app.models import AgendaItem, Meeting, MeetingStatus, MeetingVote, Message, User
+    from app.models.meeting import MeetingAttendee
+
+    count = User.query.count()
+    users = [User(email=f"budget-{count + i}@example.com", password_hash='-', first_name='Founder',
+                  last_name=str(count + i), role='founder') for i in range(founders)]
+    db.session.add_all(users)
+    db.session.flush()
+    meeting = Meeting(title='Budget meeting', creator_id=users[0].id, status=MeetingStatus.active)
+    db.session.add(meeting)
+    db.session.flush()
+    for order in range(items):
+        item = AgendaItem(meeting_id=meeting.id, title=f"Item {order}", order=order, requires_voting=True)
+        db.session.add(item)
+        db.session.flush()
+        db.session.add_all(MeetingVote(agenda_item_id=item.id, user_id=user.id, vote='yes') for user in users)
+    for user in users:
+        db.session.add(MeetingAttendee(meeting_id=meeting.id, user_id=user.id))
+        db.session.add_all(Message(meeting_id=meeting.id, user_id=user.id, content='Hallo')
+                           for _ in range(messages_per_user))
+    db.session.commit()
+    return meeting.id, users[0].id
+
+
+def run_flow():
+    """The checks themselves; expects SQLITE_PATH of an empty database in the environment"""
+    from app import create_app, db
+    from app.query_stats import assert_max_queries
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        small = seed_meeting(db, founders=3, items=2, messages_per_user=2)
+        large = seed_meeting(db, founders=6, items=4, messages_per_user=4)
+
+    counts = {}
+    for size, (meeting_id, user_id) in (('small', small), ('large', large)):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        urls = {
+            'meeting_detail': f"/meetings/{meeting_id}",
+            'get_messages': f"/meetings/{meeting_id}/messages?after_id=0",
+        }
+        for endpoint, url in urls.items():
+            client.get(url)  # warm the principal and tally caches
+            limit, n_plus_one = BUDGETS[endpoint]
+            with app.app_context():
+                with assert_max_queries(limit, n_plus_one=n_plus_one) as stats:
+                    response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+            counts[endpoint, size] = stats.count
+
+    for endpoint in BUDGETS:
+        small_count, large_count = counts[endpoint, 'small'], counts[endpoint, 'large']
+        assert large_count == small_count, \
+            f"{endpoint}: {small_count} queries for the small meeting, {large_count} for the large one"
+    print(counts)
+
+
+def test_meeting_pages_stay_within_query_budget():
+    run_isolated(__file__, '--flow')
+
+
+if __name__ == '__main__':
+    main(run_flow, test_meeting_pages_stay_within_query_budget)
@@ -0,0 +1,24 @@
+"""
+Test script for concurrent voting
+
+Runs benchmarks/vote_stress.py against a fresh SQLite database
+(scripts/isolated_db.py): founders vote several times at once on the same
+agenda item, and every founder must end up with exactly one vote row and
+consistent counts.
+
+Usage:
+    python test_votes.py
+    python -m pytest -q test_votes.py
+"""
+from scripts.isolated_db import run_isolated
+
+
+def test_concurrent_votes_keep_one_row_per_founder():
+    result = run_isolated('benchmarks/vote_stress.py', '--create-tables',
+                          '--founders', '12', '--clicks', '4', '--concurrency', '12')
+    assert 'OK' in result.stdout.splitlines()[-1]
+
+
+if __name__ == '__main__':
+    test_concurrent_votes_keep_one_row_per_founder()
+    print("test_concurrent_votes_keep_one_row_per_founder: OK")